@@ -0,0 +1,1803 @@
+"""
+Benchmarks sin cámara ni pantalla.
+
+Uso:
+    python benchmark.py switch [--video clip.mp4] [--open-delay 0.8] [--switches 20]
+    python benchmark.py engine-rss [--cycles 1000] [--frames 3] [--max-growth-mb 50]
+    python benchmark.py infer-size [--video clip.mp4] [--sizes 0,960,640,480,320]
+    python benchmark.py gestures [--hands 1] [--iterations 20000]
+    python benchmark.py record-session --video clip.mp4 --ok-ranges 1.2-3.4,5.0-6.5 --out s.npz
+    python benchmark.py triggers s.npz [otra.npz ...] [--holds 3,2,1.5,1,0.7]
+    python benchmark.py qr corpus/ clip.mp4 qr.png [--max-frames 300]
+    python benchmark.py focus [--seconds 6] [--interval 0.25] [--stub-startup 0.15]
+    python benchmark.py serial [--seconds 5] [--protocol legacy|framed] [--loss 0.1] [--write-delay-ms 0] [--max-idle-cpu 0.05]
+    python benchmark.py preprocess [--video clip.mp4] [--frames 300] [--mirror]
+    python benchmark.py menu-render [--video clip.mp4] [--frames 300]
+    python benchmark.py squares [--counts 10,100,300,1000] [--frames 30]
+    python benchmark.py game [--difficulty caos] [--seconds 30] [--fps 30] [--record s.trail]
+    python benchmark.py game-replay s.trail [--repeat 3]
+    python benchmark.py game-soak [--difficulty caos] [--minutes 10]
+    python benchmark.py tip-eval [s.trail ...] [--latency 0.08] [--fps 30]
+    python benchmark.py hand-flow --video clip.mp4 [--every 2,3,5] [--frames 300]
+    python benchmark.py idle --source video:vacio.mp4 [--fps 30]
+    python benchmark.py hand-worker [--video clip.mp4] [--frames 300] [--kill-at 150] [--cold-stall 0.1]
+    python benchmark.py metrics-overhead [--iterations 200000]
+    python benchmark.py replay --source video:clip.mp4 [--modes menu,qr,gestos,juego,foto] [--json out.json]
+
+Sesiones grabadas (.npz): t (N,) segundos, landmarks (N, 21, 3) con NaN en los
+frames sin mano, conf (N,) confianza de la mano y ok (N,) bool con los tramos en
+que la persona hacía de verdad el gesto OK.
+"""
+from __future__ import annotations
+
+import argparse
+import errno
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import cv2
+import numpy as np
+
+import camera_hub
+import frame_sources
+
+
+def _stats_ms(values: List[float]) -> Dict[str, float]:
+    arr = np.asarray(values, dtype=np.float64) * 1000.0
+    if arr.size == 0:
+        return {"n": 0}
+    return {
+        "n": int(arr.size),
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "max": float(arr.max()),
+    }
+
+
+def _print_stats(title: str, values: List[float]) -> None:
+    s = _stats_ms(values)
+    if not s["n"]:
+        print(f"{title:<28} sin muestras")
+        return
+    print(f"{title:<28} n={s['n']:<4} mean={s['mean']:8.2f}ms  p50={s['p50']:8.2f}ms  "
+          f"p95={s['p95']:8.2f}ms  max={s['max']:8.2f}ms")
+
+
+def _source_factory(args) -> Callable[[], object]:
+    if args.video:
+        return lambda: frame_sources.VideoFileSource(args.video, loop=True)
+    return lambda: frame_sources.SyntheticSource(
+        camera_hub.HUB_W, camera_hub.HUB_H, fps=args.fps, open_delay=args.open_delay)
+
+
+# ---------------------------------------------------------------------------
+# switch: latencia de cambio de modo (hasta el primer frame disponible)
+# ---------------------------------------------------------------------------
+
+def bench_switch(args) -> None:
+    factory = _source_factory(args)
+
+    # Antes: cada modo abría, configuraba y liberaba su propia captura
+    reopen: List[float] = []
+    for _ in range(args.switches):
+        t0 = time.perf_counter()
+        cap = factory()
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_hub.HUB_W)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_hub.HUB_H)
+        ok, _frame = cap.read()
+        reopen.append(time.perf_counter() - t0)
+        cap.release()
+        if not ok:
+            print("❌ La fuente no entregó frames")
+            return
+
+    # Ahora: un hub persistente y los modos sólo se suscriben
+    hub = camera_hub.CameraHub(source_factory=factory)
+    if not hub.start():
+        print("❌ No se pudo iniciar el hub")
+        return
+    shared: List[float] = []
+    try:
+        for _ in range(args.switches):
+            t0 = time.perf_counter()
+            cap = camera_hub.open_capture(hub)
+            ok, _frame = cap.read()
+            shared.append(time.perf_counter() - t0)
+            cap.release()
+    finally:
+        hub.stop()
+
+    print(f"Cambio de modo ({args.switches} cambios, fuente: {args.video or 'sintética'})")
+    _print_stats("reabrir VideoCapture", reopen)
+    _print_stats("suscripción al hub", shared)
+
+
+# ---------------------------------------------------------------------------
+# engine-rss: memoria al ciclar modos con el motor de manos compartido
+# ---------------------------------------------------------------------------
+
+def bench_engine_rss(args) -> None:
+    """
+    Entra y sale de cada modo (su run() completo, con una fuente sintética
+    corta y sin pantalla) *cycles* veces: la memoria y los hilos tienen que
+    volver a lo mismo, los modos no pueden dejar nada abierto al salir.
+    """
+    import threading
+
+    import psutil
+
+    import hand_engine
+
+    sink = _headless()
+    proc = psutil.Process()
+
+    def cycle(modes: Dict[str, Callable]) -> None:
+        for run in modes.values():
+            # Unos pocos frames: al terminarse la fuente el modo sale por su camino normal
+            hub = camera_hub.CameraHub(source_factory=lambda: frame_sources.SyntheticSource(
+                camera_hub.HUB_W, camera_hub.HUB_H, fps=0, frames=args.frames))
+            if not hub.start():
+                raise SystemExit("❌ No se pudo abrir la fuente sintética")
+            try:
+                run(hub)
+            finally:
+                hub.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = _replay_modes(tmp)
+        # Primera vuelta para que los grafos y buffers de MediaPipe ya estén creados
+        cycle(modes)
+        base = proc.memory_info().rss
+        threads = threading.active_count()
+        peak = base
+
+        t0 = time.perf_counter()
+        for i in range(args.cycles):
+            cycle(modes)
+            if i % 50 == 0:
+                peak = max(peak, proc.memory_info().rss)
+        elapsed = time.perf_counter() - t0
+        final = proc.memory_info().rss
+        left = threading.active_count() - threads
+    hand_engine.shutdown()
+
+    growth_mb = (max(peak, final) - base) / 2**20
+    print(f"{args.cycles} ciclos de {len(modes)} modos ({', '.join(modes)}) en {elapsed:.1f}s, "
+          f"{sink.frames_shown} frames mostrados")
+    print(f"RSS base={base / 2**20:.1f}MB  final={final / 2**20:.1f}MB  crecimiento={growth_mb:.1f}MB  "
+          f"hilos de más={left}")
+    if growth_mb > args.max_growth_mb:
+        raise SystemExit(f"❌ RSS creció {growth_mb:.1f}MB (límite {args.max_growth_mb}MB)")
+    if left > 0:
+        raise SystemExit(f"❌ Quedaron {left} hilos vivos después de salir de los modos")
+    print("✅ RSS e hilos acotados")
+
+
+# ---------------------------------------------------------------------------
+# infer-size: costo de CPU por frame según la resolución de inferencia
+# ---------------------------------------------------------------------------
+
+def _load_frames(video: str | None, count: int, width: int, height: int) -> List[np.ndarray]:
+    if video:
+        source = frame_sources.VideoFileSource(video, fps=0, loop=True)
+    else:
+        source = frame_sources.SyntheticSource(width, height, fps=0)
+    frames = []
+    for _ in range(count):
+        ok, frame = source.read()
+        if not ok:
+            break
+        frames.append(cv2.resize(frame, (width, height)))
+    source.release()
+    return frames
+
+
+def bench_infer_size(args) -> None:
+    import dataclasses
+
+    import hand_engine
+    import menu_mode
+
+    frames = _load_frames(args.video, args.frames, menu_mode.WIN_W, menu_mode.WIN_H)
+    if not frames:
+        print("❌ No hay frames para medir")
+        return
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(f"Inferencia sobre {len(frames)} frames {menu_mode.WIN_W}x{menu_mode.WIN_H} "
+          f"(fuente: {args.video or 'sintética'})")
+    for size in sizes:
+        config = dataclasses.replace(menu_mode.HANDS_CONFIG, inference_width=size)
+        engine = hand_engine.HandEngine()
+        engine.configure(config)
+        engine.process(frames[0])  # calentar el grafo
+
+        cpu: List[float] = []
+        wall: List[float] = []
+        detected = 0
+        for frame in frames:
+            c0, w0 = time.process_time(), time.perf_counter()
+            if engine.process(frame):
+                detected += 1
+            cpu.append(time.process_time() - c0)
+            wall.append(time.perf_counter() - w0)
+        engine.close()
+
+        label = "completo" if size <= 0 else f"{size}px"
+        print(f"  {label:<9} cpu/frame={_stats_ms(cpu)['mean']:7.2f}ms  "
+              f"wall p50={_stats_ms(wall)['p50']:7.2f}ms  manos en {detected}/{len(frames)} frames")
+
+
+# ---------------------------------------------------------------------------
+# gestures: motor vectorizado vs. chequeos por atributo de protobuf
+# ---------------------------------------------------------------------------
+
+def _legacy_ok(lm) -> bool:
+    thumb_tip = lm.landmark[4]
+    index_tip = lm.landmark[8]
+    dist = ((thumb_tip.x - index_tip.x) ** 2 + (thumb_tip.y - index_tip.y) ** 2) ** 0.5
+    return dist < 0.05
+
+
+def _legacy_puno(lm) -> bool:
+    for tip, pip in zip([8, 12, 16, 20], [6, 10, 14, 18]):
+        if lm.landmark[tip].y < lm.landmark[pip].y:
+            return False
+    return True
+
+
+def _legacy_zona(lm, w: int, h: int) -> str | None:
+    wrist = lm.landmark[0]
+    x_px, y_px = wrist.x * w, wrist.y * h
+    if y_px < h * 0.25:
+        return "arriba"
+    if x_px < w * 0.33:
+        return "izquierda"
+    if x_px > w * 0.66:
+        return "derecha"
+    return None
+
+
+def _legacy_cuadrante(x_norm: float, y_norm: float) -> str:
+    left = x_norm < 0.5
+    top = y_norm < 0.5
+    if top and left:
+        return "TL"
+    if top and not left:
+        return "TR"
+    if not top and left:
+        return "BL"
+    return "BR"
+
+
+def _synthetic_hands(n: int, seed: int = 0) -> list:
+    from mediapipe.framework.formats import landmark_pb2
+
+    rng = np.random.default_rng(seed)
+    manos = []
+    for _ in range(n):
+        lm = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z in rng.random((21, 3)):
+            lm.landmark.add(x=float(x), y=float(y), z=float(z) - 0.5)
+        manos.append(lm)
+    return manos
+
+
+def _time_per_call(fn: Callable[[], object], iterations: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations
+
+
+def bench_gestures(args) -> None:
+    import gestures
+
+    manos = _synthetic_hands(args.hands)
+    buf = np.empty((args.hands, gestures.N_LANDMARKS, 3), dtype=np.float32)
+
+    def legacy():
+        # Lo que hacían los modos: un chequeo por función y por mano
+        for lm in manos:
+            _legacy_ok(lm)
+            _legacy_puno(lm)
+            _legacy_zona(lm, 960, 960)
+            _legacy_cuadrante(lm.landmark[0].x, lm.landmark[0].y)
+
+    legacy_4 = _time_per_call(legacy, args.iterations)
+    convert = _time_per_call(lambda: gestures.to_array(manos, buf), args.iterations)
+    arr = gestures.to_array(manos, buf)
+    nombres = ("ok", "puno", "zona_muneca", "cuadrante")
+    vector_4 = _time_per_call(lambda: gestures.evaluar(arr, nombres), args.iterations)
+    vector_all = _time_per_call(lambda: gestures.evaluar(arr), args.iterations)
+
+    # Consistencia con las funciones originales
+    g = gestures.evaluar(arr)
+    for i, lm in enumerate(manos):
+        assert bool(g["ok"][i]) == _legacy_ok(lm)
+        assert bool(g["puno"][i]) == _legacy_puno(lm)
+        assert (g["zona_muneca"][i] or None) == _legacy_zona(lm, 960, 960)
+        assert g["cuadrante"][i] == _legacy_cuadrante(lm.landmark[0].x, lm.landmark[0].y)
+
+    us = 1e6
+    print(f"Gestos con {args.hands} mano(s), {args.iterations} iteraciones")
+    print(f"  por atributo (ok+puño+zona+cuadrante)  {legacy_4 * us:8.2f} µs/frame")
+    print(f"  to_array (una vez por frame)           {convert * us:8.2f} µs/frame")
+    print(f"  vectorizado (ok+puño+zona+cuadrante)   {vector_4 * us:8.2f} µs/frame")
+    print(f"  vectorizado (registro completo)        {vector_all * us:8.2f} µs/frame")
+
+
+# ---------------------------------------------------------------------------
+# record-session / triggers: falsos disparos y tiempo hasta disparar
+# ---------------------------------------------------------------------------
+
+def _parse_ranges(text: str) -> List[tuple]:
+    ranges = []
+    for part in filter(None, (text or "").split(",")):
+        a, b = part.split("-")
+        ranges.append((float(a), float(b)))
+    return ranges
+
+
+def bench_record_session(args) -> None:
+    import gestures
+    import hand_engine
+    import qr_mode
+
+    source = frame_sources.VideoFileSource(args.video, fps=0)
+    if not source.isOpened():
+        print(f"❌ No se pudo abrir {args.video}")
+        return
+    fps = source.file_fps or 30.0
+    engine = hand_engine.HandEngine()
+    engine.configure(qr_mode.HANDS_CONFIG)
+    ranges = _parse_ranges(args.ok_ranges)
+
+    ts, lms, confs, labels = [], [], [], []
+    n = 0
+    while True:
+        ok, frame = source.read()
+        if not ok:
+            break
+        t = n / fps
+        manos = engine.process(frame)
+        arr = gestures.to_array(manos[:1])
+        lms.append(arr[0] if len(arr) else np.full((gestures.N_LANDMARKS, 3), np.nan, np.float32))
+        confs.append(engine.confidence)
+        ts.append(t)
+        labels.append(any(a <= t <= b for a, b in ranges))
+        n += 1
+    engine.close()
+    source.release()
+
+    np.savez_compressed(args.out, t=np.asarray(ts), landmarks=np.asarray(lms, np.float32),
+                        conf=np.asarray(confs, np.float32), ok=np.asarray(labels, bool))
+    print(f"✅ {n} frames guardados en {args.out}")
+
+
+def _simulate_raw(session, hold: float) -> List[float]:
+    """Lógica anterior: umbral por frame y el temporizador vuelve a cero con cada falla."""
+    import gestures
+
+    triggers, start = [], None
+    for t, hand in zip(session["t"], session["landmarks"]):
+        present = not np.isnan(hand[0, 0]) and bool(gestures.evaluar(hand[None], ("ok",))["ok"][0])
+        if not present:
+            start = None
+        elif start is None:
+            start = t
+        elif t - start >= hold:
+            triggers.append(float(t))
+            start = None
+    return triggers
+
+
+def _simulate_filtered(session, hold: float) -> List[float]:
+    import gesture_filter
+
+    suavizado = gesture_filter.OneEuroFilter()
+    ok_hold = gesture_filter.OkHold(hold)
+    triggers = []
+    conf = session["conf"] if "conf" in session else np.ones(len(session["t"]))
+    for t, hand, c in zip(session["t"], session["landmarks"], conf):
+        if np.isnan(hand[0, 0]):
+            suavizado.reset()
+            arr = np.empty((0, hand.shape[0], 3), np.float32)
+        else:
+            arr = suavizado(hand[None], float(t))
+        if ok_hold.update(arr, float(t), float(c)):
+            triggers.append(float(t))
+    return triggers
+
+
+def _score_triggers(session, triggers: List[float]) -> Dict[str, float]:
+    t, labels = session["t"], session["ok"]
+    # Tramos etiquetados [inicio, fin]
+    episodes, start = [], None
+    for ti, lab in zip(t, labels):
+        if lab and start is None:
+            start = ti
+        elif not lab and start is not None:
+            episodes.append((start, ti))
+            start = None
+    if start is not None:
+        episodes.append((start, t[-1]))
+
+    hit, latencies, false = set(), [], 0
+    for tt in triggers:
+        idx = next((i for i, (a, b) in enumerate(episodes) if a <= tt <= b), None)
+        if idx is None or idx in hit:
+            false += 1
+        else:
+            hit.add(idx)
+            latencies.append(tt - episodes[idx][0])
+    minutes = max(1e-9, (t[-1] - t[0]) / 60.0) if len(t) > 1 else 1e-9
+    return {
+        "episodes": len(episodes),
+        "hits": len(hit),
+        "false": false,
+        "false_per_min": false / minutes,
+        "median_ttt": float(np.median(latencies)) if latencies else float("nan"),
+    }
+
+
+def bench_triggers(args) -> None:
+    sessions = [dict(np.load(path)) for path in args.sessions]
+    holds = [float(h) for h in args.holds.split(",")]
+    print(f"Gesto OK en {len(sessions)} sesión(es)")
+    print(f"  {'hold':>5}  {'lógica':<10} {'aciertos':>9} {'falsos':>7} {'falsos/min':>11} {'mediana':>9}")
+    for hold in holds:
+        for nombre, simulate in (("crudo", _simulate_raw), ("filtrado", _simulate_filtered)):
+            tot = {"episodes": 0, "hits": 0, "false": 0, "false_per_min": 0.0}
+            ttt: List[float] = []
+            for s in sessions:
+                r = _score_triggers(s, simulate(s, hold))
+                for k in ("episodes", "hits", "false"):
+                    tot[k] += r[k]
+                tot["false_per_min"] += r["false_per_min"] / len(sessions)
+                if not np.isnan(r["median_ttt"]):
+                    ttt.append(r["median_ttt"])
+            med = f"{np.median(ttt):.2f}s" if ttt else "-"
+            print(f"  {hold:5.2f}  {nombre:<10} {tot['hits']:>4}/{tot['episodes']:<4} {tot['false']:>7} "
+                  f"{tot['false_per_min']:11.2f} {med:>9}")
+
+
+# ---------------------------------------------------------------------------
+# replay: cada modo completo, sin cámara ni pantalla, sobre un clip grabado
+# ---------------------------------------------------------------------------
+
+REPLAY_WINDOW = 100_000     # muestras por etapa: percentiles de la sesión completa
+
+
+class _NullSerial:
+    """Arduino de mentira para el modo gestos."""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def _headless() -> display.HeadlessSink:
+    """Modos sin pantalla, sin navegador y sin vigilar el foco de ventana."""
+    import webbrowser
+
+    import display
+    import focus_tracker
+
+    sink = display.HeadlessSink()
+    display.use(sink)
+    # Un clip con QR no debe abrir navegadores ni depender del foco de ventana
+    webbrowser.open = lambda *_a, **_k: True
+    focus_tracker.ENABLED = False
+    return sink
+
+
+def _run_gestos(hub) -> None:
+    import gesture_mode
+    import serial_link
+
+    link = serial_link.SerialLink(_NullSerial())
+    try:
+        gesture_mode.run(link, hub=hub)
+    finally:
+        link.close()
+
+
+def _replay_modes(save_dir: str) -> Dict[str, Callable]:
+    import camera_capture
+    import gesture_mode2
+    import menu_mode
+    import qr_mode
+
+    return {
+        "menu": lambda hub: menu_mode.run(hub=hub),
+        "qr": lambda hub: qr_mode.run(hub=hub),
+        "gestos": _run_gestos,
+        "juego": lambda hub: gesture_mode2.run(hub=hub),
+        "foto": lambda hub: camera_capture.capture_photo(save_dir=save_dir, hub=hub),
+    }
+
+
+def bench_replay(args) -> None:
+    import metrics
+
+    sink = _headless()
+    metrics.enable(window=REPLAY_WINDOW)
+
+    report = {"source": args.source, "fps": args.fps, "modes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = _replay_modes(tmp)
+        for name in args.modes.split(","):
+            run = modes[name]
+            metrics.reset()
+            sink.frames_shown = 0
+            hub = camera_hub.CameraHub(source_factory=lambda: frame_sources.open_source(
+                args.source, camera_hub.HUB_W, camera_hub.HUB_H, fps=args.fps))
+            if not hub.start():
+                raise SystemExit(f"❌ No se pudo abrir la fuente {args.source}")
+            w0, c0 = time.perf_counter(), time.process_time()
+            try:
+                run(hub)
+            finally:
+                hub.stop()
+            wall = time.perf_counter() - w0
+            cpu = time.process_time() - c0
+            report["modes"][name] = {
+                "frames": sink.frames_shown,
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "fps": sink.frames_shown / wall if wall > 0 else 0.0,
+                "stages": metrics.summary(),
+            }
+
+    text = json.dumps(report, indent=2)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(text + "\n")
+        print(f"✅ Reporte guardado en {args.json}", file=sys.stderr)
+    else:
+        print(text)
+
+
+# ---------------------------------------------------------------------------
+# qr: camino actual (pyzbar sobre el frame BGR completo) vs qr_scanner
+# ---------------------------------------------------------------------------
+
+def _load_corpus(paths: List[str], width: int, height: int,
+                 max_frames: int) -> List[tuple]:
+    """[(nombre, [frames])]: cada imagen suelta es un clip de un frame."""
+    clips = []
+    for path in paths:
+        if path.lower().endswith(frame_sources.IMAGE_EXTS):
+            img = cv2.imread(path)
+            frames = [] if img is None else [img]
+        else:
+            source = frame_sources.open_source(path, width, height, fps=0)
+            frames = []
+            while len(frames) < max_frames:
+                ok, frame = source.read()
+                if not ok:
+                    break
+                frames.append(frame)
+            source.release()
+        if not frames:
+            print(f"⚠ {path}: sin frames, se omite")
+            continue
+        clips.append((path, [cv2.resize(f, (width, height)) for f in frames]))
+    return clips
+
+
+def _run_qr_path(clips: List[tuple], adaptive: bool, legacy: bool) -> Dict[str, float]:
+    from pyzbar.pyzbar import decode
+
+    import qr_scanner
+
+    latencies: List[float] = []
+    frames = hits = clips_hit = 0
+    first_hit: List[int] = []
+    for _, clip in clips:
+        skip = qr_scanner.AdaptiveSkip()
+        empty = 0
+        clip_first = None
+        for i, frame in enumerate(clip):
+            frames += 1
+            if adaptive and not skip.should_scan():
+                continue
+            t0 = time.perf_counter()
+            if legacy:
+                found = decode(frame)
+                n_candidates = 0
+            else:
+                full = empty >= qr_scanner.FULL_FRAME_EVERY
+                found, n_candidates = qr_scanner.scan(frame, full_frame=full)
+                empty = 0 if found or n_candidates or full else empty + 1
+            latencies.append(time.perf_counter() - t0)
+            skip.done(bool(found) or n_candidates > 0)
+            if found:
+                hits += 1
+                if clip_first is None:
+                    clip_first = i
+        if clip_first is not None:
+            clips_hit += 1
+            first_hit.append(clip_first)
+
+    stats = _stats_ms(latencies)
+    return {
+        "frames": frames,
+        "escaneos": len(latencies),
+        "tasa_frames": hits / frames if frames else 0.0,
+        "tasa_clips": clips_hit / len(clips) if clips else 0.0,
+        "primer_frame_medio": float(np.mean(first_hit)) if first_hit else float("nan"),
+        "p50_ms": stats.get("p50", 0.0),
+        "p95_ms": stats.get("p95", 0.0),
+        "total_ms": float(np.sum(latencies) * 1000.0),
+    }
+
+
+def bench_qr(args) -> None:
+    import qr_mode
+
+    clips = _load_corpus(args.paths, qr_mode.WIN_W, qr_mode.WIN_H, args.max_frames)
+    if not clips:
+        print("❌ Corpus vacío")
+        return
+    total = sum(len(c) for _, c in clips)
+    print(f"Corpus: {len(clips)} clips, {total} frames {qr_mode.WIN_W}x{qr_mode.WIN_H}")
+    print(f"{'camino':>22} {'escaneos':>9} {'frames':>7} {'clips':>6} {'1er QR':>7} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'total ms':>9}")
+    for label, adaptive, legacy in (("actual (BGR completo)", False, True),
+                                    ("qr_scanner", False, False),
+                                    ("qr_scanner + salto", True, False)):
+        r = _run_qr_path(clips, adaptive, legacy)
+        print(f"{label:>22} {r['escaneos']:>9} {r['tasa_frames']:>7.1%} {r['tasa_clips']:>6.0%} "
+              f"{r['primer_frame_medio']:>7.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['total_ms']:>9.0f}")
+    print("frames = % de frames con QR decodificado; clips = % de clips con al menos uno;")
+    print("1er QR = índice medio del primer frame decodificado en cada clip.")
+
+
+# ---------------------------------------------------------------------------
+# focus: FocusTracker con un comando de mentira en lugar de xdotool
+# ---------------------------------------------------------------------------
+
+def bench_focus(args) -> None:
+    """
+    Un loop a 30 fps lee el foco en caché mientras un archivo hace de "ventana
+    activa" y cambia cada segundo (o más lento si el intervalo lo pide). Falla si algún cambio no se ve en
+    ~2 * interval (más el arranque del comando de mentira) o si el tracker
+    lanza procesos a un ritmo parecido al del loop (el camino viejo: 1 por frame).
+    """
+    import focus_tracker
+
+    limit = 2 * args.interval + args.stub_startup
+    period = max(1.0, 1.5 * limit)     # cada cambio tiene tiempo de verse antes del siguiente
+    with tempfile.TemporaryDirectory() as tmp:
+        active = os.path.join(tmp, "activa.txt")
+        stub = [sys.executable, "-c", f"print(open({active!r}).read())"]
+        with open(active, "w") as f:
+            f.write("Modo QR")
+
+        tracker = focus_tracker.FocusTracker("Modo QR", command=stub, interval=args.interval)
+        tracker.start()
+        expected, seen = True, True
+        changed_at = time.perf_counter()
+        t_end = changed_at + args.seconds
+        delays: List[float] = []
+        reads = changes = missed = 0
+        while time.perf_counter() < t_end:
+            now = time.perf_counter()
+            if now - changed_at >= period:
+                missed += not seen
+                expected = not expected
+                with open(active, "w") as f:
+                    f.write("Modo QR" if expected else "Navegador")
+                changed_at, seen = now, False
+                changes += 1
+            reads += 1
+            if not seen and tracker.focused == expected:
+                delays.append(now - changed_at)
+                seen = True
+            time.sleep(1 / 30)
+        tracker.stop()
+    if not seen:
+        # El último cambio cuenta sólo si tuvo tiempo de verse
+        if t_end - changed_at > limit:
+            missed += 1
+        else:
+            changes -= 1
+
+    stats = _stats_ms(delays)
+    print(f"backend: {tracker.backend}")
+    print(f"lecturas del foco: {reads} | procesos lanzados: {tracker.polls} "
+          f"(camino viejo: {reads})")
+    print(f"cambios detectados: {len(delays)}/{changes} | demora p50 {stats.get('p50', 0):.0f} ms, "
+          f"máx {stats.get('max', 0):.0f} ms (límite {limit * 1000:.0f} ms)")
+    if changes == 0:
+        raise SystemExit("❌ No hubo cambios de foco para medir (subir --seconds)")
+    if missed:
+        raise SystemExit(f"❌ {missed} de {changes} cambios de foco no se detectaron")
+    if max(delays) > limit:
+        raise SystemExit(f"❌ Un cambio tardó {max(delays) * 1000:.0f} ms en verse "
+                         f"(límite {limit * 1000:.0f} ms)")
+    if tracker.polls > reads / 4:
+        raise SystemExit(f"❌ {tracker.polls} procesos para {reads} lecturas: "
+                         "el tracker consulta casi como el camino viejo")
+    print("✅ Todos los cambios detectados a tiempo, sin un proceso por frame")
+
+
+# ---------------------------------------------------------------------------
+# serial: SerialLink contra un pty (sin Arduino)
+# ---------------------------------------------------------------------------
+
+class _SlowPort:
+    """Envuelve un puerto y demora cada write (adaptador USB-serie lento o trabado)."""
+
+    def __init__(self, port, delay: float):
+        self.port = port
+        self.delay = delay
+
+    def write(self, data: bytes) -> int:
+        time.sleep(self.delay)
+        return self.port.write(data)
+
+    def flush(self) -> None:
+        self.port.flush()
+
+
+class _FakeFirmware:
+    """
+    El Arduino del otro lado del pty: aplica los comandos legacy o las tramas
+    con ACK (descartando una fracción *loss* de las tramas, sin responder).
+    """
+
+    def __init__(self, fd: int, protocol: str, loss: float, seed: int = 0):
+        import serial_link
+
+        self.fd = fd
+        self.protocol = protocol
+        self.loss = loss
+        self.leds: set = set()
+        self.received = 0
+        self.discarded = 0
+        self._sl = serial_link
+        self._rng = np.random.default_rng(seed)
+        self._buf = bytearray()
+
+    def poll(self) -> None:
+        try:
+            while True:
+                data = os.read(self.fd, 4096)
+                self.received += len(data)
+                self._buf.extend(data)
+        except BlockingIOError:
+            pass
+        except OSError as e:
+            if e.errno != errno.EIO:   # EIO: el link cerró su lado del pty
+                raise
+        if self.protocol == "legacy":
+            for ch in self._buf.decode():
+                if ch == "0":
+                    self.leds.clear()
+                else:
+                    self.leds.add(ch)
+            self._buf.clear()
+            return
+        sl = self._sl
+        while True:
+            start = self._buf.find(bytes([sl.STX]))
+            if start < 0 or len(self._buf) < start + 3:
+                break
+            n = self._buf[start + 2]
+            end = start + 3 + n + 1
+            if len(self._buf) < end:
+                break
+            seq, payload = self._buf[start + 1], bytes(self._buf[start + 3:end - 1])
+            del self._buf[:end]
+            if self._rng.random() < self.loss:
+                self.discarded += 1
+                continue
+            if payload[:1] == b"L":
+                self.leds = {pin for i, pin in enumerate(sl.PINS) if payload[1] >> i & 1}
+            os.write(self.fd, bytes([sl.ACK, seq]))
+
+
+def bench_serial(args) -> None:
+    """
+    Un loop a 30 fps cambia el estado de LEDs deseado en casi todos los frames
+    (peor caso de jitter) mientras el Arduino es un pty con un firmware simulado.
+    Reporta el costo de set_leds() en el loop, cuántos pedidos se fusionaron
+    y la latencia de escritura (o hasta el ACK). Falla si el estado final no
+    coincide, si hubo errores, si se perdieron tramas sin pérdidas simuladas
+    o si el link conectado y ocioso gasta CPU.
+    """
+    import serial
+
+    import metrics
+    import serial_link
+
+    master, slave = os.openpty()
+    port = serial.Serial(os.ttyname(slave), 9600, timeout=0, write_timeout=1.0)
+    os.close(slave)
+    os.set_blocking(master, False)
+    target = _SlowPort(port, args.write_delay_ms / 1000.0) if args.write_delay_ms > 0 else port
+    firmware = _FakeFirmware(master, args.protocol, args.loss)
+
+    metrics.enable()
+    metrics.reset()
+    link = serial_link.SerialLink(target, rate_hz=args.rate, protocol=args.protocol)
+    rng = np.random.default_rng(0)
+
+    calls: List[float] = []
+    t_end = time.perf_counter() + args.seconds
+    while time.perf_counter() < t_end:
+        leds = [pin for pin in serial_link.PINS if rng.random() < 0.5]
+        t0 = time.perf_counter()
+        link.set_leds(leds)
+        calls.append(time.perf_counter() - t0)
+        firmware.poll()
+        time.sleep(1 / 30)
+    # Dejar que terminen escrituras, reenvíos y ACKs pendientes
+    t_drain = time.perf_counter() + 1.0 + args.write_delay_ms / 1000.0 * 4
+    while time.perf_counter() < t_drain:
+        firmware.poll()
+        time.sleep(0.01)
+    # Conectado y sin pedidos: el hilo del link debe dormir, no girar
+    c0, w0 = time.process_time(), time.perf_counter()
+    while time.perf_counter() - w0 < args.idle_seconds:
+        firmware.poll()
+        time.sleep(0.05)
+    idle_cpu = (time.process_time() - c0) / (time.perf_counter() - w0)
+    link.close()
+    firmware.poll()
+    port.close()
+    os.close(master)
+
+    summary = metrics.summary()
+    metrics.disable()
+    _print_stats("set_leds() en el loop", calls)
+    print(f"protocolo: {args.protocol} | pedidos: {link.requests} | escrituras: {link.writes} "
+          f"({1 - link.writes / max(1, link.requests):.0%} menos) | bytes: {firmware.received} "
+          f"| errores: {link.errors}")
+    if args.protocol == "framed":
+        print(f"tramas perdidas a propósito: {firmware.discarded} | reenvíos: {link.retransmits} "
+              f"| sin ACK tras reintentos: {link.lost}")
+    for stage in ("serial_write", "serial_latencia"):
+        s = summary.get(stage)
+        if s:
+            print(f"{stage:>16}: p50 {s['p50_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms, "
+                  f"p99 {s['p99_ms']:.2f} ms")
+    final = frozenset(firmware.leds)
+    print(f"estado final en el Arduino: {sorted(final)} (pedido: {sorted(link.desired)})")
+    if final != link.desired:
+        raise SystemExit(f"❌ El Arduino terminó en {sorted(final)}, distinto de {sorted(link.desired)}")
+    if link.errors:
+        raise SystemExit(f"❌ {link.errors} errores de escritura en el pty")
+    if args.loss == 0 and link.lost:
+        raise SystemExit(f"❌ {link.lost} tramas sin ACK sin pérdidas simuladas")
+    print(f"CPU con el link conectado y ocioso: {idle_cpu:.1%} de un núcleo")
+    if idle_cpu > args.max_idle_cpu:
+        raise SystemExit(f"❌ El link ocioso usa {idle_cpu:.1%} de CPU (límite {args.max_idle_cpu:.0%})")
+    print("✅ Estado final aplicado, sin errores")
+
+
+# ---------------------------------------------------------------------------
+# preprocess: flip/resize/cvtColor asignando en cada frame vs buffers reutilizados
+# ---------------------------------------------------------------------------
+
+def _prep_before(mirror: bool, width: int, height: int, inference_width: int) -> Callable:
+    def run(frame: np.ndarray) -> np.ndarray:
+        if mirror:
+            frame = cv2.flip(frame, 1)
+        frame = cv2.resize(frame, (width, height))
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (inference_width, round(h * inference_width / w)))
+        return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+    return run
+
+
+def _prep_after(mirror: bool, width: int, height: int, inference_width: int) -> Callable:
+    import preprocess
+
+    prep = preprocess.Preprocessor(width, height, mirror=mirror)
+    proxy = preprocess.InferenceProxy(inference_width)
+    return lambda frame: proxy(prep(frame))
+
+
+def bench_preprocess(args) -> None:
+    """Tiempo y memoria asignada por frame del preproceso, antes y después."""
+    import tracemalloc
+
+    import hand_engine
+    import menu_mode
+
+    raw = _load_frames(args.video, args.frames, camera_hub.HUB_W, camera_hub.HUB_H)
+    if not raw:
+        print("❌ No hay frames para medir")
+        return
+    for f in raw:
+        f.flags.writeable = False   # como los del hub
+    print(f"{len(raw)} frames {camera_hub.HUB_W}x{camera_hub.HUB_H} -> "
+          f"{menu_mode.WIN_W}x{menu_mode.WIN_H} (espejo: {args.mirror}), "
+          f"proxy RGB de {hand_engine.INFERENCE_WIDTH} px")
+
+    for label, build in (("antes", _prep_before), ("después", _prep_after)):
+        run = build(args.mirror, menu_mode.WIN_W, menu_mode.WIN_H, hand_engine.INFERENCE_WIDTH)
+        for f in raw[:5]:
+            run(f)   # calentar (mapas, buffers)
+
+        times: List[float] = []
+        for f in raw:
+            t0 = time.perf_counter()
+            run(f)
+            times.append(time.perf_counter() - t0)
+
+        # numpy informa sus buffers a tracemalloc (también los que crea cv2)
+        tracemalloc.start()
+        allocated: List[int] = []
+        for f in raw:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            run(f)
+            allocated.append(tracemalloc.get_traced_memory()[1] - base)
+        tracemalloc.stop()
+
+        _print_stats(f"{label}: tiempo", times)
+        print(f"{'':<28} memoria asignada por frame (pico): {np.mean(allocated) / 2**20:6.2f} MB")
+
+
+# ---------------------------------------------------------------------------
+# menu-render: overlay del menú dibujado entero por frame vs capa fija cacheada
+# ---------------------------------------------------------------------------
+
+def _legacy_menu_overlay(frame: np.ndarray, q: str | None, progress: float) -> None:
+    """menu_mode._draw_overlay tal como era antes de cachear la capa fija."""
+    import menu_mode as m
+
+    h, w = frame.shape[:2]
+    half_w, half_h = w // 2, h // 2
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (0, 0), (half_w, half_h), m.COLOR_TL, -1)
+    cv2.rectangle(overlay, (half_w, 0), (w, half_h), m.COLOR_TR, -1)
+    cv2.rectangle(overlay, (0, half_h), (half_w, h), m.COLOR_BL, -1)
+    cv2.rectangle(overlay, (half_w, half_h), (w, h), m.COLOR_BR, -1)
+    cv2.addWeighted(overlay, 0.13, frame, 0.87, 0, frame)
+    cv2.line(frame, (half_w, 0), (half_w, h), (255, 255, 255), 1)
+    cv2.line(frame, (0, half_h), (w, half_h), (255, 255, 255), 1)
+    for text, origin, scale, color, thickness in m._LABELS:
+        cv2.putText(frame, text, origin(w, h), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+    if q is not None:
+        total = int(w * 0.38)
+        filled = int(total * max(0.0, min(1.0, progress)))
+        x0, y0 = 20, 20
+        cv2.rectangle(frame, (x0, y0), (x0 + filled, y0 + m.BAR_H), m.COLOR_TL, -1)
+        cv2.rectangle(frame, (x0, y0), (x0 + total, y0 + m.BAR_H), (255, 255, 255), 1)
+
+
+def bench_menu_render(args) -> None:
+    """Costo por frame del overlay del menú, antes y después de cachear la capa fija."""
+    import menu_mode
+
+    raw = _load_frames(args.video, args.frames, menu_mode.WIN_W, menu_mode.WIN_H)
+    if not raw:
+        print("❌ No hay frames para medir")
+        return
+    print(f"{len(raw)} frames {menu_mode.WIN_W}x{menu_mode.WIN_H}")
+
+    work = np.empty_like(raw[0])
+    outputs = {}
+    for label, draw in (("antes", _legacy_menu_overlay), ("después", menu_mode._draw_overlay)):
+        for f in raw[:5]:
+            np.copyto(work, f)
+            draw(work, "TL", 0.5)   # calentar (la capa fija se arma acá)
+        times: List[float] = []
+        for i, f in enumerate(raw):
+            np.copyto(work, f)      # el frame del modo ya está en su buffer
+            q = "TL" if i % 2 else None
+            t0 = time.perf_counter()
+            draw(work, q, (i % 30) / 30)
+            times.append(time.perf_counter() - t0)
+        _print_stats(f"{label}: overlay", times)
+        np.copyto(work, raw[0])
+        draw(work, "TL", 0.5)
+        outputs[label] = work.astype(np.int16)
+
+    diff = np.abs(outputs["antes"] - outputs["después"])
+    print(f"diferencia con el overlay anterior: máx {int(diff.max())}, "
+          f"píxeles distintos en más de 1: {int((diff.max(axis=2) > 1).sum())}")
+
+
+# ---------------------------------------------------------------------------
+# squares: relleno de los cuadros del minijuego con muchos cuadros en pantalla
+# ---------------------------------------------------------------------------
+
+def _legacy_fill_alpha(frame: np.ndarray, rect: tuple, color: tuple, alpha: float) -> None:
+    """gesture_mode2.draw_filled_rect_alpha antes: copia y mezcla el frame entero."""
+    x, y, w, h = rect
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(frame.shape[1], x + w), min(frame.shape[0], y + h)
+    if x0 >= x1 or y0 >= y1:
+        return
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (x0, y0), (x1, y1), color, thickness=-1)
+    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, dst=frame)
+
+
+def bench_squares(args) -> None:
+    """Costo por frame del relleno de N cuadros: frame entero, por recorte y por lotes."""
+    import gesture_mode2 as g
+
+    rng = np.random.default_rng(0)
+    base = _load_frames(None, 1, g.WIN_W, g.WIN_H)[0]
+    work = np.empty_like(base)
+    renderer = g.SquareRenderer()
+
+    def per_square(fill: Callable) -> Callable:
+        def run(rects, color, alpha):
+            for rect in rects:
+                fill(work, tuple(rect), color, alpha)
+        return run
+
+    paths = (("frame entero", per_square(_legacy_fill_alpha)),
+             ("por recorte", per_square(g.draw_filled_rect_alpha)),
+             ("renderer", lambda rects, color, alpha: renderer.fill(work, rects, color, alpha)))
+
+    for n in (int(c) for c in args.counts.split(",")):
+        sizes = rng.integers(g.SIZE_MIN, g.SIZE_MAX + 1, n)
+        rects = np.stack((rng.integers(0, g.WIN_W - g.SIZE_MIN, n),
+                          rng.integers(-g.SIZE_MAX, g.WIN_H, n), sizes, sizes), axis=1)
+        print(f"— {n} cuadros")
+        for label, run in paths:
+            if label == "frame entero" and n > args.legacy_max:
+                print(f"{label:<28} salteado (más de {args.legacy_max} cuadros)")
+                continue
+            times: List[float] = []
+            for _ in range(args.frames):
+                np.copyto(work, base)
+                t0 = time.perf_counter()
+                run(rects, g.SQUARE_COLOR, g.SQUARE_ALPHA)
+                times.append(time.perf_counter() - t0)
+            _print_stats(f"{label}", times)
+
+
+# ---------------------------------------------------------------------------
+# game: simulación del minijuego (update, corte, dibujo) sin cámara
+# ---------------------------------------------------------------------------
+
+def _legacy_segment_hits_rect(p1: tuple, p2: tuple, rect: tuple) -> bool:
+    """gesture_mode2.segment_intersects_rect antes: cuatro tests de aristas en Python."""
+    def ccw(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+    def on_segment(a, b, p):
+        return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
+
+    def intersect(a1, a2, b1, b2):
+        d1, d2, d3, d4 = ccw(a1, a2, b1), ccw(a1, a2, b2), ccw(b1, b2, a1), ccw(b1, b2, a2)
+        if (d1 == 0 and on_segment(a1, a2, b1)) or (d2 == 0 and on_segment(a1, a2, b2)) or \
+           (d3 == 0 and on_segment(b1, b2, a1)) or (d4 == 0 and on_segment(b1, b2, a2)):
+            return True
+        return (d1 > 0) != (d2 > 0) and (d3 > 0) != (d4 > 0)
+
+    x, y, w, h = rect
+    if x <= p1[0] <= x + w and y <= p1[1] <= y + h:
+        return True
+    if x <= p2[0] <= x + w and y <= p2[1] <= y + h:
+        return True
+    c = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    return any(intersect(p1, p2, c[i], c[(i + 1) % 4]) for i in range(4))
+
+
+def _swipe(t: float, w: int, h: int) -> tuple:
+    """Punta de dedo de mentira: un ocho rápido sobre la pantalla."""
+    return (int(w / 2 + w * 0.4 * np.sin(2.1 * t)), int(h / 2 + h * 0.35 * np.sin(4.2 * t)))
+
+
+def _play_frame(game, renderer, frame: np.ndarray, base: np.ndarray, dt: float,
+                recorder=None) -> tuple:
+    """Un frame simulado del minijuego. Devuelve (t_update, t_corte, t_dibujo)."""
+    import gesture_mode2 as g
+
+    t0 = time.perf_counter()
+    alpha = game.advance(dt)
+    t1 = time.perf_counter()
+    tip = _swipe(game.clock, g.WIN_W, g.WIN_H)
+    game.apply_tip(tip)
+    t2 = time.perf_counter()
+    if recorder is not None:
+        recorder.frame(dt, tip)
+    np.copyto(frame, base)
+    rects = game.squares.rects(alpha)
+    vivos = game.squares.alive[:len(rects)]
+    renderer.fill(frame, rects[vivos], g.SQUARE_COLOR, g.SQUARE_ALPHA)
+    renderer.fill(frame, rects[~vivos], g.SQUARE_CUT_COLOR, g.SQUARE_CUT_ALPHA)
+    renderer.outline(frame, rects[vivos], g.SQUARE_COLOR, 2)
+    renderer.outline(frame, rects[~vivos], g.SQUARE_CUT_COLOR, 2)
+    t3 = time.perf_counter()
+    return t1 - t0, t2 - t1, t3 - t2
+
+
+def bench_game(args) -> None:
+    """Costo por frame del minijuego con una dificultad dada y un dedo que corta en ocho."""
+    import gesture_mode2 as g
+    import trail_log
+
+    game = g.Game(args.difficulty, seed=args.seed)
+    renderer = g.SquareRenderer()
+    recorder = trail_log.TrailWriter(args.record, game.seed, args.difficulty) if args.record else None
+    base = _load_frames(None, 1, g.WIN_W, g.WIN_H)[0]
+    frame = np.empty_like(base)
+    # dt de reloj con jitter, como una cámara real (lo absorbe el paso fijo)
+    jitter = np.random.default_rng(args.seed).normal(1.0, 0.15, int(args.seconds * args.fps))
+    upd: List[float] = []
+    cut: List[float] = []
+    legacy: List[float] = []
+    draw: List[float] = []
+    live: List[int] = []
+    for i, k in enumerate(jitter):
+        dt = max(1e-3, float(k) / args.fps)
+        if game.prev_tip is not None and i % args.legacy_every == 0:
+            tip = _swipe(game.clock, g.WIN_W, g.WIN_H)
+            t0 = time.perf_counter()
+            for r in game.squares.rects().tolist():
+                _legacy_segment_hits_rect(game.prev_tip[:2], tip, tuple(r))
+            legacy.append(time.perf_counter() - t0)
+        t_upd, t_cut, t_draw = _play_frame(game, renderer, frame, base, dt, recorder)
+        upd.append(t_upd)
+        cut.append(t_cut)
+        draw.append(t_draw)
+        live.append(len(game.squares))
+    if recorder is not None:
+        recorder.close()
+        print(f"💾 Entrada grabada en {args.record} ({recorder.frames} frames)")
+
+    print(f"dificultad {args.difficulty}: {len(jitter)} frames a ~{args.fps} fps, "
+          f"cuadros en juego máx {max(live)} / final {live[-1]}, puntaje {game.score}")
+    _print_stats("update", upd)
+    _print_stats("corte (lotes)", cut)
+    _print_stats("corte (por cuadro, antes)", legacy)
+    _print_stats("dibujo", draw)
+    total = np.asarray(upd) + np.asarray(cut) + np.asarray(draw)
+    print(f"{'':<28} update+corte+dibujo p95 {np.percentile(total, 95) * 1000:.2f} ms "
+          f"(presupuesto {1000 / args.fps:.1f} ms)")
+
+
+def _game_digest(game) -> str:
+    """Huella del estado del juego, para comparar repeticiones bit a bit."""
+    import hashlib
+
+    sq = game.squares
+    h = hashlib.sha256()
+    for name in sq._FIELDS:
+        h.update(getattr(sq, name)[:sq.n].tobytes())
+    h.update(np.array([game.score, game.steps, sq.n], dtype=np.int64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def bench_game_replay(args) -> None:
+    """Repite sin cámara una partida grabada y mide advance() y apply_tip() por frame."""
+    import gesture_mode2 as g
+    import trail_log
+
+    seed, dificultad, frames = trail_log.read(args.trail)
+    print(f"{args.trail}: {len(frames)} frames, dificultad {dificultad}, semilla {seed}")
+    digests = set()
+    for rep in range(args.repeat):
+        game = g.Game(dificultad, seed=seed)
+        upd: List[float] = []
+        cut: List[float] = []
+        for f in frames:
+            if f.reset:
+                game.reset()
+                continue
+            t0 = time.perf_counter()
+            game.advance(f.dt)
+            t1 = time.perf_counter()
+            game.apply_tip(f.tip, f.latency)
+            upd.append(t1 - t0)
+            cut.append(time.perf_counter() - t1)
+        digest = _game_digest(game)
+        digests.add(digest)
+        print(f"— repetición {rep + 1}: puntaje {game.score}, {game.steps} pasos, huella {digest}")
+        _print_stats("advance", upd)
+        _print_stats("apply_tip (corte)", cut)
+    if len(digests) != 1:
+        raise SystemExit("❌ Las repeticiones no terminaron en el mismo estado")
+    print("✅ Repeticiones idénticas")
+
+
+def bench_game_soak(args) -> None:
+    """
+    Partida larga simulada: el costo por frame y la memoria tienen que quedar
+    planos (cuadros que se van de la pantalla liberan su lugar del pool).
+    """
+    import tracemalloc
+
+    import gesture_mode2 as g
+
+    game = g.Game(args.difficulty, seed=0)
+    renderer = g.SquareRenderer()
+    base = _load_frames(None, 1, g.WIN_W, g.WIN_H)[0]
+    frame = np.empty_like(base)
+    dt = 1.0 / args.fps
+    per_minute = int(60 * args.fps)
+
+    tracemalloc.start()
+    minutes: List[Dict[str, float]] = []
+    costs: List[float] = []
+    for _ in range(int(args.minutes * per_minute)):
+        t_upd, t_cut, t_draw = _play_frame(game, renderer, frame, base, dt)
+        costs.append(t_upd + t_cut + t_draw)
+        if len(costs) == per_minute:
+            minutes.append({"mean_ms": float(np.mean(costs)) * 1000.0,
+                            "p95_ms": float(np.percentile(costs, 95)) * 1000.0,
+                            "mem_mb": tracemalloc.get_traced_memory()[0] / 2**20,
+                            "live": len(game.squares)})
+            costs = []
+            m = minutes[-1]
+            print(f"min {len(minutes):>3}: mean {m['mean_ms']:6.2f} ms  p95 {m['p95_ms']:6.2f} ms  "
+                  f"mem {m['mem_mb']:6.2f} MB  en juego {m['live']}")
+    tracemalloc.stop()
+
+    if len(minutes) < 3:
+        raise SystemExit("❌ Hacen falta al menos 3 minutos simulados")
+    # El primer minuto incluye el llenado inicial de la pantalla: se compara contra el segundo
+    ref, last = minutes[1], minutes[-1]
+    cost_growth = last["mean_ms"] / ref["mean_ms"] - 1.0
+    mem_growth = last["mem_mb"] - ref["mem_mb"]
+    print(f"costo {cost_growth * 100:+.1f}%  memoria {mem_growth:+.2f} MB  "
+          f"descartados por el tope: {game.squares.dropped}")
+    if cost_growth > args.max_cost_growth:
+        raise SystemExit(f"❌ El costo por frame creció {cost_growth * 100:.1f}% "
+                         f"(límite {args.max_cost_growth * 100:.0f}%)")
+    if mem_growth > args.max_growth_mb:
+        raise SystemExit(f"❌ La memoria creció {mem_growth:.2f}MB (límite {args.max_growth_mb}MB)")
+    print("✅ Costo y memoria planos")
+
+
+# ---------------------------------------------------------------------------
+# tip-eval: punta con/sin spline y predicción sobre trazos grabados
+# ---------------------------------------------------------------------------
+
+def _tip_strokes(paths: List[str], speed: float) -> List[tuple]:
+    """
+    Trazos (t, xy) que hacen de terreno: las muestras crudas de las partidas
+    grabadas (entre ellas _truth_at interpola lineal, independiente de las
+    configuraciones del tracker) o, sin grabaciones, el ocho denso de _swipe.
+    """
+    import gesture_mode2 as g
+    import trail_log
+
+    strokes = []
+    if not paths:
+        t = np.arange(0.0, 20.0, 1 / 240)
+        xy = np.array([_swipe(speed * v, g.WIN_W, g.WIN_H) for v in t], dtype=np.float64)
+        return [(t, xy)]
+    for path in paths:
+        _seed, _dificultad, frames = trail_log.read(path)
+        clock, cur, raw = 0.0, [], []
+        for f in frames:
+            if f.reset or f.tip is None:
+                raw.append(cur)
+                cur = []
+            if not f.reset:
+                clock += f.dt
+                if f.tip is not None:
+                    cur.append((clock, f.tip[0], f.tip[1]))
+        raw.append(cur)
+        for stroke in raw:
+            if len(stroke) < 4:
+                continue
+            a = np.asarray(stroke, dtype=np.float64)
+            strokes.append((a[:, 0], a[:, 1:]))
+    return strokes
+
+
+def _truth_at(t: np.ndarray, xy: np.ndarray, when: np.ndarray) -> np.ndarray:
+    return np.stack((np.interp(when, t, xy[:, 0]), np.interp(when, t, xy[:, 1])), axis=1)
+
+
+def bench_tip_eval(args) -> None:
+    """
+    Simula el pipeline sobre trazos de verdad: muestras a *fps* que llegan
+    *latency* s tarde. Por configuración del tracker reporta la tasa de corte
+    de cuadros que el dedo de verdad atravesó (vivos sólo ±window s) y la
+    latencia efectiva (el retraso que mejor explica lo que estima el tracker).
+    """
+    from collections import deque
+
+    import gesture_mode2 as g
+    import tip_tracker
+
+    strokes = _tip_strokes(args.trails, args.speed)
+    if not strokes:
+        print("❌ No hay trazos de al menos 4 muestras")
+        return
+    rng = np.random.default_rng(args.seed)
+    configs = (("recta (antes)", False, False), ("spline", False, True),
+               ("predicción", True, False), ("spline + predicción", True, True))
+    lags = np.arange(0.0, 2 * args.latency + 0.0005, 0.002)
+    print(f"{len(strokes)} trazos, {args.fps} fps, latencia {args.latency * 1000:.0f} ms, "
+          f"cuadros de {args.size} px vivos ±{args.window * 1000:.0f} ms")
+    if args.trails:
+        # Las muestras grabadas ya traen la latencia del juego y su ritmo: la
+        # latencia efectiva es relativa a ellas, y si el pipeline simulado las
+        # muestrea a un ritmo parecido la referencia no separa recta de spline
+        rate = 1 / float(np.median(np.concatenate([np.diff(t) for t, _ in strokes])))
+        print(f"referencia: muestras grabadas a ~{rate:.0f} Hz, interpoladas en línea recta")
+        if args.fps > rate / 2:
+            print(f"⚠ Con {args.fps} fps contra {rate:.0f} Hz grabados la comparación "
+                  f"recta/spline no es concluyente: usar --fps {rate / 4:.0f} o menos")
+    else:
+        print("referencia: ocho sintético a 240 Hz")
+
+    for label, predict, spline in configs:
+        hits = total = 0
+        err_by_lag = np.zeros(len(lags))
+        n_est = 0
+        for t, xy in strokes:
+            # Cuadros que el dedo de verdad atraviesa en t_c
+            t_c = rng.uniform(t[0] + 0.2, t[-1], args.targets)
+            centers = _truth_at(t, xy, t_c) + rng.uniform(-args.size / 3, args.size / 3, (args.targets, 2))
+            rects = np.concatenate((centers - args.size / 2, np.full((args.targets, 2), args.size)), axis=1)
+            hit = np.zeros(args.targets, dtype=bool)
+
+            trail: deque = deque(maxlen=g.TRAIL_MAXLEN)
+            tracker = tip_tracker.TipTracker(trail, predict=predict, spline=spline)
+            frame_t = np.arange(t[0] + args.latency, t[-1], 1 / args.fps)
+            seen = _truth_at(t, xy, frame_t - args.latency)
+            est = np.empty((len(frame_t), 2))
+            for k, (tk, (x, y)) in enumerate(zip(frame_t, seen)):
+                trail.append((int(x), int(y), float(tk)))
+                tracker.update_latency(args.latency)
+                path = tracker.path()
+                est[k] = path[-1]
+                active = np.flatnonzero((np.abs(t_c - tk) <= args.window) & ~hit)
+                if len(active) and len(path) > 1:
+                    for p1, p2 in zip(path[:-1], path[1:]):
+                        hit[active] |= g.segment_hits_rects(p1, p2, rects[active])
+            hits += int(hit.sum())
+            total += args.targets
+            for i, lag in enumerate(lags):
+                err_by_lag[i] += np.linalg.norm(est - _truth_at(t, xy, frame_t - lag), axis=1).sum()
+            n_est += len(frame_t)
+        err_by_lag /= max(n_est, 1)
+        best = int(np.argmin(err_by_lag))
+        print(f"{label:<22} corte {hits / total * 100:5.1f}%  latencia efectiva "
+              f"{lags[best] * 1000:5.1f} ms  error ahora {err_by_lag[0]:5.1f} px")
+
+
+# ---------------------------------------------------------------------------
+# hand-flow: inferencia cada N frames + flujo óptico vs. inferencia siempre
+# ---------------------------------------------------------------------------
+
+def _landmarks_px(hands, w: int, h: int) -> List[np.ndarray]:
+    return [np.array([(p.x * w, p.y * h) for p in lm.landmark]) for lm in hands]
+
+
+def _landmark_error(ref: List[np.ndarray], got: List[np.ndarray]) -> List[float]:
+    """Error medio (px) de cada mano de referencia contra la más cercana por la muñeca."""
+    errors = []
+    for r in ref:
+        g = min(got, key=lambda g: float(np.linalg.norm(g[0] - r[0])))
+        errors.append(float(np.linalg.norm(g - r, axis=1).mean()))
+    return errors
+
+
+def bench_hand_flow(args) -> None:
+    import hand_engine
+    import hand_flow
+    import menu_mode
+
+    frames = _load_frames(args.video, args.frames, menu_mode.WIN_W, menu_mode.WIN_H)
+    if not frames:
+        raise SystemExit("❌ No hay frames para medir")
+    h, w = frames[0].shape[:2]
+    config = menu_mode.HANDS_CONFIG
+
+    # Referencia: inferencia completa en todos los frames
+    engine = hand_engine.HandEngine()
+    engine.configure(config)
+    engine.process(frames[0])  # calentar el grafo
+    ref: List[List[np.ndarray]] = []
+    cpu_ref: List[float] = []
+    for frame in frames:
+        c0 = time.process_time()
+        hands = engine.process(frame)
+        cpu_ref.append(time.process_time() - c0)
+        ref.append(_landmarks_px(hands, w, h))
+    engine.close()
+    base = float(np.mean(cpu_ref))
+    with_hands = sum(1 for r in ref if r)
+
+    print(f"Flujo óptico entre inferencias sobre {len(frames)} frames {w}x{h} "
+          f"(fuente: {args.video or 'sintética'}, manos en {with_hands})")
+    print(f"  {'siempre':<8} cpu/frame={base * 1e3:7.2f}ms")
+    for every in [int(n) for n in args.every.split(",")]:
+        engine = hand_engine.HandEngine()
+        engine.configure(config)
+        engine.process(frames[0])
+        flow = hand_flow.FlowHandEngine(engine, every)
+
+        cpu: List[float] = []
+        errors: List[float] = []
+        agree = 0
+        for frame, r in zip(frames, ref):
+            c0 = time.process_time()
+            hands = flow.process(frame)
+            cpu.append(time.process_time() - c0)
+            got = _landmarks_px(hands, w, h)
+            agree += bool(got) == bool(r)
+            if got and r:
+                errors.extend(_landmark_error(r, got))
+        engine.close()
+
+        mean = float(np.mean(cpu))
+        err = (f"error medio={np.mean(errors):5.1f}px p95={np.percentile(errors, 95):5.1f}px"
+               if errors else "error: sin manos en común")
+        print(f"  cada {every:<3} cpu/frame={mean * 1e3:7.2f}ms "
+              f"({(1 - mean / base) * 100 if base > 0 else 0.0:+5.1f}% ahorro)  {err}  "
+              f"detección igual en {agree}/{len(frames)}  "
+              f"inferencias={flow.inferences} seguidos={flow.tracked}")
+
+
+# ---------------------------------------------------------------------------
+# idle: menú sobre una escena quieta, con y sin ralentí
+# ---------------------------------------------------------------------------
+
+RAPL_ENERGY = "/sys/class/powercap/intel-rapl:0/energy_uj"
+
+
+def _rapl_uj() -> int | None:
+    """Energía acumulada del paquete de CPU (µJ), si el sistema la expone."""
+    try:
+        with open(RAPL_ENERGY) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def bench_idle(args) -> None:
+    import display
+    import menu_mode
+    import metrics
+    import motion_gate
+
+    sink = display.HeadlessSink()
+    display.use(sink)
+    metrics.enable(window=REPLAY_WINDOW)
+
+    print(f"Menú sobre {args.source} (ralentí tras {motion_gate.IDLE_AFTER:.0f}s quieto, "
+          f"{1 / motion_gate.IDLE_INTERVAL:.0f} fps)")
+    results = {}
+    for label, enabled in (("siempre", False), ("ralentí", True)):
+        motion_gate.ENABLED = enabled
+        metrics.reset()
+        sink.frames_shown = 0
+        hub = camera_hub.CameraHub(source_factory=lambda: frame_sources.open_source(
+            args.source, camera_hub.HUB_W, camera_hub.HUB_H, fps=args.fps))
+        if not hub.start():
+            raise SystemExit(f"❌ No se pudo abrir la fuente {args.source}")
+        e0 = _rapl_uj()
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            menu_mode.run(hub=hub)
+        finally:
+            hub.stop()
+        wall = time.perf_counter() - w0
+        cpu = time.process_time() - c0
+        e1 = _rapl_uj()
+        stages = metrics.summary()
+        results[label] = cpu
+        watts = (f"{(e1 - e0) / 1e6 / wall:6.2f} W" if e0 is not None and e1 is not None and e1 >= e0
+                 else "   s/d W")
+        print(f"  {label:<8} cpu={cpu:6.2f}s en {wall:5.1f}s ({cpu / wall * 100:5.1f}% de un núcleo)  "
+              f"paquete {watts}  frames mostrados={sink.frames_shown}  "
+              f"inferencias={stages.get('manos', {}).get('n', 0)}")
+    motion_gate.ENABLED = True
+
+    saved = 1 - results["ralentí"] / results["siempre"] if results["siempre"] > 0 else 0.0
+    print(f"✅ CPU ahorrada por el ralentí: {saved * 100:.1f}%"
+          + ("" if _rapl_uj() is not None else " (sin RAPL: la potencia no se pudo medir)"))
+
+
+# ---------------------------------------------------------------------------
+# hand-worker: inferencia en otro proceso, costo en el loop y caída del worker
+# ---------------------------------------------------------------------------
+
+def bench_hand_worker(args) -> None:
+    """
+    Corre el worker de manos sobre frames a ritmo de cámara: cuánto bloquea
+    process() al loop contra la inferencia en proceso, cuántos frames llegan
+    a inferirse y con cuánto atraso. A mitad de camino mata el worker y exige
+    que process() lo note en pocos frames y siga con el motor en proceso.
+    El arranque en frío y un cambio de configuración corren con un
+    STALL_TIMEOUT menor que lo que tardan: el worker no debe darse por colgado.
+    """
+    import hand_engine
+    import hand_worker
+    import menu_mode
+    import qr_mode
+
+    frames = _load_frames(args.video, args.frames, menu_mode.WIN_W, menu_mode.WIN_H)
+    if len(frames) <= args.kill_at:
+        raise SystemExit(f"❌ Hacen falta más de {args.kill_at} frames")
+    config = menu_mode.HANDS_CONFIG
+    period = 1.0 / args.fps
+
+    engine = hand_engine.HandEngine()
+    engine.configure(config)
+    engine.process(frames[0])  # calentar el grafo
+    inline: List[float] = []
+    for frame in frames:
+        t0 = time.perf_counter()
+        engine.process(frame)
+        inline.append(time.perf_counter() - t0)
+    engine.close()
+
+    hand_engine.OUT_OF_PROCESS = True
+    stall = hand_worker.STALL_TIMEOUT
+    hand_worker.STALL_TIMEOUT = args.cold_stall
+    worker = hand_worker.WorkerHandEngine()
+    startup: List[float] = []
+    # Arranque en frío (spawn + MediaPipe) y grafo nuevo al cambiar de modo:
+    # esperar el primer resultado de cada configuración
+    for cfg in (config, qr_mode.HANDS_CONFIG):
+        worker.configure(cfg)
+        t0 = time.monotonic()
+        since = worker.results
+        while worker.results == since or worker.latest_seq <= worker._config_seq:
+            if not worker.alive:
+                hand_engine.OUT_OF_PROCESS = False
+                raise SystemExit(f"❌ El worker se dio por colgado mientras arrancaba "
+                                 f"({time.monotonic() - t0:.2f}s, STALL_TIMEOUT "
+                                 f"{args.cold_stall}s)")
+            if time.monotonic() - t0 > args.start_timeout:
+                worker.close()
+                raise SystemExit("❌ El worker no devolvió ningún resultado")
+            worker.process(frames[0])
+            time.sleep(period)
+        startup.append(time.monotonic() - t0)
+    hand_worker.STALL_TIMEOUT = stall
+    worker.configure(config)
+    first = worker.results
+
+    calls: List[float] = []
+    lag: List[int] = []
+    detected_at = None
+    for i, frame in enumerate(frames):
+        t0 = time.perf_counter()
+        if i == args.kill_at:
+            worker._proc.kill()
+        worker.process(frame)
+        calls.append(time.perf_counter() - t0)
+        if worker.alive:
+            lag.append(worker._seq - worker.latest_seq)
+        elif detected_at is None:
+            detected_at = i
+        time.sleep(max(0.0, period - (time.perf_counter() - t0)))
+    worker.close()
+    hand_engine.shutdown()
+    hand_engine.OUT_OF_PROCESS = False
+
+    print(f"arranque en frío {startup[0]:.2f}s | cambio de configuración {startup[1]:.2f}s "
+          f"(STALL_TIMEOUT durante el arranque: {args.cold_stall}s)")
+    if startup[0] <= args.cold_stall:
+        print("⚠ El arranque fue más rápido que --cold-stall: la prueba de arranque no dice nada")
+    _print_stats("process() en proceso", inline)
+    _print_stats("process() con worker (antes de matarlo)", calls[:args.kill_at])
+    _print_stats("process() tras la caída (en proceso)", calls[args.kill_at:])
+    print(f"resultados del worker: {worker.results - first} en {args.kill_at} frames | "
+          f"atraso medio {np.mean(lag) if lag else 0.0:.1f} frames")
+    if worker.results == first:
+        raise SystemExit("❌ El worker no infirió ningún frame del recorrido")
+    if detected_at is None or detected_at - args.kill_at > args.max_detect_frames:
+        raise SystemExit(f"❌ La caída del worker no se detectó en {args.max_detect_frames} frames")
+    if worker._shm is not None:
+        raise SystemExit("❌ La memoria compartida del worker caído no se liberó")
+    print(f"✅ Caída detectada en {detected_at - args.kill_at} frames; "
+          f"{len(frames) - detected_at} frames siguieron con el motor en proceso")
+
+
+def bench_metrics_overhead(args) -> None:
+    """Costo de un frame típico de laps con las métricas apagadas y prendidas."""
+    import metrics
+
+    stages = ("captura", "preproceso", "manos", "gestos", "dibujo", "display")
+
+    def frame() -> None:
+        metrics.begin_frame()
+        for stage in stages:
+            metrics.lap(stage)
+        metrics.end_frame()
+
+    for label, on in (("apagadas", False), ("prendidas", True)):
+        if on:
+            metrics.enable()
+        else:
+            metrics.disable()
+        metrics.reset()
+        t0 = time.perf_counter()
+        for _ in range(args.iterations):
+            frame()
+        per_frame = (time.perf_counter() - t0) / args.iterations
+        # Un frame a 30 fps dura ~33 ms
+        print(f"{label:>9}: {per_frame * 1e6:7.2f} µs/frame "
+              f"({per_frame / (1 / 30) * 100:.3f}% de un frame a 30 fps)")
+    metrics.disable()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("switch", help="latencia de cambio entre modos")
+    p.add_argument("--video", help="clip de video en lugar de la fuente sintética")
+    p.add_argument("--fps", type=float, default=30.0)
+    p.add_argument("--open-delay", type=float, default=0.8,
+                   help="segundos que tarda en abrir la fuente sintética (simula UVC)")
+    p.add_argument("--switches", type=int, default=20)
+    p.set_defaults(func=bench_switch)
+
+    p = sub.add_parser("engine-rss", help="RSS e hilos al entrar y salir de cada modo")
+    p.add_argument("--cycles", type=int, default=1000)
+    p.add_argument("--frames", type=int, default=3, help="frames sintéticos por visita a un modo")
+    p.add_argument("--max-growth-mb", type=float, default=50.0)
+    p.set_defaults(func=bench_engine_rss)
+
+    p = sub.add_parser("infer-size", help="CPU por frame según la resolución de inferencia")
+    p.add_argument("--video", help="clip grabado (por defecto frames sintéticos)")
+    p.add_argument("--frames", type=int, default=200)
+    p.add_argument("--sizes", default="0,960,640,480,320",
+                   help="anchos de inferencia separados por coma (0 = frame completo)")
+    p.set_defaults(func=bench_infer_size)
+
+    p = sub.add_parser("gestures", help="motor de gestos vectorizado vs. funciones por atributo")
+    p.add_argument("--hands", type=int, default=1)
+    p.add_argument("--iterations", type=int, default=20000)
+    p.set_defaults(func=bench_gestures)
+
+    p = sub.add_parser("record-session", help="extrae landmarks etiquetados de un clip")
+    p.add_argument("--video", required=True)
+    p.add_argument("--ok-ranges", default="",
+                   help="tramos (s) con gesto OK real, p. ej. 1.2-3.4,5.0-6.5")
+    p.add_argument("--out", required=True)
+    p.set_defaults(func=bench_record_session)
+
+    p = sub.add_parser("triggers", help="falsos disparos y tiempo hasta disparar del gesto OK")
+    p.add_argument("sessions", nargs="+", help="sesiones .npz grabadas")
+    p.add_argument("--holds", default="3,2,1.5,1,0.7", help="tiempos de mantener a evaluar (s)")
+    p.set_defaults(func=bench_triggers)
+
+    p = sub.add_parser("qr", help="tasa de decodificación y latencia del escaneo QR")
+    p.add_argument("paths", nargs="+", help="imágenes, directorios de imágenes o videos")
+    p.add_argument("--max-frames", type=int, default=300, help="frames por video")
+    p.set_defaults(func=bench_qr)
+
+    p = sub.add_parser("focus", help="FocusTracker con un comando de mentira")
+    p.add_argument("--seconds", type=float, default=6.0)
+    p.add_argument("--interval", type=float, default=0.25)
+    p.add_argument("--stub-startup", type=float, default=0.15,
+                   help="margen (s) para el arranque del comando de mentira")
+    p.set_defaults(func=bench_focus)
+
+    p = sub.add_parser("serial", help="SerialLink contra un pty: costo, fusión y latencia")
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--rate", type=float, default=20.0, help="escrituras por segundo máximas")
+    p.add_argument("--write-delay-ms", type=float, default=0.0,
+                   help="demora artificial por write (adaptador lento)")
+    p.add_argument("--protocol", choices=("legacy", "framed"), default="legacy")
+    p.add_argument("--idle-seconds", type=float, default=2.0,
+                   help="tiempo ocioso al final para medir la CPU del hilo")
+    p.add_argument("--max-idle-cpu", type=float, default=0.05,
+                   help="fracción de un núcleo tolerada con el link ocioso")
+    p.add_argument("--loss", type=float, default=0.0,
+                   help="fracción de tramas que el firmware simulado ignora (framed)")
+    p.set_defaults(func=bench_serial)
+
+    p = sub.add_parser("preprocess", help="preproceso asignando vs buffers reutilizados")
+    p.add_argument("--video", help="clip para medir (por defecto frames sintéticos)")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--mirror", action="store_true", help="incluir el espejo (menú, juego, foto)")
+    p.set_defaults(func=bench_preprocess)
+
+    p = sub.add_parser("menu-render", help="costo por frame del overlay del menú")
+    p.add_argument("--video", help="clip para medir (por defecto frames sintéticos)")
+    p.add_argument("--frames", type=int, default=300)
+    p.set_defaults(func=bench_menu_render)
+
+    p = sub.add_parser("squares", help="relleno de cuadros del minijuego bajo estrés")
+    p.add_argument("--counts", default="10,100,300,1000")
+    p.add_argument("--frames", type=int, default=30)
+    p.add_argument("--legacy-max", type=int, default=300,
+                   help="no medir el relleno de frame entero por encima de tantos cuadros")
+    p.set_defaults(func=bench_squares)
+
+    p = sub.add_parser("game", help="update/corte/dibujo del minijuego por frame")
+    p.add_argument("--difficulty", default="caos", help="normal | caos")
+    p.add_argument("--seconds", type=float, default=30.0)
+    p.add_argument("--fps", type=float, default=30.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--legacy-every", type=int, default=10,
+                   help="medir el corte por cuadro de antes cada tantos frames")
+    p.add_argument("--record", help="guardar la entrada simulada (.trail) para game-replay")
+    p.set_defaults(func=bench_game)
+
+    p = sub.add_parser("game-replay", help="repite una partida grabada y compara el estado final")
+    p.add_argument("trail", help="partida grabada (.trail, KIOSK_JUEGO_GRABAR o game --record)")
+    p.add_argument("--repeat", type=int, default=3)
+    p.set_defaults(func=bench_game_replay)
+
+    p = sub.add_parser("game-soak", help="partida larga: costo por frame y memoria planos")
+    p.add_argument("--difficulty", default="caos", help="normal | caos")
+    p.add_argument("--minutes", type=float, default=10.0, help="minutos simulados")
+    p.add_argument("--fps", type=float, default=30.0)
+    p.add_argument("--max-cost-growth", type=float, default=0.25)
+    p.add_argument("--max-growth-mb", type=float, default=1.0)
+    p.set_defaults(func=bench_game_soak)
+
+    p = sub.add_parser("tip-eval", help="corte y latencia efectiva de la punta predicha")
+    p.add_argument("trails", nargs="*", help="partidas grabadas (.trail); sin ninguna, un ocho sintético")
+    p.add_argument("--fps", type=float, default=30.0)
+    p.add_argument("--latency", type=float, default=0.08, help="latencia del pipeline simulada (s)")
+    p.add_argument("--speed", type=float, default=2.0, help="velocidad del ocho sintético")
+    p.add_argument("--size", type=float, default=30.0, help="lado de los cuadros (px)")
+    p.add_argument("--window", type=float, default=0.1, help="cuánto vive cada cuadro alrededor del cruce (s)")
+    p.add_argument("--targets", type=int, default=300, help="cuadros por trazo")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_tip_eval)
+
+    p = sub.add_parser("hand-flow", help="CPU ahorrada y error de landmarks del tracking por flujo óptico")
+    p.add_argument("--video", help="clip grabado con manos (por defecto frames sintéticos)")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--every", default="2,3,5",
+                   help="cada cuántos frames inferir, separados por coma")
+    p.set_defaults(func=bench_hand_flow)
+
+    p = sub.add_parser("idle", help="CPU y potencia del menú sobre una escena quieta, con y sin ralentí")
+    p.add_argument("--source", required=True,
+                   help="grabación de la escena vacía (video:ruta | dir:ruta)")
+    p.add_argument("--fps", type=float, default=None,
+                   help="ritmo de la fuente (por defecto el del clip)")
+    p.set_defaults(func=bench_idle)
+
+    p = sub.add_parser("hand-worker", help="worker de manos en otro proceso: costo, atraso y caída")
+    p.add_argument("--video", help="clip grabado (por defecto frames sintéticos)")
+    p.add_argument("--frames", type=int, default=300)
+    p.add_argument("--fps", type=float, default=30.0, help="ritmo del loop simulado")
+    p.add_argument("--kill-at", type=int, default=150, help="frame en el que se mata el worker")
+    p.add_argument("--max-detect-frames", type=int, default=3)
+    p.add_argument("--start-timeout", type=float, default=30.0,
+                   help="segundos máximos para el primer resultado del worker")
+    p.add_argument("--cold-stall", type=float, default=0.1,
+                   help="STALL_TIMEOUT durante el arranque (menor que el arranque real)")
+    p.set_defaults(func=bench_hand_worker)
+
+    p = sub.add_parser("metrics-overhead", help="costo por frame de metrics.lap")
+    p.add_argument("--iterations", type=int, default=200_000)
+    p.set_defaults(func=bench_metrics_overhead)
+
+    p = sub.add_parser("replay", help="corre los modos sin cámara ni pantalla y reporta JSON")
+    p.add_argument("--source", default="synthetic:300",
+                   help="camera:N | video:ruta | dir:ruta | synthetic[:frames]")
+    p.add_argument("--fps", type=float, default=None,
+                   help="ritmo de la fuente (por defecto el del clip; 0 = sin pausas)")
+    p.add_argument("--modes", default="menu,qr,gestos,juego,foto")
+    p.add_argument("--json", help="archivo de salida (por defecto stdout)")
+    p.set_defaults(func=bench_replay)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
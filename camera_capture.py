@@ -5,6 +5,11 @@ import os
 import time
 import datetime
 
+import camera_hub
+import display
+import metrics
+import preprocess
+
 WINDOW_TITLE = "Captura de Foto"
 FULLSCREEN = False          # ventana tamaño fijo
 MIRROR = True               # espejo horizontal para control natural
@@ -14,10 +19,10 @@ WIN_W, WIN_H = 960, 540     # resolución fija ventana y cámara
 
 def _set_fullscreen():
     try:
-        cv2.namedWindow(WINDOW_TITLE, cv2.WND_PROP_FULLSCREEN)
-        cv2.setWindowProperty(WINDOW_TITLE, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+        display.namedWindow(WINDOW_TITLE, cv2.WND_PROP_FULLSCREEN)
+        display.setWindowProperty(WINDOW_TITLE, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
     except Exception:
-        cv2.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
+        display.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
 
 def _draw_centered_text(frame, text: str, scale=3.5, thickness=6, color=(255,255,255), shadow=(0,0,0)):
     h, w = frame.shape[:2]
@@ -28,45 +33,43 @@ def _draw_centered_text(frame, text: str, scale=3.5, thickness=6, color=(255,255
         cv2.putText(frame, text, (x+2, y+2), cv2.FONT_HERSHEY_SIMPLEX, scale, shadow, thickness+2, cv2.LINE_AA)
     cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness, cv2.LINE_AA)
 
-def capture_photo(save_dir="photos", camera_index: int = 0):
+def capture_photo(save_dir="photos", camera_index: int = 0,
+                  hub: camera_hub.CameraHub | None = None):
     """
-    Abre la cámara, muestra un conteo de 3s, toma la foto automáticamente y cierra.
+    Usa la cámara (el hub compartido si se pasa), muestra un conteo de 3s, toma la foto automáticamente y cierra.
     - ESC durante el conteo: cancelar y volver al menú.
     Devuelve la ruta del archivo guardado o None si se canceló.
     """
     os.makedirs(save_dir, exist_ok=True)
 
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
+    cap = camera_hub.open_capture(hub, camera_index, WIN_W, WIN_H)
+    if cap is None:
         print("❌ No se pudo acceder a la cámara.")
         return None
 
-    # Fijar resolución de captura
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIN_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, WIN_H)
-
     if FULLSCREEN:
         _set_fullscreen()
     else:
-        cv2.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
+        display.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
+        display.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
 
     print(f"📸 Iniciando conteo de {COUNTDOWN_SECONDS} segundos... (ESC para cancelar)")
 
     filepath = None
+    prep = preprocess.Preprocessor(WIN_W, WIN_H, mirror=MIRROR, crop=True)  # 16:9 sin estirar
     start = time.time()
     try:
         while True:
+            metrics.begin_frame()
             ret, frame = cap.read()
             if not ret:
                 print("❌ Error al leer la imagen de la cámara.")
                 break
+            metrics.lap("captura")
 
-            if MIRROR:
-                frame = cv2.flip(frame, 1)
-
-            # Redimensionar por si no está en la resolución fija
-            frame = cv2.resize(frame, (WIN_W, WIN_H))
+            # Espejo y resolución fija en una pasada, sobre buffers reutilizados
+            frame = prep(frame)
+            metrics.lap("preproceso")
 
             # Tiempo restante
             elapsed = time.time() - start
@@ -77,22 +80,27 @@ def capture_photo(save_dir="photos", camera_index: int = 0):
                 _draw_centered_text(frame, str(remaining))
                 cv2.putText(frame, "ESC: Cancelar",
                             (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255,255,255), 2, cv2.LINE_AA)
-                cv2.imshow(WINDOW_TITLE, frame)
+                metrics.lap("dibujo")
+                metrics.draw_hud(frame)
+                display.imshow(WINDOW_TITLE, frame)
             else:
                 # Capturar (flash opcional)
                 flash = frame.copy()
                 flash[:] = (255, 255, 255)
-                cv2.imshow(WINDOW_TITLE, flash)
-                cv2.waitKey(FLASH_MS)
+                display.imshow(WINDOW_TITLE, flash)
+                display.waitKey(FLASH_MS)
 
                 # Guardar
                 filename = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".jpg"
                 filepath = os.path.join(save_dir, filename)
                 cv2.imwrite(filepath, frame)
+                metrics.lap("guardar")
                 print(f"✅ Foto guardada en {filepath}")
                 break
 
-            key = cv2.waitKey(1) & 0xFF
+            key = display.waitKey(1) & 0xFF
+            metrics.lap("display")
+            metrics.end_frame()
             if key == 27:  # ESC
                 print("🚪 Captura cancelada por el usuario.")
                 filepath = None
@@ -100,7 +108,7 @@ def capture_photo(save_dir="photos", camera_index: int = 0):
 
     finally:
         cap.release()
-        cv2.destroyWindow(WINDOW_TITLE)
+        display.destroyWindow(WINDOW_TITLE)
 
     return filepath
 
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Optional, Tuple
+
+import numpy as np
+
+import frame_sources
+import metrics
+
+# Resolución con la que se abre la cámara compartida (la del menú);
+# cada modo sigue redimensionando a su propio tamaño de ventana (los 16:9
+# recortan al centro en vez de estirar, ver preprocess.Preprocessor).
+HUB_W, HUB_H = 1200, 960
+
+BUFFER_SIZE = 4        # frames recientes que guarda el ring buffer
+READ_TIMEOUT = 2.0     # segundos máximos esperando un frame nuevo
+
+
+@dataclass(frozen=True)
+class Frame:
+    seq: int            # número de frame, creciente desde que arrancó el hub
+    timestamp: float    # time.monotonic() del momento en que se capturó
+    image: np.ndarray   # BGR, sólo lectura (compartido entre suscriptores)
+
+    @property
+    def age(self) -> float:
+        """Segundos transcurridos desde la captura."""
+        return time.monotonic() - self.timestamp
+
+
+class CameraHub:
+    """
+    Dueño único de la cámara durante toda la app.
+    Un hilo de captura lee del dispositivo continuamente y guarda los últimos
+    frames con su timestamp; los modos se suscriben en vez de abrir la cámara.
+    """
+
+    def __init__(self, camera_index: int = 0, width: int = HUB_W, height: int = HUB_H,
+                 buffer_size: int = BUFFER_SIZE,
+                 source_factory: Optional[Callable[[], Any]] = None):
+        self.camera_index = camera_index
+        self.width, self.height = width, height
+        self._factory = source_factory or (
+            lambda: frame_sources.open_camera(camera_index, width, height))
+        self._buffer: Deque[Frame] = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._source: Any = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._ended = False
+        self._seq = 0
+        self._interval = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._ended
+
+    def start(self) -> bool:
+        """Abre la fuente y arranca el hilo de captura. Devuelve False si no se pudo abrir."""
+        if self._thread is not None:
+            return True
+        source = self._factory()
+        if source is None or not source.isOpened():
+            return False
+        self._source = source
+        self._buffer.clear()      # frames de una corrida anterior no se entregan
+        self._running = True
+        self._ended = False
+        self._thread = threading.Thread(target=self._grab_loop, name="camera-hub", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Detiene el hilo y libera el dispositivo."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=READ_TIMEOUT)
+            self._thread = None
+        if self._source is not None:
+            self._source.release()
+            self._source = None
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+    def restart(self) -> bool:
+        """Vuelve a abrir la fuente de un hub cuyo hilo terminó (cámara caída)."""
+        self.stop()
+        return self.start()
+
+    def set_interval(self, seconds: float) -> None:
+        """
+        Publica como mucho un frame cada *seconds* (0 = todos). Entre medio
+        la cámara sólo hace grab(), sin decodificar; el cambio rige desde el
+        próximo frame de la fuente.
+        """
+        self._interval = max(0.0, seconds)
+
+    def _grab_loop(self) -> None:
+        grab = getattr(self._source, "grab", None)    # las fuentes de prueba no lo tienen
+        last = 0.0
+        while self._running:
+            interval = self._interval
+            if interval > 0 and grab is not None and time.monotonic() - last < interval:
+                # Ralentí: vaciar la cola del driver sin decodificar
+                if not grab():
+                    break
+                continue
+            ok, image = self._source.read()
+            if not ok:
+                break
+            now = time.monotonic()
+            if interval > 0 and now - last < interval:
+                continue
+            last = now
+            # Los frames se comparten: nadie debe dibujar encima del original
+            image.flags.writeable = False
+            with self._cond:
+                self._seq += 1
+                self._buffer.append(Frame(self._seq, now, image))
+                self._cond.notify_all()
+        # Soltar el dispositivo ya: si falló, otro start() tiene que poder abrirlo
+        source, self._source = self._source, None
+        if source is not None:
+            source.release()
+        with self._cond:
+            self._ended = True
+            self._cond.notify_all()
+
+    def latest(self) -> Optional[Frame]:
+        with self._cond:
+            return self._buffer[-1] if self._buffer else None
+
+    def subscribe(self, owns_hub: bool = False) -> "Subscription":
+        return Subscription(self, owns_hub)
+
+
+class Subscription:
+    """
+    Vista de un modo sobre el hub. Imita la interfaz de cv2.VideoCapture
+    (read / isOpened / release) para que los modos cambien lo mínimo.
+
+    Entrega siempre el frame más nuevo (drop-oldest): si el consumidor tarda
+    más que un período de cámara, los frames intermedios se descartan y se
+    cuentan en vez de acumularse como retraso.
+    """
+
+    def __init__(self, hub: CameraHub, owns_hub: bool = False):
+        self._hub = hub
+        self._owns_hub = owns_hub
+        self._released = False
+        latest = hub.latest()
+        # Empezar desde el frame más reciente, no desde frames viejos del buffer
+        self._last_seq = latest.seq - 1 if latest is not None else 0
+        # Estadísticas de entrega
+        self.delivered = 0
+        self.dropped = 0
+        self.last_age = 0.0
+        self._age_sum = 0.0
+        self._age_max = 0.0
+
+    def isOpened(self) -> bool:
+        return not self._released and self._hub.running
+
+    def read_frame(self, timeout: float = READ_TIMEOUT) -> Optional[Frame]:
+        """Frame más nuevo aún no visto; None si la fuente terminó o no llegó a tiempo."""
+        hub = self._hub
+        deadline = time.monotonic() + timeout
+        with hub._cond:
+            while not self._released:
+                frame = hub._buffer[-1] if hub._buffer else None
+                if frame is not None and frame.seq > self._last_seq:
+                    if self._last_seq:
+                        self.dropped += frame.seq - self._last_seq - 1
+                    self._last_seq = frame.seq
+                    break
+                if hub._ended:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                hub._cond.wait(remaining)
+            else:
+                return None
+
+        age = frame.age
+        metrics.record("edad_frame", age)
+        self.delivered += 1
+        self.last_age = age
+        self._age_sum += age
+        self._age_max = max(self._age_max, age)
+        return frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        frame = self.read_frame()
+        if frame is None:
+            return False, None
+        return True, frame.image
+
+    def set_interval(self, seconds: float) -> None:
+        """Ritmo de captura del hub (ver CameraHub.set_interval)."""
+        self._hub.set_interval(seconds)
+
+    def stats(self) -> dict:
+        """Frames entregados/descartados y edad (s) de los frames al entregarlos."""
+        return {
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "last_age": self.last_age,
+            "mean_age": self._age_sum / self.delivered if self.delivered else 0.0,
+            "max_age": self._age_max,
+        }
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        if self.delivered:
+            s = self.stats()
+            print(f"📷 Frames: {s['delivered']} entregados, {s['dropped']} descartados, "
+                  f"edad media {s['mean_age'] * 1000:.0f} ms (máx {s['max_age'] * 1000:.0f} ms)")
+        if self._owns_hub:
+            self._hub.stop()
+
+
+def open_capture(hub: Optional[CameraHub], camera_index: int = 0,
+                 width: int = HUB_W, height: int = HUB_H) -> Optional[Subscription]:
+    """
+    Suscribe un modo al hub compartido; si su captura se cayó, lo reabre (un
+    segundo hub pelearía por el mismo dispositivo). Si no hay hub (modo
+    ejecutado suelto), abre uno propio que se libera junto con la suscripción.
+    Devuelve None si la cámara no se pudo abrir.
+    """
+    if hub is not None:
+        if not hub.running and not hub.restart():
+            return None
+        return hub.subscribe()
+    own = CameraHub(camera_index, width, height)
+    if not own.start():
+        return None
+    return own.subscribe(owns_hub=True)
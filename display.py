@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Salida de video de los modos. Por defecto va a las ventanas de OpenCV;
+# con use(HeadlessSink()) los modos corren sin pantalla (benchmarks, CI).
+# Las funciones del módulo imitan a las de cv2 para que los modos cambien lo mínimo.
+
+
+class WindowSink:
+    """Ventanas reales de OpenCV."""
+
+    def namedWindow(self, name: str, flags: int = cv2.WINDOW_NORMAL) -> None:
+        cv2.namedWindow(name, flags)
+
+    def resizeWindow(self, name: str, width: int, height: int) -> None:
+        cv2.resizeWindow(name, width, height)
+
+    def setWindowProperty(self, name: str, prop: int, value: float) -> None:
+        cv2.setWindowProperty(name, prop, value)
+
+    def getWindowProperty(self, name: str, prop: int) -> float:
+        return cv2.getWindowProperty(name, prop)
+
+    def imshow(self, name: str, frame: np.ndarray) -> None:
+        cv2.imshow(name, frame)
+
+    def waitKey(self, delay: int = 0) -> int:
+        return cv2.waitKey(delay)
+
+    def destroyWindow(self, name: str) -> None:
+        cv2.destroyWindow(name)
+
+    def destroyAllWindows(self) -> None:
+        cv2.destroyAllWindows()
+
+
+class HeadlessSink:
+    """Sin pantalla: descarta los frames, no espera y nunca recibe teclas."""
+
+    def __init__(self):
+        self.frames_shown = 0
+        self.last_frame: Optional[np.ndarray] = None
+
+    def namedWindow(self, name: str, flags: int = 0) -> None:
+        pass
+
+    def resizeWindow(self, name: str, width: int, height: int) -> None:
+        pass
+
+    def setWindowProperty(self, name: str, prop: int, value: float) -> None:
+        pass
+
+    def getWindowProperty(self, name: str, prop: int) -> float:
+        return 1.0  # la "ventana" sigue visible
+
+    def imshow(self, name: str, frame: np.ndarray) -> None:
+        self.frames_shown += 1
+        self.last_frame = frame
+
+    def waitKey(self, delay: int = 0) -> int:
+        return -1
+
+    def destroyWindow(self, name: str) -> None:
+        pass
+
+    def destroyAllWindows(self) -> None:
+        pass
+
+
+_sink = WindowSink()
+
+
+def use(sink) -> None:
+    """Cambia la salida de todos los modos."""
+    global _sink
+    _sink = sink
+
+
+def current():
+    return _sink
+
+
+def namedWindow(name: str, flags: int = cv2.WINDOW_NORMAL) -> None:
+    _sink.namedWindow(name, flags)
+
+
+def resizeWindow(name: str, width: int, height: int) -> None:
+    _sink.resizeWindow(name, width, height)
+
+
+def setWindowProperty(name: str, prop: int, value: float) -> None:
+    _sink.setWindowProperty(name, prop, value)
+
+
+def getWindowProperty(name: str, prop: int) -> float:
+    return _sink.getWindowProperty(name, prop)
+
+
+def imshow(name: str, frame: np.ndarray) -> None:
+    _sink.imshow(name, frame)
+
+
+def waitKey(delay: int = 0) -> int:
+    return _sink.waitKey(delay)
+
+
+def destroyWindow(name: str) -> None:
+    _sink.destroyWindow(name)
+
+
+def destroyAllWindows() -> None:
+    _sink.destroyAllWindows()
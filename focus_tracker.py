@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+import select
+import subprocess
+import threading
+from typing import Optional, Sequence
+
+try:  # python-xlib es opcional: sin él se usa xdotool por polling
+    from Xlib import X
+    from Xlib import display as xdisplay
+except ImportError:
+    X = xdisplay = None
+
+# ¿La ventana del modo tiene el foco? Antes se lanzaba xdotool en cada frame
+# (~30 procesos por segundo). Ahora un hilo mantiene un booleano en caché:
+#   - con python-xlib y X11, escuchando los cambios de _NET_ACTIVE_WINDOW;
+#   - si no, ejecutando el comando (xdotool) a lo sumo cada POLL_INTERVAL.
+# Sin X (Wayland, Windows, sin xdotool) queda siempre en True, como antes.
+
+XDOTOOL_CMD = ("xdotool", "getactivewindow", "getwindowname")
+POLL_INTERVAL = 0.25       # segundos entre consultas al comando
+EVENT_TIMEOUT = 0.25       # cada cuánto el hilo de eventos revisa si debe parar
+STOP_TIMEOUT = 1.0
+
+ENABLED = True             # False: no se consulta nada y siempre hay foco (benchmarks)
+
+
+class FocusTracker:
+    """
+    Sigue si la ventana activa contiene *expected_name*. *command* reemplaza a
+    xdotool (debe imprimir el nombre de la ventana activa); si se pasa, no se
+    usan eventos X11.
+    """
+
+    def __init__(self, expected_name: str, command: Optional[Sequence[str]] = None,
+                 interval: float = POLL_INTERVAL):
+        self.expected_name = expected_name
+        self.command = tuple(command) if command is not None else XDOTOOL_CMD
+        self.interval = interval
+        self.use_events = command is None
+        self.focused = True
+        self.polls = 0                 # consultas hechas (procesos lanzados o lecturas X11)
+        self.backend = "ninguno"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "FocusTracker":
+        if not ENABLED or self._thread is not None:
+            return self
+        if self.use_events and not os.environ.get("DISPLAY"):
+            return self                # Wayland puro / Windows: siempre con foco
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="focus-tracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=STOP_TIMEOUT)
+            self._thread = None
+
+    def __enter__(self) -> "FocusTracker":
+        return self.start()
+
+    def __exit__(self, *_exc) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        if self.use_events and xdisplay is not None:
+            try:
+                self._listen_x11()
+                return
+            except Exception as e:
+                print(f"⚠ Sin eventos X11 ({e}); se consulta xdotool periódicamente.")
+        self._poll_command()
+
+    # -- polling del comando -------------------------------------------------
+
+    def _poll_command(self) -> None:
+        self.backend = "comando"
+        while not self._stop.is_set():
+            self.polls += 1
+            try:
+                name = subprocess.check_output(self.command, stderr=subprocess.DEVNULL,
+                                               timeout=self.interval * 4).decode().strip()
+                self.focused = self.expected_name in name
+            except FileNotFoundError:
+                # No existe el comando: no tiene sentido seguir intentando
+                self.focused = True
+                self.backend = "ninguno"
+                return
+            except (subprocess.SubprocessError, OSError):
+                self.focused = True
+            self._stop.wait(self.interval)
+
+    # -- eventos X11 -----------------------------------------------------------
+
+    def _listen_x11(self) -> None:
+        d = xdisplay.Display()
+        try:
+            root = d.screen().root
+            net_active = d.intern_atom("_NET_ACTIVE_WINDOW")
+            net_name = d.intern_atom("_NET_WM_NAME")
+            utf8 = d.intern_atom("UTF8_STRING")
+            root.change_attributes(event_mask=X.PropertyChangeMask)
+            self.backend = "x11"
+
+            def refresh() -> None:
+                self.polls += 1
+                try:
+                    prop = root.get_full_property(net_active, X.AnyPropertyType)
+                    if prop is None or not prop.value or not prop.value[0]:
+                        self.focused = True
+                        return
+                    win = d.create_resource_object("window", prop.value[0])
+                    name = win.get_full_property(net_name, utf8)
+                    title = name.value.decode("utf-8", "replace") if name else win.get_wm_name()
+                    self.focused = self.expected_name in (title or "")
+                except Exception:
+                    self.focused = True  # la ventana pudo cerrarse entre evento y consulta
+
+            refresh()
+            while not self._stop.is_set():
+                select.select([d], [], [], EVENT_TIMEOUT)
+                changed = False
+                for _ in range(d.pending_events()):
+                    ev = d.next_event()
+                    if ev.type == X.PropertyNotify and ev.atom == net_active:
+                        changed = True
+                if changed:
+                    refresh()
+        finally:
+            d.close()
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import glob
+import os
+import time
+from typing import Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Fuentes de frames con la misma interfaz que cv2.VideoCapture
+# (isOpened / read / set / release), para poder enchufarlas al CameraHub.
+# open_source() arma cualquiera de ellas a partir de un texto:
+#   "camera:0" | "video:clip.mp4" | "dir:fotos/" | "synthetic" | "synthetic:300"
+# (un número solo es una cámara; una ruta, un video o un directorio).
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def open_camera(camera_index: int, width: int, height: int) -> cv2.VideoCapture:
+    """Abre la cámara real y fija la resolución de captura."""
+    cap = cv2.VideoCapture(camera_index)
+    if cap.isOpened():
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        # Cola mínima en el driver: el hub ya guarda los frames recientes
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class SyntheticSource:
+    """
+    Genera frames sintéticos a un ritmo fijo, sin cámara.
+    - open_delay simula el tiempo de apertura/negociación de una cámara UVC.
+    - frames=None genera indefinidamente.
+    """
+
+    def __init__(self, width: int = 1200, height: int = 960, fps: float = 30.0,
+                 frames: Optional[int] = None, open_delay: float = 0.0):
+        if open_delay > 0:
+            time.sleep(open_delay)
+        self.width, self.height = width, height
+        self.fps = fps
+        self.frames = frames
+        self._count = 0
+        self._next_t = time.monotonic()
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened or (self.frames is not None and self._count >= self.frames):
+            return False, None
+        # Respetar el fps como lo haría el driver de la cámara
+        if self.fps > 0:
+            now = time.monotonic()
+            if self._next_t > now:
+                time.sleep(self._next_t - now)
+            self._next_t = max(self._next_t, now) + 1.0 / self.fps
+
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        # Barra que se desplaza para que frames consecutivos sean distintos
+        x = (self._count * 8) % max(1, self.width)
+        cv2.rectangle(frame, (x, 0), (x + 40, self.height), (255, 255, 255), -1)
+        self._count += 1
+        return True, frame
+
+    def release(self) -> None:
+        self._opened = False
+
+
+class VideoFileSource:
+    """Reproduce un video grabado al ritmo de su propio fps (o sin pausas si fps=0)."""
+
+    def __init__(self, path: str, fps: Optional[float] = None, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self._cap = cv2.VideoCapture(path)
+        self.file_fps = self._cap.get(cv2.CAP_PROP_FPS) if self._cap.isOpened() else 0.0
+        self.fps = (self.file_fps or 30.0) if fps is None else fps
+        self._next_t = time.monotonic()
+
+    def isOpened(self) -> bool:
+        return self._cap.isOpened()
+
+    def set(self, prop: int, value: float) -> bool:
+        # La resolución de un archivo no se puede cambiar; los modos ya redimensionan
+        return False
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ok, frame = self._cap.read()
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+        if not ok:
+            return False, None
+        if self.fps > 0:
+            now = time.monotonic()
+            if self._next_t > now:
+                time.sleep(self._next_t - now)
+            self._next_t = max(self._next_t, now) + 1.0 / self.fps
+        return True, frame
+
+    def release(self) -> None:
+        self._cap.release()
+
+
+class ImageDirSource:
+    """Recorre las imágenes de un directorio en orden alfabético como si fueran frames."""
+
+    def __init__(self, path: str, fps: float = 30.0, loop: bool = False):
+        self.paths = sorted(p for p in glob.glob(os.path.join(path, "*"))
+                            if p.lower().endswith(IMAGE_EXTS))
+        self.fps = fps
+        self.loop = loop
+        self._i = 0
+        self._next_t = time.monotonic()
+        self._opened = bool(self.paths)
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def set(self, prop: int, value: float) -> bool:
+        return False
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened:
+            return False, None
+        if self._i >= len(self.paths):
+            if not self.loop:
+                return False, None
+            self._i = 0
+        frame = cv2.imread(self.paths[self._i])
+        self._i += 1
+        if frame is None:
+            return False, None
+        if self.fps > 0:
+            now = time.monotonic()
+            if self._next_t > now:
+                time.sleep(self._next_t - now)
+            self._next_t = max(self._next_t, now) + 1.0 / self.fps
+        return True, frame
+
+    def release(self) -> None:
+        self._opened = False
+
+
+def open_source(spec: str, width: int, height: int, fps: Optional[float] = None,
+                loop: bool = False) -> Any:
+    """
+    Abre la fuente descrita por *spec* (ver arriba). *fps* marca el ritmo de
+    entrega para video/imágenes/sintética (0 = lo más rápido posible).
+    """
+    kind, _, arg = spec.partition(":")
+    if kind not in ("camera", "video", "dir", "synthetic"):
+        kind, arg = spec, ""    # p. ej. una ruta de Windows con "C:"
+    if not arg:
+        if spec.isdigit():
+            kind, arg = "camera", spec
+        elif spec == "synthetic":
+            kind = "synthetic"
+        elif os.path.isdir(spec):
+            kind, arg = "dir", spec
+        else:
+            kind, arg = "video", spec
+
+    if kind == "camera":
+        return open_camera(int(arg or 0), width, height)
+    if kind == "video":
+        return VideoFileSource(arg, fps=fps, loop=loop)
+    if kind == "dir":
+        return ImageDirSource(arg, fps=30.0 if fps is None else fps, loop=loop)
+    if kind == "synthetic":
+        return SyntheticSource(width, height, fps=30.0 if fps is None else fps,
+                               frames=int(arg) if arg else None)
+    raise ValueError(f"Fuente desconocida: {spec!r}")
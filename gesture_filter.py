@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import numpy as np
+
+import gestures
+
+# Capa de filtrado entre el motor de landmarks y la lógica de los modos:
+# suavizado One-Euro, umbrales con histéresis (entrar/salir) y debounce
+# con umbral de confianza para los gestos que se mantienen.
+
+# One-Euro (coordenadas normalizadas, segundos)
+MIN_CUTOFF = 1.2       # Hz: más bajo = más suave en reposo
+BETA = 8.0             # cuánto sube el corte con la velocidad (menos lag al moverse)
+D_CUTOFF = 1.0         # Hz para la derivada
+
+# Histéresis del gesto OK: entra con dist < OK_ENTER, sale con dist > OK_EXIT
+OK_ENTER = gestures.OK_MAX_DIST
+OK_EXIT = 0.07
+
+# Margen (normalizado) que hay que cruzar para cambiar de zona/cuadrante
+ZONE_MARGIN = 0.03
+
+# Debounce: con la pose perdida el progreso baja DECAY veces más rápido de lo
+# que sube, en vez de volver a cero en un solo frame con jitter.
+DECAY = 2.0
+# Con menos confianza que esto la pose no cuenta como presente ni ausente: el
+# progreso queda quieto. Por encima avanza a tiempo real, así que *hold* es la
+# duración nominal sin importar la confianza.
+MIN_HOLD_CONFIDENCE = 0.5
+
+
+def _alpha(cutoff: np.ndarray | float, dt: float) -> np.ndarray | float:
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """Filtro One-Euro vectorizado: suaviza arrays (manos, 21, 3) completos por frame."""
+
+    def __init__(self, min_cutoff: float = MIN_CUTOFF, beta: float = BETA,
+                 d_cutoff: float = D_CUTOFF):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._x: Optional[np.ndarray] = None
+        self._dx: Optional[np.ndarray] = None
+        self._t = 0.0
+
+    def __call__(self, x: np.ndarray, t: float) -> np.ndarray:
+        if self._x is None or self._x.shape != x.shape or t <= self._t:
+            # Primera muestra o cambió la cantidad de manos: arrancar de cero
+            self._x = x.astype(np.float32, copy=True)
+            self._dx = np.zeros_like(self._x)
+            self._t = t
+            return self._x.copy()
+
+        dt = t - self._t
+        self._t = t
+        dx = (x - self._x) / dt
+        self._dx += _alpha(self.d_cutoff, dt) * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self._dx)
+        self._x += _alpha(cutoff, dt) * (x - self._x)
+        return self._x.copy()
+
+
+class Hysteresis:
+    """Booleano con dos umbrales sobre una métrica 'menor es más activo' (p. ej. distancia)."""
+
+    def __init__(self, enter: float, exit: float):
+        self.enter = enter
+        self.exit = exit
+        self.active = False
+
+    def update(self, value: Optional[float]) -> bool:
+        if value is None:
+            self.active = False
+        elif self.active:
+            self.active = value <= self.exit
+        else:
+            self.active = value < self.enter
+        return self.active
+
+
+class HoldDebouncer:
+    """
+    Gesto mantenido *hold* segundos. El progreso sube con dt mientras la pose
+    está presente con confianza suficiente (se congela si es dudosa) y baja
+    DECAY veces más rápido cuando no, así que un frame perdido no reinicia la
+    cuenta. update() devuelve True una vez al llegar.
+    """
+
+    def __init__(self, hold: float, decay: float = DECAY,
+                 min_confidence: float = MIN_HOLD_CONFIDENCE):
+        self.hold = hold
+        self.decay = decay
+        self.min_confidence = min_confidence
+        self.level = 0.0
+        self._t: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.level > 0.0
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self.hold - self.level)
+
+    @property
+    def progress(self) -> float:
+        return min(1.0, self.level / self.hold) if self.hold > 0 else 1.0
+
+    def reset(self) -> None:
+        self.level = 0.0
+        self._t = None
+
+    def update(self, present: bool, t: float, confidence: float = 1.0) -> bool:
+        dt = 0.0 if self._t is None else max(0.0, t - self._t)
+        self._t = t
+        if present:
+            if confidence >= self.min_confidence:
+                self.level += dt
+        else:
+            self.level = max(0.0, self.level - dt * self.decay)
+        if self.level >= self.hold:
+            self.reset()
+            return True
+        return False
+
+
+class OkHold:
+    """Gesto OK mantenido: histéresis sobre la distancia pulgar-índice + debounce."""
+
+    def __init__(self, hold: float, enter: float = OK_ENTER, exit: float = OK_EXIT):
+        self.pose = Hysteresis(enter, exit)
+        self.timer = HoldDebouncer(hold)
+
+    @property
+    def active(self) -> bool:
+        return self.timer.active
+
+    @property
+    def remaining(self) -> float:
+        return self.timer.remaining
+
+    def update(self, arr: np.ndarray, t: float, confidence: float = 1.0) -> bool:
+        """*arr* (manos, 21, 3), idealmente suavizado. True cuando se cumplió el tiempo."""
+        dist = float(ok_distance(arr).min()) if len(arr) else None
+        return self.timer.update(self.pose.update(dist), t, confidence)
+
+
+def ok_distance(arr: np.ndarray) -> np.ndarray:
+    """Distancia 2D pulgar-índice por mano."""
+    d = arr[:, gestures.THUMB_TIP, :2] - arr[:, gestures.INDEX_TIP, :2]
+    return np.sqrt(np.einsum("ij,ij->i", d, d))
+
+
+def _with_margin(value: float, edge: float, was_low: Optional[bool], margin: float) -> bool:
+    """¿value está del lado bajo de edge? Si antes lo estaba, exige cruzar el margen."""
+    if was_low is None:
+        return value < edge
+    return value < edge + margin if was_low else value < edge - margin
+
+
+def cuadrante_estable(prev: Optional[str], x: float, y: float, margin: float = ZONE_MARGIN) -> str:
+    """Cuadrante de (x, y) que sólo cambia respecto de *prev* al pasar la línea por *margin*."""
+    left = _with_margin(x, 0.5, None if prev is None else prev[1] == "L", margin)
+    top = _with_margin(y, 0.5, None if prev is None else prev[0] == "T", margin)
+    return ("T" if top else "B") + ("L" if left else "R")
+
+
+def zona_estable(prev: Optional[str], x: float, y: float, margin: float = ZONE_MARGIN) -> str:
+    """
+    Zona de muñeca ('arriba', 'izquierda', 'derecha' o '' = centro) con histéresis
+    respecto de *prev* (None = sin zona previa conocida).
+    """
+    known = prev is not None
+    if _with_margin(y, gestures.ZONA_ARRIBA_Y, prev == "arriba" if known else None, margin):
+        return "arriba"
+    if _with_margin(x, gestures.ZONA_IZQUIERDA_X, prev == "izquierda" if known else None, margin):
+        return "izquierda"
+    if not _with_margin(x, gestures.ZONA_DERECHA_X, prev != "derecha" if known else None, margin):
+        return "derecha"
+    return ""
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+import gestures
+
+# Historial de landmarks y gestos dinámicos (swipe / push / flick).
+# Cada frame actualiza estadísticas incrementales sobre una ventana de tiempo
+# corta, así que reconocer cuesta O(1) por frame sin importar el historial.
+
+HISTORY_SIZE = 32          # frames guardados (~1 s a 30 fps)
+WINDOW_SECONDS = 0.40      # duración máxima de un gesto dinámico
+MIN_WINDOW_FRAMES = 4      # muestras mínimas antes de decidir
+COOLDOWN_SECONDS = 0.6     # tras reconocer un gesto, ignorar el resto del movimiento
+
+SWIPE_MIN_DX = 0.25        # desplazamiento horizontal (normalizado) en la ventana
+SWIPE_MAX_SLOPE = 0.5      # |dy| / |dx| máximo para que cuente como horizontal
+SWIPE_MIN_SPEED = 0.9      # velocidad media (ancho de imagen por segundo)
+PUSH_MIN_SCALE = 1.30      # la mano "crece" este factor al acercarse a la cámara
+PUSH_MAX_DRIFT = 0.10      # desplazamiento máximo del centro durante el push
+FLICK_MIN_SPEED = 3.0      # velocidad de la punta del índice relativa a la muñeca
+FLICK_MAX_WRIST = 0.06     # la muñeca casi no se mueve en un flick
+
+PALM = np.array([0, 5, 9, 13, 17])   # centro de la palma: muñeca + bases de los dedos
+MIDDLE_MCP = 9
+
+
+class LandmarkHistory:
+    """Ring buffer de tamaño fijo con los landmarks (21, 3) de una mano y su timestamp."""
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        self.capacity = capacity
+        self.landmarks = np.zeros((capacity, gestures.N_LANDMARKS, 3), dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.count = 0       # muestras válidas (≤ capacity)
+        self.head = -1       # índice de la última muestra
+
+    def push(self, hand: np.ndarray, t: float) -> int:
+        self.head = (self.head + 1) % self.capacity
+        self.landmarks[self.head] = hand
+        self.timestamps[self.head] = t
+        self.count = min(self.count + 1, self.capacity)
+        return self.head
+
+    def index(self, back: int) -> int:
+        """Índice en el buffer de la muestra *back* frames atrás (0 = la última)."""
+        return (self.head - back) % self.capacity
+
+    def clear(self) -> None:
+        self.count = 0
+        self.head = -1
+
+
+class DynamicGestureDetector:
+    """
+    Reconoce gestos dinámicos de la primera mano:
+    'swipe_izquierda', 'swipe_derecha', 'push' (hacia la cámara) y 'flick'
+    (latigazo del índice con la muñeca quieta).
+    """
+
+    def __init__(self, window: float = WINDOW_SECONDS, capacity: int = HISTORY_SIZE,
+                 cooldown: float = COOLDOWN_SECONDS):
+        self.window = window
+        self.cooldown = cooldown
+        self.history = LandmarkHistory(capacity)
+        # Series derivadas, alineadas con el ring buffer
+        self._center = np.zeros((capacity, 2), dtype=np.float64)
+        self._scale = np.zeros(capacity, dtype=np.float64)
+        self._tip_rel = np.zeros((capacity, 2), dtype=np.float64)
+        self._start = 0           # cuántos frames atrás empieza la ventana
+        self._blocked_until = 0.0
+        self.last_gesture: Optional[str] = None
+
+    def reset(self) -> None:
+        self.history.clear()
+        self._start = 0
+
+    def update(self, arr: Optional[np.ndarray], t: float) -> Optional[str]:
+        """Agrega el frame (manos, 21, 3) de tiempo *t*; devuelve el gesto reconocido o None."""
+        if arr is None or len(arr) == 0:
+            # Sin mano se corta el movimiento: la ventana vuelve a empezar
+            self.reset()
+            return None
+
+        hand = arr[0]
+        h = self.history
+        i = h.push(hand, t)
+        wrist = hand[gestures.WRIST, :2]
+        self._center[i] = hand[PALM, :2].mean(axis=0)
+        self._scale[i] = np.hypot(*(hand[MIDDLE_MCP, :2] - wrist))
+        self._tip_rel[i] = hand[gestures.INDEX_TIP, :2] - wrist
+
+        # Ventana deslizante: avanzar el inicio mientras quede más vieja que window
+        self._start = min(self._start + 1, h.count - 1)
+        while self._start > 0 and t - h.timestamps[h.index(self._start)] > self.window:
+            self._start -= 1
+
+        if t < self._blocked_until or self._start + 1 < MIN_WINDOW_FRAMES:
+            return None
+
+        gesto = self._classify(h.index(self._start), i, h.index(1), t)
+        if gesto is not None:
+            self.last_gesture = gesto
+            self._blocked_until = t + self.cooldown
+            self.reset()
+        return gesto
+
+    def _classify(self, i0: int, i1: int, iprev: int, t: float) -> Optional[str]:
+        h = self.history
+        dt = max(1e-3, t - h.timestamps[i0])
+        dx, dy = self._center[i1] - self._center[i0]
+
+        if abs(dx) >= SWIPE_MIN_DX and abs(dy) <= SWIPE_MAX_SLOPE * abs(dx) \
+                and abs(dx) / dt >= SWIPE_MIN_SPEED:
+            return "swipe_derecha" if dx > 0 else "swipe_izquierda"
+
+        if self._scale[i0] > 1e-4 and np.hypot(dx, dy) <= PUSH_MAX_DRIFT \
+                and self._scale[i1] / self._scale[i0] >= PUSH_MIN_SCALE:
+            return "push"
+
+        # Flick: velocidad instantánea de la punta respecto de la muñeca
+        step = max(1e-3, t - h.timestamps[iprev])
+        tip_speed = np.hypot(*(self._tip_rel[i1] - self._tip_rel[iprev])) / step
+        wrist_move = np.hypot(*(h.landmarks[i1, gestures.WRIST, :2]
+                                - h.landmarks[iprev, gestures.WRIST, :2]))
+        if tip_speed >= FLICK_MIN_SPEED and wrist_move <= FLICK_MAX_WRIST:
+            return "flick"
+        return None
@@ -3,154 +3,164 @@ from __future__ import annotations
 import cv2
 import time
 import sys
-import serial
 import mediapipe as mp
 
+import camera_hub
+import display
+import gesture_filter
+import gesture_history
+import gestures
+import hand_engine
+import metrics
+import preprocess
+import serial_link
+
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
-hands = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
+HANDS_CONFIG = hand_engine.HandConfig(max_num_hands=1, min_detection_confidence=0.7)
 
 GESTURE_DELAY = 1.0
 HAND_TIMEOUT = 2.0
 
-current_led_state = {"8": False, "3": False, "4": False}
-
 # ---- Config de ventana ----
 WINDOW_TITLE = "Control por Gestos"
 FULLSCREEN = False  # Desactivado para ventana tamaño fijo
 WIN_W, WIN_H = 960, 960  # Tamaño fijo ventana y captura
 
 DELAY_OK = 3.0  # Segundos que debe mantenerse el gesto OK para activar cambio
-
-def control_led(arduino: serial.Serial, estado: str, pin: str = "") -> None:
-    """Enciende (*estado == 'on'*) o apaga (*estado == 'off'*) LEDs por pin."""
-    global current_led_state
-    if estado == "on" and pin and not current_led_state.get(pin, False):
-        arduino.write(pin.encode())
-        current_led_state[pin] = True
+# Gesto dinámico que sale del modo al instante. No se usan swipes porque mover
+# la mano a izquierda/derecha ya controla los LEDs.
+GESTOS_SALIR = ("push",)
+
+def control_led(link: serial_link.SerialLink, estado: str, pin: str = "") -> None:
+    """Enciende (*estado == 'on'*) o apaga (*estado == 'off'*) LEDs por pin, sin bloquear."""
+    if estado == "on" and pin and pin not in link.desired:
+        link.set_leds(link.desired | {pin})
         print(f"💡 LED {pin} ON")
     elif estado == "off":
-        arduino.write(b"0")
-        current_led_state = {"8": False, "3": False, "4": False}
+        link.set_leds(())
         print("🔌 LEDs OFF")
 
-def detectar_posicion_mano(lm, w: int, h: int) -> str | None:
-    """Devuelve 'izquierda', 'derecha' o 'arriba' según la posición de la muñeca."""
-    wrist = lm.landmark[0]
-    x_px, y_px = wrist.x * w, wrist.y * h
-    if y_px < h * 0.25:
-        return "arriba"
-    if x_px < w * 0.33:
-        return "izquierda"
-    if x_px > w * 0.66:
-        return "derecha"
-    return None
-
-def detectar_gesto_ok(lm) -> bool:
-    thumb_tip = lm.landmark[4]
-    index_tip = lm.landmark[8]
-    dist = ((thumb_tip.x - index_tip.x) ** 2 + (thumb_tip.y - index_tip.y) ** 2) ** 0.5
-    return dist < 0.05
-
-def run(arduino: serial.Serial, camera_index: int = 0) -> None:
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
+def run(arduino: serial_link.SerialLink, camera_index: int = 0,
+        hub: camera_hub.CameraHub | None = None) -> None:
+    cap = camera_hub.open_capture(hub, camera_index, WIN_W, WIN_H)
+    if cap is None:
         print("❌ No se pudo abrir la cámara para Gestos")
         return
 
-    # Fijar resolución de captura
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIN_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, WIN_H)
+    hands = hand_engine.get(HANDS_CONFIG)
 
     # Crear ventana tamaño fijo
-    cv2.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
-    cv2.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
+    display.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
+    display.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
 
-    print("[ MODO GESTOS ] Cambia modo haciendo gesto OK (mantener 3s) | 'q' o ESC para salir")
+    print("[ MODO GESTOS ] Cambia modo empujando la mano hacia la cámara o con gesto OK "
+          "(mantener 3s) | 'q' o ESC para salir")
 
     last_position_time = 0.0
     last_hand_seen_time = 0.0
-    ok_gesture_start: float | None = None
+    dinamicos = gesture_history.DynamicGestureDetector()
+    suavizado = gesture_filter.OneEuroFilter()
+    ok_hold = gesture_filter.OkHold(DELAY_OK)
+    zona: str | None = None
+    prep = preprocess.Preprocessor(WIN_W, WIN_H)
 
     try:
         while True:
+            metrics.begin_frame()
             ok, frame = cap.read()
             if not ok:
                 break
+            metrics.lap("captura")
 
-            # Forzar tamaño del frame para mantener 960x960
-            frame = cv2.resize(frame, (WIN_W, WIN_H))
+            # Forzar tamaño del frame para mantener 960x960 (buffer reutilizado)
+            frame = prep(frame)
+            metrics.lap("preproceso")
 
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w = frame.shape[:2]
             t = time.time()
 
-            resultados = hands.process(rgb)
+            manos = hands.process(prep.views(frame))
+            metrics.lap("manos")
+            arr = gestures.to_array(manos)
+            t_mono = time.monotonic()
             hand_present = False
 
-            gesto_ok_detectado = False
+            # Push hacia la cámara: cambio de modo inmediato
+            if dinamicos.update(arr, t_mono) in GESTOS_SALIR:
+                print(f"✅ {dinamicos.last_gesture}, cambiando modo...")
+                break
+
+            # Gesto OK mantenido (suavizado + histéresis + debounce)
+            arr_suave = suavizado(arr, t_mono) if len(arr) else arr
+            ok_cumplido = ok_hold.update(arr_suave, t_mono, hands.confidence)
+            gesto_ok_detectado = ok_hold.pose.active
 
-            if resultados.multi_hand_landmarks:
+            if manos:
                 hand_present = True
                 last_hand_seen_time = t
-                for lm in resultados.multi_hand_landmarks:
+                for lm in manos:
                     mp_drawing.draw_landmarks(frame, lm, mp_hands.HAND_CONNECTIONS)
 
-                    # Detectar gesto OK para cambio modo
-                    if detectar_gesto_ok(lm):
-                        gesto_ok_detectado = True
-                        control_led(arduino, "on", "4")
-                        cv2.putText(frame, "👍 Gesto OK", (10, 90),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
-                    else:
-                        # Opcional: apagar LED 4 si no hay gesto OK en esta mano
-                        pass
-
-                    # Posición de muñeca rate-limited
-                    if t - last_position_time > GESTURE_DELAY:
-                        pos = detectar_posicion_mano(lm, w, h)
-                        if pos == "izquierda":
-                            control_led(arduino, "on", "8")
-                            last_position_time = t
-                        elif pos == "derecha":
-                            control_led(arduino, "on", "3")
-                            last_position_time = t
-                        elif pos == "arriba":
-                            control_led(arduino, "off")
-                            last_position_time = t
+                # Detectar gesto OK para cambio modo
+                if gesto_ok_detectado:
+                    control_led(arduino, "on", "4")
+                    cv2.putText(frame, "👍 Gesto OK", (10, 90),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
+
+                # Zona de la muñeca (con histéresis en los bordes)
+                wrist = arr_suave[0, gestures.WRIST]
+                zona = gesture_filter.zona_estable(zona, float(wrist[0]), float(wrist[1]))
+
+                # Posición de muñeca rate-limited
+                if t - last_position_time > GESTURE_DELAY:
+                    if zona == "izquierda":
+                        control_led(arduino, "on", "8")
+                        last_position_time = t
+                    elif zona == "derecha":
+                        control_led(arduino, "on", "3")
+                        last_position_time = t
+                    elif zona == "arriba":
+                        control_led(arduino, "off")
+                        last_position_time = t
+            else:
+                zona = None
+                suavizado.reset()  # la próxima mano no se suaviza contra esta pose vieja
 
             # Control apagado LED 4 tras timeout si mano desaparece
-            if not hand_present and current_led_state.get("4", False):
+            if not hand_present and "4" in arduino.desired:
                 if t - last_hand_seen_time > HAND_TIMEOUT:
                     control_led(arduino, "off")
 
             # Manejo del temporizador para gesto OK mantenido
-            if gesto_ok_detectado:
-                if ok_gesture_start is None:
-                    ok_gesture_start = t
-                else:
-                    tiempo_mantener = t - ok_gesture_start
-                    tiempo_restante = int(DELAY_OK - tiempo_mantener + 1)
-                    cv2.putText(frame, f"Cambiar modo en: {tiempo_restante}s",
-                                (10, 130), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                    if tiempo_mantener >= DELAY_OK:
-                        print("✅ Gesto OK mantenido, cambiando modo...")
-                        break
-            else:
-                ok_gesture_start = None
+            if ok_cumplido:
+                print("✅ Gesto OK mantenido, cambiando modo...")
+                break
+            if ok_hold.active:
+                tiempo_restante = int(ok_hold.remaining + 1)
+                cv2.putText(frame, f"Cambiar modo en: {tiempo_restante}s",
+                            (10, 130), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+
+            metrics.lap("gestos")
 
             # HUD
             cv2.putText(frame, "C O N T R O L   P O R   G E S T O S", (10, 30),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 200, 255), 2)
             cv2.putText(frame, "q/ESC: salir", (10, 60),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.6, (220, 220, 220), 1)
-
-            cv2.imshow(WINDOW_TITLE, frame)
-            key = cv2.waitKey(1) & 0xFF
+            if not arduino.connected:
+                cv2.putText(frame, "Arduino desconectado", (10, WIN_H - 20),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+            metrics.lap("dibujo")
+            metrics.draw_hud(frame)
+
+            display.imshow(WINDOW_TITLE, frame)
+            key = display.waitKey(1) & 0xFF
+            metrics.lap("display")
+            metrics.end_frame()
             if key in (27, ord("q")):
                 sys.exit(0)
 
     finally:
         cap.release()
-        cv2.destroyAllWindows()
+        display.destroyAllWindows()
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import cv2
+import secrets
 import sys
 import time
-import random
 import numpy as np
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, List, Tuple, Optional
+from typing import Deque, Dict, List, Tuple, Optional
 
 import mediapipe as mp
 
+import camera_hub
+import display
+import gesture_filter
+import gestures
+import hand_engine
+import metrics
+import preprocess
+import tip_tracker
+import trail_log
+
 WINDOW_TITLE = "MiniJuego: Slice the Squares (r: reiniciar, q/ESC: salir)"
 
 # Tamaño deseado de la ventana de juego (se reescala el frame de cámara a esto)
@@ -38,8 +48,10 @@ CUT_COOLDOWN = 0.06
 SQUARE_COLOR = (60, 170, 255)
 SQUARE_CUT_COLOR = (60, 255, 160)
 SQUARE_ALPHA = 0.35
+SQUARE_CUT_ALPHA = 0.15
 TRAIL_COLOR = (40, 220, 255)
 HUD_COLOR = (255, 255, 255)
+BATCH_MIN = 64  # desde cuántos cuadros de un color conviene una sola mezcla
 
 # —— NUEVO: tiempo de partida ——
 GAME_DURATION = 30.0          # segundos
@@ -48,112 +60,348 @@ POST_GAME_WAIT = 3.0          # segundos para mostrar mensaje final
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
-Point = Tuple[int, int]
+HANDS_CONFIG = hand_engine.HandConfig(
+    max_num_hands=1,
+    model_complexity=1,
+    min_detection_confidence=0.7,
+    min_tracking_confidence=0.8,
+)
 
-def detectar_gesto_ok(lm) -> bool:
-    thumb_tip = lm.landmark[4]
-    index_tip = lm.landmark[8]
-    dist = ((thumb_tip.x - index_tip.x) ** 2 + (thumb_tip.y - index_tip.y) ** 2) ** 0.5
-    return dist < 0.05
+Point = Tuple[int, int]
 
 # (Funciones auxiliares para intersecciones y dibujado)
 
-def _ccw(a: Point, b: Point, c: Point) -> int:
-    return (b[0]-a[0])*(c[1]-a[1]) - (b[1]-a[1])*(c[0]-a[0])
-
-def _on_segment(a: Point, b: Point, p: Point) -> bool:
-    return min(a[0], b[0]) <= p[0] <= max(a[0], b[0]) and \
-           min(a[1], b[1]) <= p[1] <= max(a[1], b[1])
-
-def _segments_intersect(p1: Point, p2: Point, q1: Point, q2: Point) -> bool:
-    d1 = _ccw(p1, p2, q1)
-    d2 = _ccw(p1, p2, q2)
-    d3 = _ccw(q1, q2, p1)
-    d4 = _ccw(q1, q2, p2)
-    if (d1 == 0 and _on_segment(p1, p2, q1)) or \
-       (d2 == 0 and _on_segment(p1, p2, q2)) or \
-       (d3 == 0 and _on_segment(q1, q2, p1)) or \
-       (d4 == 0 and _on_segment(q1, q2, p2)):
-        return True
-    return (d1 > 0) != (d2 > 0) and (d3 > 0) != (d4 > 0)
+def segment_hits_rects(p1: Point, p2: Point, rects: np.ndarray) -> np.ndarray:
+    """
+    Máscara (N,) de los rectángulos (x, y, w, h) que toca el segmento p1-p2,
+    bordes incluidos. Liang–Barsky contra todos a la vez: el segmento es el
+    mismo para todos, así que cada borde es una sola operación vectorial.
+    """
+    r = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    x0, y0 = float(p1[0]), float(p1[1])
+    dx, dy = float(p2[0]) - x0, float(p2[1]) - y0
+    t_in = np.zeros(len(r))
+    t_out = np.ones(len(r))
+    inside = np.ones(len(r), dtype=bool)
+    for p, q in ((-dx, x0 - r[:, 0]), (dx, r[:, 0] + r[:, 2] - x0),
+                 (-dy, y0 - r[:, 1]), (dy, r[:, 1] + r[:, 3] - y0)):
+        if p == 0:
+            inside &= q >= 0     # paralelo a este borde: tiene que estar del lado de adentro
+        elif p < 0:
+            np.maximum(t_in, q / p, out=t_in)
+        else:
+            np.minimum(t_out, q / p, out=t_out)
+    return inside & (t_in <= t_out)
 
 def segment_intersects_rect(p1: Point, p2: Point, rect: Tuple[int,int,int,int]) -> bool:
-    x, y, w, h = rect
-    if x <= p1[0] <= x+w and y <= p1[1] <= y+h: return True
-    if x <= p2[0] <= x+w and y <= p2[1] <= y+h: return True
-    corners = [(x,y), (x+w,y), (x+w,y+h), (x,y+h)]
-    edges = [(corners[i], corners[(i+1)%4]) for i in range(4)]
-    for a,b in edges:
-        if _segments_intersect(p1, p2, a, b):
-            return True
-    return False
+    return bool(segment_hits_rects(p1, p2, np.asarray(rect))[0])
 
 def draw_filled_rect_alpha(frame: np.ndarray, rect: Tuple[int,int,int,int],
                            color_bgr: Tuple[int,int,int], alpha: float):
+    """Mezcla un rectángulo relleno sólo sobre su recorte del frame, en el lugar."""
     x, y, w, h = rect
     x0, y0 = max(0, x), max(0, y)
-    x1, y1 = min(frame.shape[1], x + w), min(frame.shape[0], y + h)
+    x1, y1 = min(frame.shape[1], x + w + 1), min(frame.shape[0], y + h + 1)
     if x0 >= x1 or y0 >= y1:
         return
-    overlay = frame.copy()
-    cv2.rectangle(overlay, (x0, y0), (x1, y1), color_bgr, thickness=-1)
-    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, dst=frame)
+    roi = frame[y0:y1, x0:x1]
+    overlay = np.empty_like(roi)
+    overlay[:] = color_bgr
+    cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, dst=roi)
+
+class SquareRenderer:
+    """
+    Relleno semitransparente de muchos cuadros sin copiar el frame por cuadro.
+    Con pocos cuadros mezcla cada recorte en el lugar contra un fondo sólido
+    cacheado. Desde BATCH_MIN arma la cobertura de todos los de un mismo color
+    de una vez (imagen integral de las esquinas: costo fijo, no por cuadro)
+    y mezcla una sola vez dentro del rectángulo que los contiene. En el modo por
+    lotes los solapados no se oscurecen dos veces.
+    """
 
-@dataclass
-class Square:
-    x: float
-    y: float
-    size: int
-    vy: float
-    alive: bool = True
-    last_cut_time: float = 0.0
+    def __init__(self):
+        self._solids: Dict[Tuple[int,int,int], np.ndarray] = {}
+        self._layer: Optional[np.ndarray] = None
+        self._corners: Optional[np.ndarray] = None
+
+    def _solid(self, color: Tuple[int,int,int], shape: Tuple[int, ...]) -> np.ndarray:
+        solid = self._solids.get(color)
+        if solid is None or solid.shape != shape:
+            solid = self._solids[color] = np.empty(shape, dtype=np.uint8)
+            solid[:] = color
+        return solid
+
+    def fill(self, frame: np.ndarray, rects, color: Tuple[int,int,int], alpha: float) -> None:
+        """Mezcla *rects* ((N, 4) o lista de (x, y, w, h)) rellenos de *color* con opacidad *alpha*."""
+        r = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+        fh, fw = frame.shape[:2]
+        # Igual que cv2.rectangle: el borde derecho/inferior está incluido
+        x0 = np.maximum(r[:, 0], 0)
+        y0 = np.maximum(r[:, 1], 0)
+        x1 = np.minimum(r[:, 0] + r[:, 2] + 1, fw)
+        y1 = np.minimum(r[:, 1] + r[:, 3] + 1, fh)
+        keep = (x0 < x1) & (y0 < y1)
+        if not keep.any():
+            return
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+        solid = self._solid(color, frame.shape)
 
-    def rect(self) -> Tuple[int,int,int,int]:
-        return int(self.x), int(self.y), self.size, self.size
+        if len(x0) < BATCH_MIN:
+            for bx0, by0, bx1, by1 in zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()):
+                roi = frame[by0:by1, bx0:bx1]
+                cv2.addWeighted(solid[by0:by1, bx0:bx1], alpha, roi, 1 - alpha, 0, dst=roi)
+            return
 
-    def update(self, dt: float):
-        self.y += self.vy * dt
+        ux0, uy0, ux1, uy1 = int(x0.min()), int(y0.min()), int(x1.max()), int(y1.max())
+        h, w = uy1 - uy0, ux1 - ux0
+        # Cobertura: +1/-1 en las cuatro esquinas de cada cuadro y la imagen
+        # integral (suma acumulada 2D) da cuántos cuadros cubren cada píxel
+        self._corners = preprocess.ensure(self._corners, (fh, fw), np.float32)
+        corners = self._corners[:h, :w]
+        corners.fill(0)
+        x0, x1, y0, y1 = x0 - ux0, x1 - ux0, y0 - uy0, y1 - uy0
+        in_x, in_y = x1 < w, y1 < h     # esquinas sobre el borde: quedan fuera
+        np.add.at(corners, (y0, x0), 1)
+        np.add.at(corners, (y0[in_x], x1[in_x]), -1)
+        np.add.at(corners, (y1[in_y], x0[in_y]), -1)
+        np.add.at(corners, (y1[in_x & in_y], x1[in_x & in_y]), 1)
+        cover = cv2.integral(corners, sdepth=cv2.CV_32F)[1:, 1:]
+        mask = cv2.compare(cover, 0.5, cv2.CMP_GT)
+
+        roi = frame[uy0:uy1, ux0:ux1]
+        self._layer = preprocess.ensure(self._layer, frame.shape)
+        blended = self._layer[uy0:uy1, ux0:ux1]
+        cv2.addWeighted(solid[uy0:uy1, ux0:ux1], alpha, roi, 1 - alpha, 0, dst=blended)
+        cv2.copyTo(blended, mask, roi)
+
+    def outline(self, frame: np.ndarray, rects, color: Tuple[int,int,int], thickness: int) -> None:
+        """Bordes de todos los *rects* en una sola llamada a cv2.polylines."""
+        r = np.asarray(rects, dtype=np.int32).reshape(-1, 4)
+        if not len(r):
+            return
+        x0, y0 = r[:, 0], r[:, 1]
+        x1, y1 = x0 + r[:, 2], y0 + r[:, 3]
+        corners = np.stack((np.stack((x0, y0), 1), np.stack((x1, y0), 1),
+                            np.stack((x1, y1), 1), np.stack((x0, y1), 1)), axis=1)
+        cv2.polylines(frame, list(corners), True, color, thickness)
+
+class SquareStore:
+    """
+    Cuadros en arreglos paralelos (struct-of-arrays): los n primeros lugares de
+    x, y, size, vy, alive y last_cut son los cuadros en juego (prev_y es la y
+    del paso anterior, para interpolar el dibujo). Actualizar, cortar
+    y dibujar son operaciones sobre arreglos, sin un objeto por cuadro.
+
+    La capacidad es fija: es el tope de cuadros en juego. Los lugares que se
+    liberan (cortados, fuera de pantalla) se reusan para los nuevos y los
+    arreglos no se vuelven a asignar en toda la partida.
+    """
+
+    def __init__(self, capacity: int):
+        self.n = 0
+        self.dropped = 0        # cuadros que no entraron por el tope
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.prev_y = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.vy = np.zeros(capacity, dtype=np.float64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.last_cut = np.zeros(capacity, dtype=np.float64)
+
+    _FIELDS = ("x", "y", "prev_y", "size", "vy", "alive", "last_cut")
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def clear(self) -> None:
+        self.n = 0
+        self.dropped = 0
+
+    def add(self, x: np.ndarray, y: np.ndarray, size: np.ndarray, vy: np.ndarray) -> int:
+        """Ocupa lugares libres con los cuadros dados; devuelve cuántos entraron."""
+        k = min(len(x), self.capacity - self.n)
+        self.dropped += len(x) - k
+        i = slice(self.n, self.n + k)
+        self.x[i], self.y[i], self.size[i], self.vy[i] = x[:k], y[:k], size[:k], vy[:k]
+        self.prev_y[i] = self.y[i]
+        self.alive[i] = True
+        self.last_cut[i] = 0.0
+        self.n += k
+        return k
+
+    def step(self, dt: float) -> None:
+        n = self.n
+        self.prev_y[:n] = self.y[:n]
+        self.y[:n] += self.vy[:n] * dt
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Compacta: se quedan (en orden) sólo los cuadros con mask True."""
+        if mask.all():
+            return
+        idx = np.flatnonzero(mask)
+        for name in self._FIELDS:
+            arr = getattr(self, name)
+            arr[:len(idx)] = arr[idx]
+        self.n = len(idx)
+
+    def rects(self, alpha: float = 1.0) -> np.ndarray:
+        """
+        (n, 4) int32 con (x, y, lado, lado), como el int() del dibujo. Con
+        *alpha* < 1 la y se interpola entre el paso anterior y el actual.
+        """
+        n = self.n
+        out = np.empty((n, 4), dtype=np.int32)
+        out[:, 0] = self.x[:n]
+        if alpha >= 1.0:
+            out[:, 1] = self.y[:n]
+        else:
+            out[:, 1] = self.prev_y[:n] + (self.y[:n] - self.prev_y[:n]) * alpha
+        out[:, 2] = out[:, 3] = self.size[:n]
+        return out
+
+@dataclass(frozen=True)
+class Dificultad:
+    spawn_every: float          # segundos entre cuadros nuevos
+    speed_min: float
+    speed_max: float
+    size_min: int
+    size_max: int
+    max_squares: int            # tope de cuadros en juego (capacidad del pool)
+
+DIFICULTADES = {
+    "normal": Dificultad(SPAWN_EVERY, SPEED_MIN, SPEED_MAX, SIZE_MIN, SIZE_MAX, 32),
+    # Lluvia de cuadros chicos: miles en pantalla a la vez
+    "caos": Dificultad(0.004, 60, 160, 14, 36, 4000),
+}
+SPAWN_BURST = 64    # máximo de cuadros nuevos en un mismo paso
+
+# Simulación de paso fijo: el juego avanza siempre de a SIM_DT, sin importar
+# cuánto tardó el frame (un frame lento de inferencia no cambia la física).
+# Con la semilla y la entrada grabada (trail_log) una partida se repite igual.
+SIM_DT = 1.0 / 60.0
+MAX_STEPS = 5       # pasos máximos por frame: tras un frame muy lento el juego se frena
 
 class Game:
-    def __init__(self):
+    def __init__(self, dificultad: str = "normal", seed: Optional[int] = None):
+        self.nombre = dificultad
+        self.dificultad = DIFICULTADES[dificultad]
+        self.seed = secrets.randbits(32) if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+        self.squares = SquareStore(self.dificultad.max_squares)
+        self.trail: Deque[Tuple[int,int,float]] = deque(maxlen=TRAIL_MAXLEN)
+        self.tracker = tip_tracker.TipTracker(self.trail)
         self.reset()
 
     def reset(self):
-        self.squares: List[Square] = []
+        self.squares.clear()
         self.score = 0
-        self.last_spawn = 0.0
-        self.trail: Deque[Tuple[int,int,float]] = deque(maxlen=TRAIL_MAXLEN)
-
-    def spawn_square(self, now: float):
-        size = random.randint(SIZE_MIN, SIZE_MAX)
-        x = random.randint(0, max(0, WIN_W - size))
+        self.steps = 0
+        self._acc = 0.0
+        self.last_spawn = -self.dificultad.spawn_every   # el primer paso ya suelta uno
+        self.prev_tip: Optional[Tuple[int,int,float]] = None
+        self.trail.clear()
+        self.tracker.reset()
+
+    @property
+    def t(self) -> float:
+        """Tiempo de simulación (pasos fijos dados)."""
+        return self.steps * SIM_DT
+
+    @property
+    def clock(self) -> float:
+        """Tiempo de juego "ahora": la simulación más lo acumulado para el próximo paso."""
+        return self.t + self._acc
+
+    def spawn_squares(self, count: int):
+        d = self.dificultad
+        size = self.rng.integers(d.size_min, d.size_max + 1, count)
+        x = (self.rng.random(count) * (np.maximum(0, WIN_W - size) + 1)).astype(np.int32)
         y = -size - 8
-        vy = random.uniform(SPEED_MIN, SPEED_MAX)
-        self.squares.append(Square(x=x, y=y, size=size, vy=vy))
-        self.last_spawn = now
-
-    def update(self, dt: float, now: float):
-        if (now - self.last_spawn) >= SPAWN_EVERY:
-            self.spawn_square(now)
-        for sq in self.squares:
-            sq.update(dt)
-        self.squares = [s for s in self.squares if (s.y <= WIN_H + 2 and s.alive) or s.alive]
+        vy = self.rng.uniform(d.speed_min, d.speed_max, count)
+        self.squares.add(x, y, size, vy)
+
+    def step(self):
+        """Un paso de SIM_DT: soltar cuadros, moverlos y sacar los que salieron de juego."""
+        every = self.dificultad.spawn_every
+        due = int((self.t - self.last_spawn) // every)
+        if due > 0:
+            self.spawn_squares(min(due, SPAWN_BURST))
+            self.last_spawn += due * every
+        sq = self.squares
+        sq.step(SIM_DT)
+        # Fuera de juego: cortados (ya se dibujaron un frame) y los que salieron por abajo
+        sq.keep(sq.alive[:sq.n] & (sq.y[:sq.n] <= WIN_H + 2))
+        self.steps += 1
+
+    def advance(self, dt: float) -> float:
+        """
+        Avanza *dt* segundos de reloj en pasos fijos. Devuelve qué fracción del
+        paso siguiente ya pasó (0..1), para interpolar el dibujo con rects(alpha).
+        """
+        self._acc += dt
+        for _ in range(MAX_STEPS):
+            if self._acc < SIM_DT:
+                break
+            self.step()
+            self._acc -= SIM_DT
+        else:
+            self._acc %= SIM_DT     # atraso que no se recupera: se descarta
+        return self._acc / SIM_DT
+
+    def apply_tip(self, tip: Optional[Point], latency: float = 0.0):
+        """
+        Entrada de un frame: la punta del índice en píxeles (o None sin mano) y
+        cuánto hace que se capturó el frame del que sale (*latency*, s).
+        """
+        if tip is None:
+            # La estela es del trazo actual: sin mano, el próximo arranca de cero
+            self.prev_tip = None
+            self.trail.clear()
+            return
+        now = self.clock
+        self.register_trail_point(tip[0], tip[1], now)
+        self.tracker.update_latency(latency)
+        if self.prev_tip:
+            p1 = (self.prev_tip[0], self.prev_tip[1])
+            seg_dt = max(1e-3, now - self.prev_tip[2])
+            dx = tip[0] - p1[0]
+            dy = tip[1] - p1[1]
+            seg_speed = (dx*dx + dy*dy) ** 0.5 / seg_dt
+            if (abs(dx) + abs(dy)) >= MIN_MOVE_PIX:
+                # Recorrido curvo entre muestras + lo que se movió durante la latencia
+                self.try_slice_with_path(self.tracker.path(), seg_speed, now)
+        self.prev_tip = (tip[0], tip[1], now)
 
     def register_trail_point(self, x: int, y: int, t: float):
         self.trail.append((x, y, t))
 
     def try_slice_with_segment(self, p1: Point, p2: Point, seg_speed: float, now: float):
+        self.try_slice_with_path(np.array((p1, p2)), seg_speed, now)
+
+    def try_slice_with_path(self, points: np.ndarray, seg_speed: float, now: float):
+        """Corta los cuadros que toca la poligonal *points* (M, 2)."""
         if seg_speed < SPEED_GATE:
             return
-        for sq in self.squares:
-            if not sq.alive:
-                continue
-            if (now - sq.last_cut_time) < CUT_COOLDOWN:
-                continue
-            if segment_intersects_rect(p1, p2, sq.rect()):
-                sq.alive = False
-                sq.last_cut_time = now
-                self.score += CUT_SCORE
+        sq = self.squares
+        n = sq.n
+        candidates = sq.alive[:n] & ((now - sq.last_cut[:n]) >= CUT_COOLDOWN)
+        if not candidates.any():
+            return
+        rects = sq.rects()
+        if len(points) == 1:
+            hit = segment_hits_rects(points[0], points[0], rects)
+        else:
+            hit = np.zeros(n, dtype=bool)
+            for p1, p2 in zip(points[:-1], points[1:]):
+                hit |= segment_hits_rects(p1, p2, rects)
+        hit &= candidates
+        sq.alive[:n][hit] = False
+        sq.last_cut[:n][hit] = now
+        self.score += CUT_SCORE * int(hit.sum())
 
 def _draw_centered_big_text(frame, text: str, scale=1.4, thickness=3,
                             color=(255,255,255), shadow=(0,0,0)):
@@ -171,126 +419,106 @@ def _format_mmss(seconds_left: float) -> str:
     s = seconds_left % 60
     return f"{m:01d}:{s:02d}"
 
-def run(camera_index: int = 0) -> None:
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
+def run(camera_index: int = 0, hub: Optional[camera_hub.CameraHub] = None,
+        dificultad: str = "normal", grabar: Optional[str] = None) -> None:
+    """*grabar*: ruta donde guardar la entrada de la partida (trail_log) para repetirla."""
+    cap = camera_hub.open_capture(hub, camera_index, WIN_W, WIN_H)
+    if cap is None:
         print("❌ No se pudo abrir la cámara para el mini-juego")
         return
 
-    # Fijar resolución de captura
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIN_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, WIN_H)
-
     # Ventana tamaño fijo
-    cv2.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
-    cv2.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
+    display.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
+    display.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
 
-    hands = mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=1,
-        model_complexity=1,
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.8,
-    )
+    hands = hand_engine.get(HANDS_CONFIG, allow_worker=True)
 
-    game = Game()
-    prev_tip: Optional[Tuple[int,int,float]] = None
+    game = Game(dificultad)
+    recorder = trail_log.TrailWriter(grabar, game.seed, dificultad) if grabar else None
 
     # Gesto OK para volver
     DELAY_OK = 3.0
-    ok_gesture_start: float | None = None
-
-    # —— NUEVO: temporizador de partida ——
-    game_start_time = time.time()
+    suavizado = gesture_filter.OneEuroFilter()
+    ok_hold = gesture_filter.OkHold(DELAY_OK)
 
     print("[ MiniJuego ] Corta los cuadros moviendo tu mano sobre ellos")
     print("Controles: gesto OK (mantener 3s) para volver")
 
+    prep = preprocess.Preprocessor(WIN_W, WIN_H, mirror=MIRROR, crop=True)  # 16:9 sin estirar
+    renderer = SquareRenderer()
     last_time = time.time()
     try:
         while True:
-            ok, frame = cap.read()
-            if not ok:
+            metrics.begin_frame()
+            captura = cap.read_frame()
+            if captura is None:
                 break
+            metrics.lap("captura")
 
-            if MIRROR:
-                frame = cv2.flip(frame, 1)
-
-            frame = cv2.resize(frame, (WIN_W, WIN_H))
+            frame = prep(captura.image)     # espejo + resize en una pasada, sin asignar
+            metrics.lap("preproceso")
 
             now = time.time()
             dt = max(1e-3, now - last_time)
             last_time = now
 
-            # Tiempo restante
-            elapsed_game = now - game_start_time
-            time_left = GAME_DURATION - elapsed_game
+            # Tiempo restante (reloj del juego: se frena junto con la simulación)
+            time_left = GAME_DURATION - game.clock
 
             # Mano
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = hands.process(rgb)
+            manos = hands.process(prep.views(frame))
+            metrics.lap("manos")
             tip_xy: Optional[Tuple[int,int]] = None
+            arr = gestures.to_array(manos[:1])
 
-            gesto_ok_detectado = False
-
-            if res.multi_hand_landmarks:
-                lms = res.multi_hand_landmarks[0]
+            if manos:
+                lms = manos[0]
                 mp_drawing.draw_landmarks(frame, lms, mp_hands.HAND_CONNECTIONS)
-                tip = lms.landmark[8]
-                x_px = int(tip.x * WIN_W)
-                y_px = int(tip.y * WIN_H)
+                # La punta del índice va sin suavizar: para cortar importa la latencia
+                tip = arr[0, gestures.INDEX_TIP]
+                x_px = int(tip[0] * WIN_W)
+                y_px = int(tip[1] * WIN_H)
                 tip_xy = (x_px, y_px)
 
-                if detectar_gesto_ok(lms):
-                    gesto_ok_detectado = True
+            arr_suave = suavizado(arr, now) if len(arr) else arr
+            ok_cumplido = ok_hold.update(arr_suave, now, hands.confidence)
+            metrics.lap("gestos")
 
-            # Update juego solo si queda tiempo
+            # Update juego solo si queda tiempo: pasos fijos + la entrada del frame
+            alpha = 1.0
             if time_left > 0:
-                game.update(dt, now)
-
-                if tip_xy:
-                    game.register_trail_point(tip_xy[0], tip_xy[1], now)
-                    if prev_tip:
-                        p1 = (prev_tip[0], prev_tip[1])
-                        p2 = (tip_xy[0], tip_xy[1])
-                        seg_dt = max(1e-3, now - prev_tip[2])
-                        dx = p2[0] - p1[0]
-                        dy = p2[1] - p1[1]
-                        seg_speed = (dx*dx + dy*dy) ** 0.5 / seg_dt
-                        if (abs(dx) + abs(dy)) >= MIN_MOVE_PIX:
-                            game.try_slice_with_segment(p1, p2, seg_speed, now)
-                    prev_tip = (tip_xy[0], tip_xy[1], now)
-                else:
-                    prev_tip = None
+                alpha = game.advance(dt)
+                # Latencia real de esta muestra: desde la captura hasta ahora
+                latencia = time.monotonic() - captura.timestamp
+                game.apply_tip(tip_xy, latencia)
+                if recorder:
+                    recorder.frame(dt, tip_xy, latencia)
+            metrics.lap("juego")
 
             # Gesto OK para volver (cuenta regresiva en pantalla)
-            if gesto_ok_detectado:
-                if ok_gesture_start is None:
-                    ok_gesture_start = now
-                else:
-                    tiempo_mantener = now - ok_gesture_start
-                    tiempo_restante = int(DELAY_OK - tiempo_mantener + 1)
-                    cv2.putText(frame, f"Volver en: {tiempo_restante}s",
-                                (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                    if tiempo_mantener >= DELAY_OK:
-                        print("✅ Gesto OK mantenido, volviendo...")
-                        break
-            else:
-                ok_gesture_start = None
+            if ok_cumplido:
+                print("✅ Gesto OK mantenido, volviendo...")
+                break
+            if ok_hold.active:
+                tiempo_restante = int(ok_hold.remaining + 1)
+                cv2.putText(frame, f"Volver en: {tiempo_restante}s",
+                            (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
 
             # Render de cuadros
-            for sq in game.squares:
-                x, y, w, h = sq.rect()
-                color = SQUARE_COLOR if sq.alive else SQUARE_CUT_COLOR
-                draw_filled_rect_alpha(frame, (x, y, w, h), color, SQUARE_ALPHA if sq.alive else 0.15)
-                cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+            rects = game.squares.rects(alpha)
+            vivos = game.squares.alive[:len(rects)]
+            renderer.fill(frame, rects[vivos], SQUARE_COLOR, SQUARE_ALPHA)
+            renderer.fill(frame, rects[~vivos], SQUARE_CUT_COLOR, SQUARE_CUT_ALPHA)
+            renderer.outline(frame, rects[vivos], SQUARE_COLOR, 2)
+            renderer.outline(frame, rects[~vivos], SQUARE_CUT_COLOR, 2)
 
             # Estela del índice
             pts = [(x, y) for (x, y, t) in game.trail]
             for i in range(1, len(pts)):
                 cv2.line(frame, pts[i-1], pts[i], TRAIL_COLOR, 2)
             if tip_xy:
-                cv2.circle(frame, tip_xy, 6, (0, 255, 255), -1)
+                # Donde se estima que está la punta ahora (compensando la latencia)
+                cv2.circle(frame, game.tracker.predicted or tip_xy, 6, (0, 255, 255), -1)
 
             # HUD: puntaje + tiempo restante MM:SS
             cv2.putText(frame, f"Puntaje: {game.score}", (10, 30),
@@ -303,9 +531,7 @@ def run(camera_index: int = 0) -> None:
             # Si el tiempo terminó, mostrar mensaje final 3s y volver al menú
             if time_left <= 0:
                 # Overlay oscurecido
-                overlay = frame.copy()
-                overlay[:] = (0, 0, 0)
-                cv2.addWeighted(overlay, 0.55, frame, 0.45, 0, frame)
+                cv2.convertScaleAbs(frame, dst=frame, alpha=0.45)   # oscurecer en el lugar
                 _draw_centered_big_text(frame, "Tiempo terminado!", scale=1.6, thickness=4)
                 cv2.putText(frame, f"Tu puntaje: {game.score}",
                             (WIN_W//2 - 150, WIN_H//2 + 50),
@@ -313,23 +539,29 @@ def run(camera_index: int = 0) -> None:
                 cv2.putText(frame, "Volviendo al menu...",
                             (WIN_W//2 - 150, WIN_H//2 + 90),
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (220,220,220), 2)
-                cv2.imshow(WINDOW_TITLE, frame)
-                cv2.waitKey(int(POST_GAME_WAIT * 1000))
+                display.imshow(WINDOW_TITLE, frame)
+                display.waitKey(int(POST_GAME_WAIT * 1000))
                 break
 
-            cv2.imshow(WINDOW_TITLE, frame)
+            metrics.lap("dibujo")
+            metrics.draw_hud(frame)
+            display.imshow(WINDOW_TITLE, frame)
 
-            key = cv2.waitKey(1) & 0xFF
+            key = display.waitKey(1) & 0xFF
+            metrics.lap("display")
+            metrics.end_frame()
             if key in (27, ord('q')):
                 cap.release()
-                cv2.destroyAllWindows()
+                display.destroyAllWindows()
                 sys.exit(0)
             if key == ord('r'):
-                game.reset()
-                prev_tip = None
-                # Reiniciar también el temporizador de partida
-                game_start_time = time.time()
+                game.reset()    # también reinicia el reloj de la partida
+                if recorder:
+                    recorder.reset()
 
     finally:
+        if recorder:
+            recorder.close()
+            print(f"💾 Partida grabada en {recorder.path} ({recorder.frames} frames, semilla {game.seed})")
         cap.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+        display.destroyAllWindows()
\ No newline at end of file
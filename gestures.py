@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+# Motor de gestos: cada resultado de MediaPipe se convierte una sola vez en un
+# array (manos, 21, 3) y los clasificadores registrados lo evalúan vectorizado,
+# todas las manos a la vez.
+
+N_LANDMARKS = 21
+
+WRIST = 0
+THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, PINKY_TIP = 4, 8, 12, 16, 20
+FINGER_TIPS = np.array([4, 8, 12, 16, 20])
+FINGER_PIPS = np.array([3, 6, 10, 14, 18])   # para el pulgar, la articulación IP
+INDEX_MCP = 5
+
+OK_MAX_DIST = 0.05          # distancia pulgar-índice (normalizada) para el gesto OK
+
+# Zonas de la muñeca (modo gestos), en coordenadas normalizadas
+ZONA_ARRIBA_Y = 0.25
+ZONA_IZQUIERDA_X = 0.33
+ZONA_DERECHA_X = 0.66
+
+Classifier = Callable[[np.ndarray], np.ndarray]
+GESTOS: Dict[str, Classifier] = {}
+
+
+def registrar(nombre: str) -> Callable[[Classifier], Classifier]:
+    """Registra un clasificador: recibe (manos, 21, 3) y devuelve un valor por mano."""
+    def deco(fn: Classifier) -> Classifier:
+        GESTOS[nombre] = fn
+        return fn
+    return deco
+
+
+def to_array(manos: Sequence, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convierte una lista de NormalizedLandmarkList en un array float32 (manos, 21, 3)."""
+    n = len(manos)
+    if out is None or out.shape[0] < n:
+        out = np.empty((n, N_LANDMARKS, 3), dtype=np.float32)
+    arr = out[:n]
+    for i, lm in enumerate(manos):
+        arr[i] = [(p.x, p.y, p.z) for p in lm.landmark]
+    return arr
+
+
+def evaluar(arr: np.ndarray, nombres: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """Evalúa los clasificadores registrados (o sólo *nombres*) sobre todas las manos."""
+    nombres = GESTOS.keys() if nombres is None else nombres
+    return {nombre: GESTOS[nombre](arr) for nombre in nombres}
+
+
+@registrar("ok")
+def _ok(arr: np.ndarray) -> np.ndarray:
+    """Pulgar e índice juntos (dist 2D < OK_MAX_DIST)."""
+    d = arr[:, THUMB_TIP, :2] - arr[:, INDEX_TIP, :2]
+    return np.einsum("ij,ij->i", d, d) < OK_MAX_DIST * OK_MAX_DIST
+
+
+@registrar("puno")
+def _puno(arr: np.ndarray) -> np.ndarray:
+    """Puño cerrado: las puntas de índice a meñique por debajo de su articulación media."""
+    return np.all(arr[:, FINGER_TIPS[1:], 1] >= arr[:, FINGER_PIPS[1:], 1], axis=1)
+
+
+@registrar("zona_muneca")
+def _zona_muneca(arr: np.ndarray) -> np.ndarray:
+    """'arriba', 'izquierda', 'derecha' o '' según la posición de la muñeca."""
+    x, y = arr[:, WRIST, 0], arr[:, WRIST, 1]
+    return np.select(
+        [y < ZONA_ARRIBA_Y, x < ZONA_IZQUIERDA_X, x > ZONA_DERECHA_X],
+        ["arriba", "izquierda", "derecha"],
+        default="",
+    )
+
+
+@registrar("cuadrante")
+def _cuadrante(arr: np.ndarray) -> np.ndarray:
+    """Cuadrante de la muñeca: 'TL', 'TR', 'BL' o 'BR'."""
+    left = arr[:, WRIST, 0] < 0.5
+    top = arr[:, WRIST, 1] < 0.5
+    return np.where(top, np.where(left, "TL", "TR"), np.where(left, "BL", "BR"))
+
+
+@registrar("dedos")
+def _dedos(arr: np.ndarray) -> np.ndarray:
+    """
+    (manos, 5) bool: dedo extendido (pulgar..meñique). Un dedo está extendido si
+    la punta queda más lejos de la base que su articulación media; para el
+    pulgar la referencia es la base del índice.
+    """
+    ref = np.repeat(arr[:, WRIST:WRIST + 1, :2], 5, axis=1)
+    ref[:, 0] = arr[:, INDEX_MCP, :2]
+    tip = np.linalg.norm(arr[:, FINGER_TIPS, :2] - ref, axis=2)
+    pip = np.linalg.norm(arr[:, FINGER_PIPS, :2] - ref, axis=2)
+    return tip > pip
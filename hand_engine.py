@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import atexit
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import mediapipe as mp
+
+import preprocess
+
+mp_hands = mp.solutions.hands
+
+# Grafos de MediaPipe que se mantienen vivos a la vez (uno por configuración
+# distinta de modo). Los modos de la app usan 3 configuraciones.
+MAX_GRAPHS = 3
+
+# Ancho (px) de la copia reducida sobre la que corre la inferencia; el detector
+# de palma trabaja internamente a 192x192, así que más resolución no ayuda.
+# 0 = inferir sobre el frame completo.
+INFERENCE_WIDTH = 480
+
+# Inferencia en un proceso aparte (hand_worker) para los modos que lo admiten:
+# el loop de render no espera a MediaPipe y usa el último resultado disponible.
+OUT_OF_PROCESS = False
+
+# Detección + tracking (hand_flow): inferencia completa cada FLOW_EVERY frames
+# y flujo óptico sobre los landmarks en los intermedios. 1 = inferir siempre.
+FLOW_EVERY = 1
+
+
+@dataclass(frozen=True)
+class HandConfig:
+    max_num_hands: int = 1
+    model_complexity: int = 1
+    min_detection_confidence: float = 0.5
+    min_tracking_confidence: float = 0.5
+    # No forma parte de la clave del grafo: cambiarlo no crea otro grafo
+    inference_width: int = field(default=INFERENCE_WIDTH, compare=False)
+
+
+class HandEngine:
+    """
+    Motor de landmarks de mano compartido por todos los modos.
+    MediaPipe no permite cambiar parámetros de un grafo ya creado, así que
+    cada configuración tiene su grafo, creado la primera vez que se pide y
+    reutilizado después; los que sobran del límite se cierran.
+    """
+
+    def __init__(self, max_graphs: int = MAX_GRAPHS):
+        self.max_graphs = max_graphs
+        self._graphs: "OrderedDict[HandConfig, mp_hands.Hands]" = OrderedDict()
+        self._config: Optional[HandConfig] = None
+        self._closed = False
+        self._proxy = preprocess.InferenceProxy(INFERENCE_WIDTH)   # buffers reutilizados
+        self.scores: List[float] = []   # confianza (handedness) de cada mano del último frame
+
+    @property
+    def config(self) -> Optional[HandConfig]:
+        return self._config
+
+    def configure(self, config: HandConfig) -> "HandEngine":
+        """Selecciona la configuración del modo actual (crea el grafo si hace falta)."""
+        if self._closed:
+            raise RuntimeError("HandEngine cerrado")
+        graph = self._graphs.get(config)
+        if graph is None:
+            graph = mp_hands.Hands(
+                static_image_mode=False,
+                max_num_hands=config.max_num_hands,
+                model_complexity=config.model_complexity,
+                min_detection_confidence=config.min_detection_confidence,
+                min_tracking_confidence=config.min_tracking_confidence,
+            )
+            self._graphs[config] = graph
+            while len(self._graphs) > self.max_graphs:
+                _, old = self._graphs.popitem(last=False)
+                old.close()
+        elif config != self._config and hasattr(graph, "reset"):
+            # Al volver a un modo no arrastrar el tracking de la vez anterior
+            graph.reset()
+        self._graphs.move_to_end(config)
+        self._config = config
+        return self
+
+    def process(self, frame: np.ndarray | preprocess.FrameViews) -> List:
+        """
+        Landmarks (NormalizedLandmarkList) de las manos en un frame BGR (o sus
+        FrameViews, para compartir el proxy con otras etapas); lista vacía si no hay.
+        La inferencia corre sobre una copia reducida del frame completo; como los
+        landmarks vienen normalizados a [0, 1] respecto de la imagen entera, valen
+        tal cual para el frame de display (x * ancho, y * alto).
+        """
+        if self._config is None:
+            self.configure(HandConfig())
+        if isinstance(frame, preprocess.FrameViews):
+            rgb = frame.proxy_rgb(self._config.inference_width)
+        else:
+            self._proxy.width = self._config.inference_width
+            rgb = self._proxy(frame)
+        res = self._graphs[self._config].process(rgb)
+        self.scores = [h.classification[0].score for h in (res.multi_handedness or [])]
+        return list(res.multi_hand_landmarks or [])
+
+    @property
+    def confidence(self) -> float:
+        """Confianza de la mano más segura del último frame (0 si no hubo manos)."""
+        return max(self.scores, default=0.0)
+
+    def close(self) -> None:
+        for graph in self._graphs.values():
+            graph.close()
+        self._graphs.clear()
+        self._config = None
+        self._closed = True
+
+
+_engine: Optional[HandEngine] = None
+
+
+def get(config: HandConfig, allow_worker: bool = False):
+    """
+    Motor compartido de la app, configurado para el modo que lo pide.
+    Con allow_worker y OUT_OF_PROCESS activo devuelve el worker asíncrono;
+    con FLOW_EVERY > 1, el motor con tracking entre inferencias.
+    """
+    if allow_worker and OUT_OF_PROCESS:
+        import hand_worker
+        return hand_worker.get(config)
+    global _engine
+    if _engine is None:
+        _engine = HandEngine()
+    _engine.configure(config)
+    if FLOW_EVERY > 1:
+        import hand_flow
+        return hand_flow.get(_engine, FLOW_EVERY)
+    return _engine
+
+
+def shutdown() -> None:
+    """Cierra el motor compartido (se llama al salir de la app)."""
+    global _engine
+    if _engine is not None:
+        _engine.close()
+        _engine = None
+    if OUT_OF_PROCESS:
+        import hand_worker
+        hand_worker.shutdown()
+
+
+atexit.register(shutdown)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import cv2
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import hand_engine
+import preprocess
+
+# Detección + tracking: la inferencia completa de MediaPipe corre sólo cada
+# hand_engine.FLOW_EVERY frames (o antes si el tracking se degrada). En los
+# frames intermedios los 21 landmarks de cada mano se siguen con flujo óptico
+# Lucas-Kanade piramidal sobre el recorte de la mano, en la misma imagen
+# reducida que usa la inferencia. process() devuelve lo mismo que
+# HandEngine.process (NormalizedLandmarkList), así que los modos no cambian.
+#
+# Se vuelve a inferir cuando:
+#   - pasaron FLOW_EVERY frames desde la última inferencia,
+#   - no hay manos que seguir (hay que detectarlas),
+#   - la confianza de la última inferencia es baja (MIN_CONFIDENCE),
+#   - menos de MIN_QUALITY de los puntos pasan el chequeo ida y vuelta.
+
+LK_WIN = (21, 21)
+LK_LEVELS = 3
+LK_CRITERIA = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+FB_MAX_PX = 2.0          # error ida y vuelta máximo de un punto bien seguido
+MIN_QUALITY = 0.6        # fracción de puntos bien seguidos para no reinferir
+MIN_CONFIDENCE = 0.8     # con menos confianza en la última inferencia, no se trackea
+ROI_MARGIN = 0.5         # margen del recorte alrededor de la mano (fracción de su tamaño)
+
+
+class FlowHandEngine:
+    """
+    Envuelve un HandEngine con tracking por flujo óptico entre inferencias.
+    Misma interfaz que HandEngine (configure / process / confidence / scores).
+    """
+
+    def __init__(self, engine: hand_engine.HandEngine, every: int):
+        self._engine = engine
+        self.every = every
+        self._proxy = preprocess.InferenceProxy(hand_engine.INFERENCE_WIDTH)
+        self._gray = [None, None]           # ping-pong: el anterior y el actual
+        self._i = 0
+        self.inferences = 0
+        self.tracked = 0
+        self.quality = 1.0                  # fracción de puntos bien seguidos en el último frame
+        self._tracking_config: Optional[hand_engine.HandConfig] = None
+        self._reset_tracking()
+
+    def _reset_tracking(self) -> None:
+        self._hands: List = []              # últimos landmarks devueltos
+        self._points: Optional[np.ndarray] = None   # (manos * 21, 1, 2) px en la imagen reducida
+        self._since = 0
+        self.scores: List[float] = []
+
+    @property
+    def config(self) -> Optional[hand_engine.HandConfig]:
+        return self._engine.config
+
+    @property
+    def confidence(self) -> float:
+        return max(self.scores, default=0.0)
+
+    def configure(self, config: hand_engine.HandConfig) -> "FlowHandEngine":
+        self._engine.configure(config)
+        return self
+
+    def _to_gray(self, frame: np.ndarray | preprocess.FrameViews) -> np.ndarray:
+        width = self._engine.config.inference_width
+        if isinstance(frame, preprocess.FrameViews):
+            small = frame.proxy(width)      # el mismo proxy que usa la inferencia
+        else:
+            self._proxy.width = width
+            small = self._proxy.small(frame)
+        self._i ^= 1
+        self._gray[self._i] = preprocess.ensure(self._gray[self._i], small.shape[:2])
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray[self._i])
+
+    def process(self, frame: np.ndarray | preprocess.FrameViews) -> List:
+        if self._engine.config is None:
+            self.configure(hand_engine.HandConfig())
+        if self._engine.config != self._tracking_config:
+            # Otro modo: no seguir las manos que dejó el anterior
+            self._reset_tracking()
+            self._tracking_config = self._engine.config
+        gray = self._to_gray(frame)
+        prev = self._gray[self._i ^ 1]
+
+        if (self._points is not None and self._since < self.every - 1
+                and self.confidence >= MIN_CONFIDENCE
+                and prev is not None and prev.shape == gray.shape):
+            hands = self._track(prev, gray)
+            if hands is not None:
+                self._since += 1
+                self.tracked += 1
+                return hands
+
+        hands = self._engine.process(frame)
+        self.inferences += 1
+        self._since = 0
+        self._hands = hands
+        self.scores = list(self._engine.scores)
+        self.quality = 1.0
+        h, w = gray.shape
+        self._points = (np.array([[(p.x * w, p.y * h) for p in lm.landmark] for lm in hands],
+                                 dtype=np.float32).reshape(-1, 1, 2) if hands else None)
+        return hands
+
+    def _track(self, prev: np.ndarray, gray: np.ndarray) -> Optional[List]:
+        """Landmarks movidos por flujo óptico; None si el tracking no es confiable."""
+        h, w = gray.shape
+        pts = self._points
+        # Recorte alrededor de las manos: el flujo sólo se calcula ahí
+        lo, hi = pts.min(axis=(0, 1)), pts.max(axis=(0, 1))
+        pad = (hi - lo) * ROI_MARGIN + LK_WIN[0]
+        x0, y0 = np.maximum(lo - pad, 0).astype(int)
+        x1, y1 = np.minimum(hi + pad, (w, h)).astype(int)
+        if x1 - x0 < LK_WIN[0] or y1 - y0 < LK_WIN[1]:
+            return None
+        origin = np.array((x0, y0), dtype=np.float32)
+        a, b = prev[y0:y1, x0:x1], gray[y0:y1, x0:x1]
+        local = pts - origin
+
+        nxt, st, _ = cv2.calcOpticalFlowPyrLK(a, b, local, None, winSize=LK_WIN,
+                                              maxLevel=LK_LEVELS, criteria=LK_CRITERIA)
+        back, st_back, _ = cv2.calcOpticalFlowPyrLK(b, a, nxt, None, winSize=LK_WIN,
+                                                    maxLevel=LK_LEVELS, criteria=LK_CRITERIA)
+        fb = np.linalg.norm((back - local).reshape(-1, 2), axis=1)
+        good = (st.ravel() == 1) & (st_back.ravel() == 1) & (fb < FB_MAX_PX)
+        self.quality = float(good.mean())
+        if self.quality < MIN_QUALITY:
+            return None
+
+        # Los puntos perdidos siguen el movimiento mediano de los buenos
+        moved = nxt.reshape(-1, 2) + origin
+        shift = np.median((moved - pts.reshape(-1, 2))[good], axis=0)
+        moved[~good] = pts.reshape(-1, 2)[~good] + shift
+        self._points = moved.reshape(-1, 1, 2)
+
+        hands = []
+        for i, old in enumerate(self._hands):
+            lm = landmark_pb2.NormalizedLandmarkList()
+            lm.CopyFrom(old)
+            for p, (x, y) in zip(lm.landmark, moved[i * 21:(i + 1) * 21]):
+                p.x = float(x) / w
+                p.y = float(y) / h
+            hands.append(lm)
+        self._hands = hands
+        return hands
+
+    def close(self) -> None:
+        self._reset_tracking()
+
+
+_flow: Optional[FlowHandEngine] = None
+
+
+def get(engine: hand_engine.HandEngine, every: int) -> FlowHandEngine:
+    """Envoltorio compartido sobre el motor de la app."""
+    global _flow
+    if _flow is None or _flow._engine is not engine:
+        _flow = FlowHandEngine(engine, every)
+    _flow.every = every
+    return _flow
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Deque, Dict, List, Optional
+
+import cv2
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import hand_engine
+import preprocess
+
+# Inferencia de landmarks en un proceso aparte: el loop de render no se bloquea
+# en hands.process y siempre usa el último resultado disponible.
+# Los frames viajan por un ring de shared memory (sin pickle); por la cola sólo
+# pasan metadatos y los resultados serializados, etiquetados con su secuencia.
+# Tras cada configuración (la primera incluye el spawn y cargar MediaPipe) el
+# worker avisa "ready": recién entonces corre el plazo de STALL_TIMEOUT.
+
+SLOTS = 3               # frames que pueden estar en vuelo a la vez
+SLOT_BYTES = 1280 * 1280 * 3   # capacidad de cada slot (alcanza para el frame completo)
+STOP_TIMEOUT = 2.0      # segundos esperando que el worker termine
+STALL_TIMEOUT = 2.0     # un frame sin resultado tras esto: el worker se colgó
+STARTUP_TIMEOUT = 30.0  # arranque en frío o cambio de grafo sin confirmar: se colgó
+
+
+def _worker_main(jobs: multiprocessing.Queue, results: multiprocessing.Queue) -> None:
+    engine = hand_engine.HandEngine()
+    attached: Dict[str, shared_memory.SharedMemory] = {}
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            if job[0] == "config":
+                engine.configure(job[1])
+                results.put(("ready", job[2]))
+                continue
+
+            _, seq, shm_name, slot, shape = job
+            shm = attached.get(shm_name)
+            if shm is None:
+                shm = attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * SLOT_BYTES)
+            manos = engine.process(frame)
+            del frame  # no retener una vista sobre la memoria compartida
+            results.put(("frame", seq, slot, [lm.SerializeToString() for lm in manos],
+                         engine.scores))
+    finally:
+        engine.close()
+        for shm in attached.values():
+            shm.close()
+
+
+class WorkerHandEngine:
+    """
+    Misma interfaz que hand_engine.HandEngine (configure / process / close),
+    pero process() no espera la inferencia: envía el frame al worker si hay un
+    slot libre y devuelve el resultado más reciente que haya llegado.
+    Si el worker muere o se cuelga, sigue con el motor en proceso de la app.
+    """
+
+    def __init__(self, slots: int = SLOTS):
+        ctx = multiprocessing.get_context("spawn")
+        self._jobs = ctx.Queue()
+        self._results = ctx.Queue()
+        self._proc = ctx.Process(target=_worker_main, args=(self._jobs, self._results),
+                                 name="hand-worker", daemon=True)
+        self._proc.start()
+        self._shm = shared_memory.SharedMemory(create=True, size=SLOT_BYTES * slots)
+        self._slots = slots
+        self._free: Deque[int] = deque(range(slots))
+        self._sent_at: Dict[int, float] = {}   # slot -> cuándo se envió su frame
+        self._proxy = preprocess.InferenceProxy(hand_engine.INFERENCE_WIDTH)
+        self._config: Optional[hand_engine.HandConfig] = None
+        self._seq = 0
+        self._config_seq = 0
+        self._config_gen = 0         # configuraciones enviadas al worker
+        self._ready_gen = 0          # última configuración que el worker confirmó
+        self._ready_at = 0.0         # cuándo llegó esa confirmación
+        self._config_at = 0.0        # cuándo se envió la configuración pendiente
+        self.latest_seq = 0          # secuencia del frame del último resultado
+        self._latest: List = []
+        self.scores: List[float] = []
+        self.results = 0             # resultados recibidos del worker
+        self.alive = True            # False: process() usa el motor en proceso
+
+    @property
+    def confidence(self) -> float:
+        return max(self.scores, default=0.0)
+
+    @property
+    def config(self) -> Optional[hand_engine.HandConfig]:
+        return self._config
+
+    def configure(self, config: hand_engine.HandConfig) -> "WorkerHandEngine":
+        if config != self._config:
+            # Lo que quede en vuelo del modo anterior se descarta al llegar
+            self._config_gen += 1
+            self._config_at = time.monotonic()
+            self._jobs.put(("config", config, self._config_gen))
+            self._config_seq = self._seq
+            self._latest = []
+            self.scores = []
+        self._config = config
+        return self
+
+    def process(self, frame: np.ndarray | preprocess.FrameViews) -> List:
+        if self._config is None:
+            self.configure(hand_engine.HandConfig())
+        if self.alive:
+            self._collect()
+            self._check_worker()
+        if not self.alive:
+            engine = hand_engine.get(self._config)
+            manos = engine.process(frame)
+            self.scores = list(engine.scores)
+            return manos
+        if self._free:
+            self._proxy.width = self._config.inference_width
+            # Con vistas se reduce igual desde el BGR: va directo al slot compartido
+            self._submit(frame.bgr if isinstance(frame, preprocess.FrameViews) else frame)
+        # Si no hay slot libre el worker va atrasado: este frame no se infiere
+        return self._latest
+
+    def _submit(self, frame: np.ndarray) -> None:
+        """Reduce el frame directamente dentro de un slot libre, sin copia intermedia."""
+        w, h = self._proxy.size_for(frame)
+        nbytes = w * h * frame[0, 0].size
+        if nbytes > SLOT_BYTES:
+            scale = (SLOT_BYTES / nbytes) ** 0.5
+            w, h = int(w * scale), int(h * scale)
+        shape = (h, w) + frame.shape[2:]
+        slot = self._free.popleft()
+        self._sent_at[slot] = time.monotonic()
+        dst = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf, offset=slot * SLOT_BYTES)
+        if (w, h) == (frame.shape[1], frame.shape[0]):
+            np.copyto(dst, frame)
+        else:
+            cv2.resize(frame, (w, h), dst=dst, interpolation=cv2.INTER_LINEAR)
+        del dst
+        self._seq += 1
+        self._jobs.put(("frame", self._seq, self._shm.name, slot, shape))
+
+    def _collect(self) -> None:
+        while True:
+            try:
+                msg = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if msg[0] == "ready":
+                self._ready_gen = msg[1]
+                self._ready_at = time.monotonic()
+                continue
+            _, seq, slot, payload, scores = msg
+            self._free.append(slot)
+            self._sent_at.pop(slot, None)
+            self.results += 1
+            if seq <= self._config_seq or seq <= self.latest_seq:
+                continue  # resultado de otro modo o más viejo que el actual
+            self.latest_seq = seq
+            self._latest = [landmark_pb2.NormalizedLandmarkList.FromString(b) for b in payload]
+            self.scores = scores
+
+    def _check_worker(self) -> None:
+        """Pasa al motor en proceso si el worker terminó o no responde."""
+        now = time.monotonic()
+        if not self._proc.is_alive():
+            reason = f"terminó (código {self._proc.exitcode})"
+        elif self._ready_gen != self._config_gen:
+            # Arrancando o armando el grafo nuevo: los frames esperan sin contar
+            if now - self._config_at <= STARTUP_TIMEOUT:
+                return
+            reason = f"no terminó de arrancar en {STARTUP_TIMEOUT:g}s"
+        elif self._sent_at and now - max(min(self._sent_at.values()),
+                                         self._ready_at) > STALL_TIMEOUT:
+            reason = f"no responde hace más de {STALL_TIMEOUT:g}s"
+        else:
+            return
+        print(f"⚠ El worker de manos {reason}; sigo con la inferencia en este proceso.")
+        self.alive = False
+        self._latest = []
+        self.scores = []
+        self._free = deque(range(self._slots))
+        self._sent_at.clear()
+        if self._proc.is_alive():
+            # Colgado: SIGKILL no depende de que el worker colabore
+            self._proc.kill()
+            self._proc.join(timeout=STOP_TIMEOUT)
+        self.close()
+
+    def close(self) -> None:
+        if self._proc.is_alive():
+            self._jobs.put(None)
+            self._proc.join(timeout=STOP_TIMEOUT)
+            if self._proc.is_alive():
+                self._proc.terminate()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+_worker: Optional[WorkerHandEngine] = None
+
+
+def get(config: hand_engine.HandConfig) -> WorkerHandEngine:
+    """Worker compartido de la app, configurado para el modo que lo pide."""
+    global _worker
+    if _worker is None:
+        _worker = WorkerHandEngine()
+    return _worker.configure(config)
+
+
+def shutdown() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.close()
+        _worker = None
+
+
+atexit.register(shutdown)
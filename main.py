@@ -1,7 +1,7 @@
 from __future__ import annotations
 
+import os
 import time
-import serial
 import tkinter as tk
 
 import menu_mode
@@ -9,42 +9,85 @@ import qr_mode
 import gesture_mode     # gestos con Arduino opcional
 import gesture_mode2    # minijuego
 import camera_capture   # ← NUEVO
+import camera_hub
+import hand_engine
+import metrics
+import motion_gate
+import serial_link
 
 root = tk.Tk()
 root.withdraw()
 
+# Métricas opcionales: KIOSK_HUD=1 dibuja FPS y latencias sobre cada modo;
+# KIOSK_METRICS=ruta.prom (Prometheus) o ruta.jsonl exporta cada pocos segundos.
+METRICS_HUD = os.environ.get("KIOSK_HUD") == "1"
+METRICS_EXPORT = os.environ.get("KIOSK_METRICS") or None
+
+# Manos: KIOSK_HAND_FLOW=N infiere landmarks cada N frames y los sigue con
+# flujo óptico en el medio (menos CPU; 1 o sin definir = inferir siempre).
+HAND_FLOW_EVERY = int(os.environ.get("KIOSK_HAND_FLOW", "1"))
+# KIOSK_HAND_WORKER=1 infiere en un proceso aparte (menú y minijuego): el loop
+# de render no espera a MediaPipe. Si el worker muere se vuelve al proceso propio.
+HAND_WORKER = os.environ.get("KIOSK_HAND_WORKER") == "1"
+
+# Menú: sin movimiento frente al kiosco pasa a ralentí (no infiere, ~5 fps).
+# KIOSK_RALENTI=0 lo desactiva.
+MENU_IDLE = os.environ.get("KIOSK_RALENTI", "1") != "0"
+
+# Arduino: se conecta en segundo plano y se reconecta solo.
+# KIOSK_SERIAL_PROTOCOL=framed activa las tramas con ACK (requiere el firmware nuevo).
+ARDUINO_PORT = os.environ.get("KIOSK_ARDUINO", "/dev/ttyUSB0")
+ARDUINO_PROTOCOL = os.environ.get("KIOSK_SERIAL_PROTOCOL", "legacy")
+
+# Minijuego: KIOSK_JUEGO=caos llena la pantalla con miles de cuadros chicos.
+# KIOSK_JUEGO_GRABAR=directorio guarda la entrada de cada partida (benchmark.py game-replay).
+GAME_DIFFICULTY = os.environ.get("KIOSK_JUEGO", "normal")
+GAME_RECORD_DIR = os.environ.get("KIOSK_JUEGO_GRABAR") or None
+
 def main() -> None:
     print("App iniciada. ESC para salir desde el menú.")
 
-    try:
-        # Conectar Arduino (si está en Linux con el puerto correcto)
-        try:
-            arduino = serial.Serial("/dev/ttyUSB0", 9600, timeout=1)
-            time.sleep(2)
-            print("Arduino conectado en /dev/ttyUSB0")
-        except serial.SerialException:
-            arduino = None
-            print("⚠ No se pudo conectar con Arduino.")
+    if METRICS_HUD or METRICS_EXPORT:
+        metrics.enable(hud=METRICS_HUD, export_path=METRICS_EXPORT)
+    hand_engine.FLOW_EVERY = HAND_FLOW_EVERY
+    hand_engine.OUT_OF_PROCESS = HAND_WORKER
+    motion_gate.ENABLED = MENU_IDLE
 
+    # Cámara compartida: se abre una sola vez y todos los modos se suscriben
+    hub = camera_hub.CameraHub(camera_index=0)
+    if not hub.start():
+        print("⚠ No se pudo abrir la cámara compartida; cada modo intentará abrirla.")
+
+    # Conexión, escrituras y reconexión en un hilo aparte: el menú abre ya
+    link = serial_link.SerialLink(port_factory=serial_link.serial_port(ARDUINO_PORT),
+                                  protocol=ARDUINO_PROTOCOL)
+    try:
         while True:
-            choice = menu_mode.run()  # 'qr' | 'juego' | 'gestos' | 'foto' | None
+            choice = menu_mode.run(hub=hub)  # 'qr' | 'juego' | 'gestos' | 'foto' | None
             if choice is None:
                 break
 
             if choice == "qr":
-                qr_mode.run()
+                qr_mode.run(hub=hub)
             elif choice == "juego":
-                gesture_mode2.run()
+                grabar = None
+                if GAME_RECORD_DIR:
+                    grabar = os.path.join(GAME_RECORD_DIR, time.strftime("juego-%Y%m%d-%H%M%S.trail"))
+                gesture_mode2.run(hub=hub, dificultad=GAME_DIFFICULTY, grabar=grabar)
             elif choice == "foto":
-                # Lanza captura de foto (usa su propia ventana/cámara)
-                camera_capture.capture_photo()
+                # Lanza captura de foto (usa su propia ventana, cámara compartida)
+                camera_capture.capture_photo(hub=hub)
             else:  # 'gestos'
-                # Pasa el objeto Arduino si está disponible
-                gesture_mode.run(arduino)
+                # Si el Arduino no está, el link guarda el estado y lo manda al conectar
+                gesture_mode.run(link, hub=hub)
 
     except KeyboardInterrupt:
         pass
     finally:
+        link.close()
+        hub.stop()
+        hand_engine.shutdown()
+        metrics.disable()
         print("Aplicación cerrada")
 
 if __name__ == "__main__":
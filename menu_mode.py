@@ -1,8 +1,18 @@
 from __future__ import annotations
 import cv2
 import time
-from typing import Optional
+from typing import Dict, Optional, Tuple
 import mediapipe as mp
+import numpy as np
+
+import camera_hub
+import display
+import gesture_filter
+import gestures
+import hand_engine
+import metrics
+import motion_gate
+import preprocess
 
 WINDOW_TITLE = "Menu por Gestos (4 cuadrantes)"
 WIN_W, WIN_H = 1200, 960
@@ -27,42 +37,91 @@ BAR_H = 12
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
-
-def _quadrant_of(x_norm: float, y_norm: float) -> str:
-    left = x_norm < 0.5
-    top = y_norm < 0.5
-    if top and left:
-        return "TL"
-    if top and not left:
-        return "TR"
-    if not top and left:
-        return "BL"
-    return "BR"
+HANDS_CONFIG = hand_engine.HandConfig(
+    max_num_hands=1,
+    model_complexity=1,
+    min_detection_confidence=MIN_CONFIDENCE_DET,
+    min_tracking_confidence=MIN_CONFIDENCE_TRACK,
+)
+
+
+OVERLAY_ALPHA = 0.13   # opacidad del tinte de los cuadrantes
+
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+# Etiquetas fijas: (texto, origen(w, h), escala, color, grosor)
+_LABELS = (
+    ("QR", lambda w, h: (20, 36), 0.9, COLOR_TXT, 2),
+    ("JUEGO", lambda w, h: (w - 160, 36), 0.9, COLOR_TXT, 2),
+    ("FOTO", lambda w, h: (20, h - 20), 0.9, COLOR_TXT, 2),
+    ("GESTOS", lambda w, h: (w - 180, h - 20), 0.9, COLOR_TXT, 2),
+    ("Mantene la mano ~1.2s en un cuadrante para seleccionar",
+     lambda w, h: (20, h // 2 - 10), 0.6, (230, 230, 230), 2),
+    ("Atajos: 1=QR | 2=Juego | 3=Gestos | 4=Foto | ESC salir | f Fullscreen",
+     lambda w, h: (20, h // 2 + 20), 0.55, (220, 220, 220), 1),
+)
+
+
+class _StaticLayer:
+    """
+    Parte fija del menú para un tamaño de frame: el tinte de los cuadrantes ya
+    multiplicado por OVERLAY_ALPHA (una sola mezcla por frame) y los trazos
+    (grilla y textos) recortados en regiones chicas con su cobertura.
+    """
+
+    def __init__(self, w: int, h: int):
+        half_w, half_h = w // 2, h // 2
+        tint = np.zeros((h, w, 3), dtype=np.float32)
+        tint[:half_h, :half_w] = COLOR_TL
+        tint[:half_h, half_w:] = COLOR_TR
+        tint[half_h:, :half_w] = COLOR_BL
+        tint[half_h:, half_w:] = COLOR_BR
+        self.tint = np.rint(tint * OVERLAY_ALPHA).astype(np.uint8)
+
+        layer = np.zeros((h, w, 3), dtype=np.uint8)
+        mask = np.zeros((h, w), dtype=np.uint8)
+        rois = [(0, h, half_w, half_w + 1), (half_h, half_h + 1, 0, w)]   # grilla
+        cv2.line(layer, (half_w, 0), (half_w, h), (255, 255, 255), 1)
+        cv2.line(layer, (0, half_h), (w, half_h), (255, 255, 255), 1)
+        cv2.line(mask, (half_w, 0), (half_w, h), 255, 1)
+        cv2.line(mask, (0, half_h), (w, half_h), 255, 1)
+        for text, origin, scale, color, thickness in _LABELS:
+            x, y = origin(w, h)
+            (tw, th), base = cv2.getTextSize(text, _FONT, scale, thickness)
+            cv2.putText(layer, text, (x, y), _FONT, scale, color, thickness)
+            cv2.putText(mask, text, (x, y), _FONT, scale, 255, thickness)
+            rois.append((max(0, y - th - thickness), min(h, y + base + thickness),
+                         max(0, x - thickness), min(w, x + tw + thickness)))
+
+        # Por región: color ya multiplicado por la cobertura (+0.5 para redondear)
+        # y 1 - cobertura, así los bordes suavizados del texto quedan igual que
+        # dibujando encima.
+        self.pieces = []
+        for y0, y1, x0, x1 in rois:
+            cover = mask[y0:y1, x0:x1, None].astype(np.float32) / 255.0
+            self.pieces.append(((slice(y0, y1), slice(x0, x1)),
+                                layer[y0:y1, x0:x1].astype(np.float32) + 0.5, 1.0 - cover))
+
+    def apply(self, frame: np.ndarray) -> None:
+        # frame * (1 - alpha) + tinte * alpha (ya multiplicado), en el lugar
+        cv2.addWeighted(frame, 1.0 - OVERLAY_ALPHA, self.tint, 1.0, 0, dst=frame)
+        for roi, color, keep in self.pieces:
+            dst = frame[roi]
+            dst[...] = dst * keep + color
+
+
+_layers: Dict[Tuple[int, int], _StaticLayer] = {}
+
+
+def _static_layer(w: int, h: int) -> _StaticLayer:
+    layer = _layers.get((w, h))
+    if layer is None:
+        layer = _layers[(w, h)] = _StaticLayer(w, h)
+    return layer
 
 
 def _draw_overlay(frame, q: Optional[str], progress: float):
     h, w = frame.shape[:2]
-    half_w, half_h = w // 2, h // 2
-
-    overlay = frame.copy()
-
-    def fill(rect, color):
-        x0, y0, x1, y1 = rect
-        cv2.rectangle(overlay, (x0, y0), (x1, y1), color, -1)
-
-    fill((0, 0, half_w, half_h), COLOR_TL)  # TL
-    fill((half_w, 0, w, half_h), COLOR_TR)  # TR
-    fill((0, half_h, half_w, h), COLOR_BL)  # BL
-    fill((half_w, half_h, w, h), COLOR_BR)  # BR
-
-    cv2.addWeighted(overlay, 0.13, frame, 0.87, 0, frame)
-    cv2.line(frame, (half_w, 0), (half_w, h), (255, 255, 255), 1)
-    cv2.line(frame, (0, half_h), (w, half_h), (255, 255, 255), 1)
-
-    cv2.putText(frame, "QR", (20, 36), cv2.FONT_HERSHEY_SIMPLEX, 0.9, COLOR_TXT, 2)
-    cv2.putText(frame, "JUEGO", (w - 160, 36), cv2.FONT_HERSHEY_SIMPLEX, 0.9, COLOR_TXT, 2)
-    cv2.putText(frame, "FOTO", (20, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.9, COLOR_TXT, 2)
-    cv2.putText(frame, "GESTOS", (w - 180, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.9, COLOR_TXT, 2)
+    _static_layer(w, h).apply(frame)
 
     if q is not None:
         total = int(w * 0.38)
@@ -84,125 +143,117 @@ def _draw_overlay(frame, q: Optional[str], progress: float):
         cv2.rectangle(frame, (x0, y0), (x0 + filled, y0 + BAR_H), color, -1)
         cv2.rectangle(frame, (x0, y0), (x0 + total, y0 + BAR_H), (255, 255, 255), 1)
 
-    cv2.putText(frame, "Mantene la mano ~1.2s en un cuadrante para seleccionar",
-                (20, h // 2 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (230, 230, 230), 2)
-    cv2.putText(frame, "Atajos: 1=QR | 2=Juego | 3=Gestos | 4=Foto | ESC salir | f Fullscreen",
-                (20, h // 2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (220, 220, 220), 1)
-
 
 def _set_fullscreen(enable: bool):
     global _is_fullscreen
     try:
-        cv2.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H) 
+        display.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
+        display.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H) 
         _is_fullscreen = enable
     except Exception:
-        cv2.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
-        cv2.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
+        display.namedWindow(WINDOW_TITLE, cv2.WINDOW_NORMAL)
+        display.resizeWindow(WINDOW_TITLE, WIN_W, WIN_H)
         _is_fullscreen = False
 
 
-def es_punio_cerrado(lm) -> bool:
-    """Detecta si todos los dedos están doblados (puño cerrado)"""
-    # Comparamos y coordenada de las puntas con las articulaciones intermedias
-    dedos_puntas = [8, 12, 16, 20]
-    dedos_intermedios = [6, 10, 14, 18]
-    for tip, pip in zip(dedos_puntas, dedos_intermedios):
-        if lm.landmark[tip].y < lm.landmark[pip].y:
-            return False
-    return True
-
-
-def run(camera_index: int = 0) -> Optional[str]:
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
+def run(camera_index: int = 0, hub: Optional[camera_hub.CameraHub] = None) -> Optional[str]:
+    cap = camera_hub.open_capture(hub, camera_index, WIN_W, WIN_H)
+    if cap is None:
         print("❌ No se pudo abrir la cámara para el menú")
         return None
 
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIN_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, WIN_H)
-
     _set_fullscreen(FULLSCREEN)
 
-    hands = mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=1,
-        model_complexity=1,
-        min_detection_confidence=MIN_CONFIDENCE_DET,
-        min_tracking_confidence=MIN_CONFIDENCE_TRACK,
-    )
+    hands = hand_engine.get(HANDS_CONFIG, allow_worker=True)
 
     dwell_q: Optional[str] = None
-    dwell_start: float = 0.0
-
-    punio_start: float | None = None  # tiempo inicio del puño cerrado
+    dwell = gesture_filter.HoldDebouncer(DWELL_SECONDS)
+    cierre = gesture_filter.HoldDebouncer(GESTO_CERRAR_SEG)  # puño cerrado mantenido
+    suavizado = gesture_filter.OneEuroFilter()
+    prep = preprocess.Preprocessor(WIN_W, WIN_H, mirror=MIRROR)
+    gate = motion_gate.MotionGate()
+    manos: list = []
 
     try:
         while True:
+            metrics.begin_frame()
             ok, frame = cap.read()
             if not ok:
                 break
-
-            if MIRROR:
-                frame = cv2.flip(frame, 1)
-
-            frame = cv2.resize(frame, (WIN_W, WIN_H))
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = hands.process(rgb)
+            metrics.lap("captura")
+
+            frame = prep(frame)     # espejo + resize en una pasada, sin asignar
+            metrics.lap("preproceso")
+            views = prep.views(frame)
+            now = time.monotonic()
+
+            # Escena quieta y nada en curso: ralentí, sin inferir y a pocos fps
+            estaba_activo = not gate.idle
+            activo = gate.update(views, now, busy=bool(manos) or dwell.active or cierre.active)
+            metrics.lap("movimiento")
+            if activo != estaba_activo:
+                cap.set_interval(0.0 if activo else motion_gate.IDLE_INTERVAL)
+                metrics.gauge("ralenti", 0.0 if activo else 1.0)
+            if activo:
+                manos = hands.process(views)
+                metrics.lap("manos")
+                conf = hands.confidence
+            else:
+                manos, conf = [], 0.0
 
             q_active: Optional[str] = None
             progress = 0.0
 
-            if res.multi_hand_landmarks:
-                lms = res.multi_hand_landmarks[0]
+            if manos:
+                lms = manos[0]
                 mp_drawing.draw_landmarks(frame, lms, mp_hands.HAND_CONNECTIONS)
-
-                # Detectar puño cerrado
-                if es_punio_cerrado(lms):
-                    if punio_start is None:
-                        punio_start = time.time()
-                    else:
-                        elapsed_punio = time.time() - punio_start
-                        cv2.putText(frame, f"Cerrando en: {GESTO_CERRAR_SEG - int(elapsed_punio)}s",
-                                    (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
-                        if elapsed_punio >= GESTO_CERRAR_SEG:
-                            print("✅ Puño cerrado detectado — cerrando app...")
-                            break
-                else:
-                    punio_start = None
-
-                # Cuadrante solo si no hay puño cerrado
-                if punio_start is None:
-                    wrist = lms.landmark[0]
-                    x_norm, y_norm = wrist.x, wrist.y
-                    q_active = _quadrant_of(x_norm, y_norm)
-
-                    now = time.time()
-                    if dwell_q != q_active:
-                        dwell_q = q_active
-                        dwell_start = now
-                    elapsed = now - dwell_start
-                    progress = min(1.0, elapsed / DWELL_SECONDS)
-
-                    if elapsed >= DWELL_SECONDS:
-                        sel_map = {"TL": "qr", "TR": "juego", "BR": "gestos", "BL": "foto"}
-                        selection = sel_map.get(q_active)
-                        if selection is not None:
-                            cap.release()
-                            cv2.destroyWindow(WINDOW_TITLE)
-                            return selection
-                        else:
-                            dwell_q = None
-                            dwell_start = 0.0
+                arr = suavizado(gestures.to_array(manos[:1]), now)
+                puno = bool(gestures.evaluar(arr, ("puno",))["puno"][0])
             else:
+                arr = None
+                puno = False
+
+            # Detectar puño cerrado (un frame con jitter no reinicia la cuenta)
+            if cierre.update(puno, now, conf):
+                print("✅ Puño cerrado detectado — cerrando app...")
+                break
+            if cierre.active:
+                cv2.putText(frame, f"Cerrando en: {int(cierre.remaining + 1)}s",
+                            (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 0, 255), 2)
+
+            # Cuadrante solo si no hay puño cerrado
+            if arr is not None and not cierre.active:
+                wrist = arr[0, gestures.WRIST]
+                q_active = gesture_filter.cuadrante_estable(dwell_q, float(wrist[0]), float(wrist[1]))
+                if dwell_q != q_active:
+                    dwell_q = q_active
+                    dwell.reset()
+
+            if dwell.update(q_active is not None, now, conf):
+                sel_map = {"TL": "qr", "TR": "juego", "BR": "gestos", "BL": "foto"}
+                selection = sel_map.get(dwell_q)
+                if selection is not None:
+                    cap.release()
+                    display.destroyWindow(WINDOW_TITLE)
+                    return selection
+                dwell_q = None
+            progress = dwell.progress
+            if q_active is None and dwell.active:
+                # Mano perdida por un momento: la barra baja en vez de reiniciarse
+                q_active = dwell_q
+            elif not dwell.active and q_active is None:
                 dwell_q = None
-                dwell_start = 0.0
-                punio_start = None
+                suavizado.reset()
 
+            metrics.lap("gestos")
             _draw_overlay(frame, q_active, progress)
-            cv2.imshow(WINDOW_TITLE, frame)
+            metrics.lap("dibujo")
+            metrics.draw_hud(frame)
+            display.imshow(WINDOW_TITLE, frame)
 
-            key = cv2.waitKey(1) & 0xFF
+            key = display.waitKey(1) & 0xFF
+            metrics.lap("display")
+            metrics.end_frame()
             if key in (27, ord('q')):
                 break
             if key == ord('1'):
@@ -216,5 +267,6 @@ def run(camera_index: int = 0) -> Optional[str]:
             if key == ord('f'):
                 _set_fullscreen(not _is_fullscreen)
     finally:
+        cap.set_interval(0.0)     # los demás modos capturan a ritmo completo
         cap.release()
-        cv2.destroyAllWindows()
+        display.destroyAllWindows()
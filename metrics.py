@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Tiempos por etapa del loop de cada modo (captura, preproceso, manos, ...).
+# Desactivado por defecto: begin_frame / lap / end_frame / record / gauge / draw_hud son
+# funciones vacías y los modos no pagan nada. enable() las cambia por las que miden.
+#
+# Uso en un loop:
+#     metrics.begin_frame()
+#     ok, frame = cap.read();        metrics.lap("captura")
+#     manos = hands.process(frame);  metrics.lap("manos")
+#     ...
+#     metrics.draw_hud(frame)
+#     metrics.end_frame()
+#
+# Por etapa se guarda una ventana deslizante de las últimas muestras (percentiles)
+# y un histograma acumulado con buckets fijos (export Prometheus).
+#
+# record() y gauge() también se llaman desde otros hilos (escáner QR, acciones,
+# serie): las altas en los diccionarios van bajo _lock y quien los recorre
+# (HUD, summary, export) lo hace sobre una copia tomada con el lock.
+
+WINDOW = 600                 # muestras por etapa para percentiles (~20 s a 30 fps)
+BUCKETS = (0.001, 0.002, 0.005, 0.010, 0.020, 0.033, 0.050, 0.100, 0.200, 0.500, 1.0)
+EXPORT_EVERY = 5.0           # segundos entre exports
+HUD_STAGES = 3               # etapas más lentas que muestra el HUD
+PROM_PREFIX = "kiosk"
+
+
+class _Stage:
+    """Ventana deslizante de duraciones + histograma acumulado (segundos)."""
+
+    __slots__ = ("ring", "count", "total", "buckets")
+
+    def __init__(self, window: int):
+        self.ring = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)   # el último es +Inf
+
+    def add(self, seconds: float) -> None:
+        self.ring[self.count % len(self.ring)] = seconds
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def window(self) -> np.ndarray:
+        return self.ring[:min(self.count, len(self.ring))]
+
+
+_stages: Dict[str, _Stage] = {}
+_gauges: Dict[str, float] = {}       # valores instantáneos (p. ej. largo de una cola)
+_lock = threading.Lock()
+_window = WINDOW
+_t_frame = 0.0
+_t_prev = 0.0
+_frame_ends = np.zeros(WINDOW, dtype=np.float64)   # para los FPS reales
+_n_frames = 0
+
+_export_path: Optional[str] = None
+_export_every = EXPORT_EVERY
+_next_export = 0.0
+
+
+def _noop(*_args) -> None:
+    pass
+
+
+def _add(stage: str, seconds: float) -> None:
+    with _lock:
+        s = _stages.get(stage)
+        if s is None:
+            s = _stages[stage] = _Stage(_window)
+        s.add(seconds)
+
+
+def _stage_items() -> List[Tuple[str, _Stage]]:
+    with _lock:
+        return list(_stages.items())
+
+
+def _gauge_items() -> Dict[str, float]:
+    with _lock:
+        return dict(_gauges)
+
+
+def _begin_frame() -> None:
+    global _t_frame, _t_prev
+    _t_frame = _t_prev = time.perf_counter()
+
+
+def _lap(stage: str) -> None:
+    """Registra el tiempo desde el lap anterior (o desde begin_frame) bajo *stage*."""
+    global _t_prev
+    now = time.perf_counter()
+    _add(stage, now - _t_prev)
+    _t_prev = now
+
+
+def _end_frame() -> None:
+    global _n_frames
+    now = time.perf_counter()
+    _add("frame", now - _t_frame)
+    _frame_ends[_n_frames % len(_frame_ends)] = now
+    _n_frames += 1
+    if _export_path is not None and now >= _next_export:
+        _export(now)
+
+
+def _record(stage: str, seconds: float) -> None:
+    """Registra una duración medida por fuera del loop (p. ej. la edad del frame)."""
+    _add(stage, seconds)
+
+
+def _gauge(name: str, value: float) -> None:
+    """Guarda el valor actual de *name* (se exporta tal cual, sin historial)."""
+    with _lock:
+        _gauges[name] = value
+
+
+def _draw_hud(frame: np.ndarray) -> None:
+    """FPS, latencia del frame y las etapas más lentas, arriba a la derecha."""
+    frame_stage = _stages.get("frame")
+    if frame_stage is None:
+        return
+    p50, p95 = np.percentile(frame_stage.window(), (50, 95)) * 1000.0
+    slow = sorted(((float(s.window().mean()), name) for name, s in _stage_items()
+                   if name not in ("frame", "edad_frame")), reverse=True)[:HUD_STAGES]
+    lines = [f"{fps():5.1f} fps", f"frame p50 {p50:.1f} / p95 {p95:.1f} ms"]
+    lines += [f"{name} {mean * 1000.0:.1f} ms" for mean, name in slow]
+
+    x = frame.shape[1] - 300
+    for i, text in enumerate(lines):
+        y = 24 + 22 * i
+        cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 0, 0), 3)
+        cv2.putText(frame, text, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (0, 255, 255), 1)
+
+
+begin_frame = lap = end_frame = record = gauge = draw_hud = _noop
+
+
+def enable(hud: bool = False, export_path: Optional[str] = None,
+           export_every: float = EXPORT_EVERY, window: int = WINDOW) -> None:
+    """
+    Activa la medición. *hud* dibuja FPS/latencias sobre el frame; *export_path*
+    escribe cada *export_every* segundos en formato Prometheus (".prom", se
+    reemplaza el archivo) o JSON-lines (cualquier otra extensión, se agrega).
+    """
+    global begin_frame, lap, end_frame, record, gauge, draw_hud
+    global _export_path, _export_every, _next_export, _window, _frame_ends
+    if window != _window:
+        _window = window
+        _frame_ends = np.zeros(window, dtype=np.float64)
+        reset()
+    _export_path = export_path
+    _export_every = export_every
+    _next_export = time.perf_counter() + export_every
+    begin_frame, lap, end_frame, record, gauge = _begin_frame, _lap, _end_frame, _record, _gauge
+    draw_hud = _draw_hud if hud else _noop
+
+
+def disable() -> None:
+    global begin_frame, lap, end_frame, record, gauge, draw_hud
+    if _export_path is not None and _stages:
+        _export(time.perf_counter())
+    begin_frame = lap = end_frame = record = gauge = draw_hud = _noop
+
+
+def enabled() -> bool:
+    return lap is not _noop
+
+
+def reset() -> None:
+    global _n_frames
+    with _lock:
+        _stages.clear()
+        _gauges.clear()
+    _n_frames = 0
+
+
+def fps() -> float:
+    """FPS reales sobre la ventana de frames terminados."""
+    n = min(_n_frames, len(_frame_ends))
+    if n < 2:
+        return 0.0
+    last = _frame_ends[(_n_frames - 1) % len(_frame_ends)]
+    first = _frame_ends[(_n_frames - n) % len(_frame_ends)]
+    return (n - 1) / (last - first) if last > first else 0.0
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Por etapa: muestras totales y media / p50 / p95 / p99 (ms) sobre la ventana."""
+    out: Dict[str, Dict[str, float]] = {}
+    for stage, s in _stage_items():
+        arr = s.window() * 1000.0
+        p50, p95, p99 = np.percentile(arr, (50, 95, 99))
+        out[stage] = {
+            "n": s.count,
+            "mean_ms": float(arr.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        }
+    return out
+
+
+def prometheus_text() -> str:
+    """Histogramas acumulados por etapa en formato de texto de Prometheus."""
+    name = f"{PROM_PREFIX}_stage_seconds"
+    lines = [f"# HELP {name} Duración de cada etapa del loop por frame.",
+             f"# TYPE {name} histogram"]
+    for stage, s in _stage_items():
+        acc = 0
+        for le, n in zip(BUCKETS + (float("inf"),), s.buckets):
+            acc += n
+            le_text = "+Inf" if le == float("inf") else repr(le)
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{le_text}"}} {acc}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {s.total:.6f}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {s.count}')
+    lines += [f"# HELP {PROM_PREFIX}_fps Frames por segundo recientes.",
+              f"# TYPE {PROM_PREFIX}_fps gauge",
+              f"{PROM_PREFIX}_fps {fps():.3f}"]
+    for gname, value in _gauge_items().items():
+        lines += [f"# TYPE {PROM_PREFIX}_{gname} gauge", f"{PROM_PREFIX}_{gname} {value:g}"]
+    return "\n".join(lines) + "\n"
+
+
+def _export(now: float) -> None:
+    global _next_export
+    _next_export = now + _export_every
+    try:
+        if _export_path.endswith(".prom"):
+            # Escritura atómica: el textfile collector nunca lee un archivo a medias
+            tmp = _export_path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(prometheus_text())
+            os.replace(tmp, _export_path)
+        else:
+            with open(_export_path, "a") as f:
+                f.write(json.dumps({"t": time.time(), "fps": fps(), "stages": summary(),
+                                    "gauges": _gauge_items()}) + "\n")
+    except OSError as e:
+        print(f"⚠ No se pudieron exportar las métricas a {_export_path}: {e}")
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+import preprocess
+
+# Ralentí del menú: con la escena quieta (nadie frente al kiosco) no tiene
+# sentido correr el detector de palmas a todo el frame rate. Cada frame se
+# reduce a una miniatura gris de GATE_WIDTH px y se compara contra un fondo
+# que se adapta lento (luz que cambia de a poco); si cambia más de
+# MOTION_FRAC de la miniatura, hay movimiento. Tras IDLE_AFTER segundos sin
+# movimiento ni manos, el menú pasa a ralentí: no infiere y pide al hub un
+# frame cada IDLE_INTERVAL. El primer frame con movimiento lo despierta.
+
+ENABLED = True
+GATE_WIDTH = 64          # ancho de la miniatura (px)
+BLUR = (5, 5)            # suaviza el ruido del sensor antes de comparar
+DIFF_THRESHOLD = 16      # diferencia de gris (0-255) para contar un píxel como cambiado
+MOTION_FRAC = 0.01       # fracción de la miniatura cambiada que cuenta como movimiento
+BG_ALPHA = 0.05          # adaptación del fondo por frame
+IDLE_AFTER = 4.0         # s sin movimiento ni manos para pasar a ralentí
+IDLE_INTERVAL = 0.2      # s entre frames en ralentí (5 fps)
+
+
+class MotionGate:
+    """
+    Decide frame a frame si el menú está activo. update() devuelve True si
+    hay que procesar el frame (inferir manos) y False en ralentí.
+    """
+
+    def __init__(self, idle_after: float = IDLE_AFTER):
+        self.idle_after = idle_after
+        self.idle = False
+        self.changed = 0.0               # fracción cambiada en el último frame
+        self.wakeups = 0
+        self._small: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._diff: Optional[np.ndarray] = None
+        self._bg: Optional[np.ndarray] = None
+        self._last_active: Optional[float] = None
+
+    def reset(self) -> None:
+        self.idle = False
+        self._bg = None
+        self._last_active = None
+
+    def _thumbnail(self, frame: np.ndarray | preprocess.FrameViews) -> np.ndarray:
+        bgr = frame.bgr if isinstance(frame, preprocess.FrameViews) else frame
+        h, w = bgr.shape[:2]
+        size = (GATE_WIDTH, max(1, round(h * GATE_WIDTH / w)))
+        self._small = preprocess.ensure(self._small, (size[1], size[0]) + bgr.shape[2:])
+        small = cv2.resize(bgr, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if small.ndim == 2:
+            return cv2.GaussianBlur(small, BLUR, 0)
+        self._gray = preprocess.ensure(self._gray, small.shape[:2])
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return cv2.GaussianBlur(self._gray, BLUR, 0, dst=self._gray)
+
+    def motion(self, frame: np.ndarray | preprocess.FrameViews) -> bool:
+        """True si *frame* se aparta del fondo; de paso actualiza el fondo."""
+        gray = self._thumbnail(frame)
+        if self._bg is None or self._bg.shape != gray.shape:
+            self._bg = gray.astype(np.float32)
+            self.changed = 0.0
+            return False
+        self._diff = preprocess.ensure(self._diff, gray.shape)
+        cv2.absdiff(gray, cv2.convertScaleAbs(self._bg), dst=self._diff)
+        self.changed = cv2.countNonZero(cv2.compare(self._diff, DIFF_THRESHOLD, cv2.CMP_GT)) / gray.size
+        cv2.accumulateWeighted(gray, self._bg, BG_ALPHA)
+        return self.changed > MOTION_FRAC
+
+    def update(self, frame: np.ndarray | preprocess.FrameViews, now: float,
+               busy: bool = False) -> bool:
+        """
+        *busy*: el menú tiene algo en curso (manos a la vista, una selección o
+        un cierre a medias) y no debe dormirse aunque la imagen no cambie.
+        """
+        if not ENABLED:
+            self.idle = False
+            return True
+        moving = self.motion(frame)
+        if moving or busy or self._last_active is None:
+            self._last_active = now
+        idle = now - self._last_active >= self.idle_after
+        if self.idle and not idle:
+            self.wakeups += 1
+        self.idle = idle
+        return not idle
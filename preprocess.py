@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Preproceso de cada frame sin basura: espejo + resize al tamaño de la ventana
+# en una sola pasada (cv2.remap con mapas precalculados) y el proxy RGB para
+# MediaPipe, todo escrito en buffers que se reutilizan entre frames.
+#
+# Los buffers se alternan (ping-pong): el frame devuelto sigue siendo válido
+# durante el frame siguiente, por si alguien lo retiene un poco (p. ej. el
+# sink de display). Quien lo necesite por más tiempo debe copiarlo.
+#
+# FrameViews agrupa las versiones derivadas de un frame (RGB, gris, proxy de
+# inferencia, espejo): cada una se calcula la primera vez que alguien la pide
+# y el resto de las etapas del mismo frame reusan el resultado.
+
+N_BUFFERS = 2
+
+
+def ensure(buf: Optional[np.ndarray], shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+    """*buf* si ya tiene *shape* y *dtype*; si no, un buffer nuevo."""
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        return np.empty(shape, dtype=dtype)
+    return buf
+
+
+def crop_box(src_w: int, src_h: int, width: int, height: int) -> Tuple[int, int, int, int]:
+    """(x, y, w, h) centrado en la entrada con la proporción de (width, height)."""
+    if src_w * height > width * src_h:          # entrada más ancha: recortar los costados
+        w = max(1, round(src_h * width / height))
+        return (src_w - w) // 2, 0, w, src_h
+    h = max(1, round(src_w * height / width))   # más alta: recortar arriba y abajo
+    return 0, (src_h - h) // 2, src_w, h
+
+
+class Preprocessor:
+    """
+    Lleva frames BGR de la cámara a (width, height), opcionalmente espejados.
+    Con espejo usa un cv2.remap (flip + resize fusionados); sin espejo, un
+    cv2.resize con dst=. Los mapas se recalculan sólo si cambia la entrada.
+
+    Con *crop* la entrada se recorta al centro con la proporción de la salida
+    en vez de estirarse (p. ej. un modo 16:9 sobre la cámara 4:3 del hub).
+    """
+
+    def __init__(self, width: int, height: int, mirror: bool = False, crop: bool = False):
+        self.width = width
+        self.height = height
+        self.mirror = mirror
+        self.crop = crop
+        self._buffers = [None] * N_BUFFERS
+        self._i = 0
+        self._maps_for: Optional[Tuple[int, int]] = None
+        self._map1: Optional[np.ndarray] = None
+        self._map2: Optional[np.ndarray] = None
+        self._proxies: Dict[int, InferenceProxy] = {}   # compartidos por las vistas
+
+    def _box(self, src_w: int, src_h: int) -> Tuple[int, int, int, int]:
+        if self.crop:
+            return crop_box(src_w, src_h, self.width, self.height)
+        return 0, 0, src_w, src_h
+
+    def _build_maps(self, src_w: int, src_h: int) -> None:
+        # Centro de píxel a centro de píxel, como cv2.resize con INTER_LINEAR
+        x0, y0, w, h = self._box(src_w, src_h)
+        sx, sy = w / self.width, h / self.height
+        xs = (np.arange(self.width, dtype=np.float32) + 0.5) * sx - 0.5 + x0
+        ys = (np.arange(self.height, dtype=np.float32) + 0.5) * sy - 0.5 + y0
+        if self.mirror:
+            xs = xs[::-1].copy()
+        map_x = np.broadcast_to(xs, (self.height, self.width))
+        map_y = np.broadcast_to(ys[:, None], (self.height, self.width))
+        # Punto fijo (CV_16SC2): remap bastante más rápido que con mapas float
+        self._map1, self._map2 = cv2.convertMaps(np.ascontiguousarray(map_x),
+                                                 np.ascontiguousarray(map_y), cv2.CV_16SC2)
+        self._maps_for = (src_w, src_h)
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        out = self._buffers[self._i] = ensure(self._buffers[self._i],
+                                              (self.height, self.width) + frame.shape[2:])
+        self._i = (self._i + 1) % N_BUFFERS
+
+        if self.mirror:
+            if self._maps_for != (w, h):
+                self._build_maps(w, h)
+            cv2.remap(frame, self._map1, self._map2, cv2.INTER_LINEAR, dst=out)
+            return out
+        if self.crop:
+            x0, y0, w, h = self._box(w, h)
+            frame = frame[y0:y0 + h, x0:x0 + w]
+        if (w, h) == (self.width, self.height):
+            np.copyto(out, frame)    # los frames del hub son de sólo lectura
+        else:
+            cv2.resize(frame, (self.width, self.height), dst=out, interpolation=cv2.INTER_LINEAR)
+        return out
+
+    def views(self, frame: np.ndarray) -> "FrameViews":
+        """Vistas perezosas de *frame* (normalmente lo que devolvió __call__)."""
+        return FrameViews(frame, self._proxies)
+
+
+class InferenceProxy:
+    """Copia reducida a *width* de ancho y en RGB para MediaPipe, en buffers reutilizados."""
+
+    def __init__(self, width: int):
+        self.width = width
+        self._small: Optional[np.ndarray] = None
+        self._rgb: Optional[np.ndarray] = None
+
+    def size_for(self, frame: np.ndarray) -> Tuple[int, int]:
+        h, w = frame.shape[:2]
+        if self.width <= 0 or w <= self.width:
+            return w, h
+        return self.width, max(1, round(h * self.width / w))
+
+    def small(self, frame: np.ndarray) -> np.ndarray:
+        """El frame reducido (BGR); el propio frame si ya es chico."""
+        size = self.size_for(frame)
+        if size == (frame.shape[1], frame.shape[0]):
+            return frame
+        self._small = ensure(self._small, (size[1], size[0]) + frame.shape[2:])
+        return cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+
+    def to_rgb(self, small: np.ndarray) -> np.ndarray:
+        self._rgb = ensure(self._rgb, small.shape)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+    def __call__(self, frame: np.ndarray) -> np.ndarray:
+        return self.to_rgb(self.small(frame))
+
+
+class FrameViews:
+    """
+    Un frame BGR y sus vistas derivadas, calculadas una vez y sólo si se piden.
+    Las vistas salen del contenido de bgr en el momento del primer pedido:
+    hay que pedirlas antes de dibujar sobre el frame.
+
+    gray, rgb y mirrored son arrays propios (se pueden pasar a otro hilo);
+    proxy() y proxy_rgb() usan los buffers reutilizados de *proxies*.
+    """
+
+    __slots__ = ("bgr", "_proxies", "_memo")
+
+    def __init__(self, bgr: np.ndarray, proxies: Optional[Dict[int, InferenceProxy]] = None):
+        self.bgr = bgr
+        self._proxies = {} if proxies is None else proxies
+        self._memo: Dict[Any, np.ndarray] = {}
+
+    def _get(self, key: Any, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        out = self._memo.get(key)
+        if out is None:
+            out = self._memo[key] = compute()
+        return out
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.bgr.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self._get("gray", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def rgb(self) -> np.ndarray:
+        return self._get("rgb", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB))
+
+    @property
+    def mirrored(self) -> np.ndarray:
+        return self._get("mirrored", lambda: cv2.flip(self.bgr, 1))
+
+    def _proxy_for(self, width: int) -> InferenceProxy:
+        proxy = self._proxies.get(width)
+        if proxy is None:
+            proxy = self._proxies[width] = InferenceProxy(width)
+        return proxy
+
+    def proxy(self, width: int) -> np.ndarray:
+        """Copia BGR reducida a *width* de ancho (el propio frame si ya es chico)."""
+        return self._get(("proxy", width), lambda: self._proxy_for(width).small(self.bgr))
+
+    def proxy_rgb(self, width: int) -> np.ndarray:
+        """La copia reducida en RGB, para MediaPipe."""
+        return self._get(("proxy_rgb", width),
+                         lambda: self._proxy_for(width).to_rgb(self.proxy(width)))
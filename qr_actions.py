@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import webbrowser
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import metrics
+
+# Qué hacer con el contenido de un QR. Los modos llaman a dispatch(texto) y
+# siguen con el frame: las acciones (abrir el navegador puede tardar cientos
+# de ms) corren en un hilo aparte. Cada tipo de contenido tiene su handler:
+#   'url'   http:// y https://
+#   'wifi'  WIFI:S:<red>;T:<WPA|WEP|nopass>;P:<clave>;;
+#   'texto' cualquier otra cosa
+# y cualquier esquema propio ("kiosk:...") se agrega con @registrar("kiosk").
+#
+# Un mismo contenido no se repite mientras siga apareciendo y hasta DEDUP_TTL
+# segundos después de dejar de verse; el caché recuerda varios QR a la vez
+# para que dos códigos en pantalla no se reabran uno al otro.
+
+DEDUP_TTL = 3.0
+DEDUP_SIZE = 32
+QUEUE_SIZE = 8
+STOP_TIMEOUT = 1.0
+
+Handler = Callable[[str], None]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def registrar(tipo: str) -> Callable[[Handler], Handler]:
+    """Registra el handler de *tipo* ('url', 'wifi', 'texto' o un esquema propio)."""
+    def deco(fn: Handler) -> Handler:
+        HANDLERS[tipo] = fn
+        return fn
+    return deco
+
+
+def clasificar(data: str) -> str:
+    """Tipo de contenido de *data*: 'url', 'wifi', un esquema registrado o 'texto'."""
+    esquema, sep, _ = data.partition(":")
+    esquema = esquema.lower()
+    if not sep:
+        return "texto"
+    if esquema in ("http", "https") and data[len(esquema) + 1:].startswith("//"):
+        return "url"
+    if esquema == "wifi":
+        return "wifi"
+    if esquema in HANDLERS and esquema not in ("url", "texto"):
+        return esquema
+    return "texto"
+
+
+def parse_wifi(data: str) -> Dict[str, str]:
+    """Campos de un QR de Wi-Fi (S, T, P, H), con los escapes \\; \\, \\: \\\\ resueltos."""
+    campos: Dict[str, str] = {}
+    cuerpo = data[len("WIFI:"):]
+    key, val, escape, en_valor = "", "", False, False
+    for ch in cuerpo:
+        if escape:
+            val += ch
+            escape = False
+        elif ch == "\\":
+            escape = True
+        elif not en_valor and ch == ":":
+            en_valor = True
+        elif ch == ";":
+            if key:
+                campos[key.upper()] = val
+            key, val, en_valor = "", "", False
+        elif en_valor:
+            val += ch
+        else:
+            key += ch
+    return campos
+
+
+@registrar("url")
+def _abrir_url(data: str) -> None:
+    webbrowser.open(data)
+
+
+@registrar("wifi")
+def _mostrar_wifi(data: str) -> None:
+    campos = parse_wifi(data)
+    print(f"📶 Red Wi-Fi: {campos.get('S', '?')} ({campos.get('T', 'sin seguridad')}); "
+          "no se conecta automáticamente.")
+
+
+@registrar("texto")
+def _mostrar_texto(data: str) -> None:
+    print("⚠️ Contenido QR no es URL http/https; no se abre automáticamente.")
+
+
+class RecentCache:
+    """LRU acotado con vencimiento: recuerda contenidos vistos hace menos de *ttl* segundos."""
+
+    def __init__(self, size: int = DEDUP_SIZE, ttl: float = DEDUP_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+    def seen(self, key: str, now: float) -> bool:
+        """True si *key* se vio hace menos de ttl. Siempre renueva su marca de tiempo."""
+        last = self._seen.pop(key, None)
+        self._seen[key] = now
+        if len(self._seen) > self.size:
+            self._seen.popitem(last=False)
+        return last is not None and now - last < self.ttl
+
+    def forget(self, key: str) -> None:
+        """Olvida *key*: la próxima vez que aparezca no cuenta como repetido."""
+        self._seen.pop(key, None)
+
+    def clear(self) -> None:
+        self._seen.clear()
+
+
+class QrDispatcher:
+    """Deduplica y encola contenidos de QR; un hilo ejecuta el handler de cada tipo."""
+
+    def __init__(self, handlers: Optional[Dict[str, Handler]] = None,
+                 ttl: float = DEDUP_TTL, size: int = DEDUP_SIZE, queue_size: int = QUEUE_SIZE):
+        self.handlers = HANDLERS if handlers is None else handlers
+        self.recent = RecentCache(size, ttl)
+        self.dispatched = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._loop, name="qr-actions", daemon=True)
+        self._thread.start()
+
+    def dispatch(self, data: str) -> bool:
+        """Encola la acción para *data*. False si es repetido o la cola está llena."""
+        now = time.monotonic()
+        if self.recent.seen(data, now):
+            self.duplicates += 1
+            return False
+        tipo = clasificar(data)
+        try:
+            self._queue.put_nowait((tipo, data, now))
+        except queue.Full:
+            # Sin olvidarlo, un QR sostenido frente a la cámara renovaría su TTL
+            # en cada lectura y no se abriría nunca
+            self.recent.forget(data)
+            self.dropped += 1
+            print(f"⚠ Cola de acciones QR llena; se descarta: {data[:60]}")
+            return False
+        self.dispatched += 1
+        metrics.gauge("qr_cola", self._queue.qsize())
+        print(f"QR ({tipo}):", data)
+        return True
+
+    def close(self) -> None:
+        """Termina las acciones pendientes (hasta STOP_TIMEOUT) y para el hilo."""
+        try:
+            self._queue.put(None, timeout=STOP_TIMEOUT)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=STOP_TIMEOUT)
+
+    def _loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            tipo, data, t_queued = item
+            metrics.gauge("qr_cola", self._queue.qsize())
+            metrics.record("qr_accion_espera", time.monotonic() - t_queued)
+            handler = self.handlers.get(tipo) or self.handlers.get("texto")
+            t0 = time.perf_counter()
+            try:
+                if handler is not None:
+                    handler(data)
+            except Exception as e:
+                print(f"⚠ Error en la acción QR ({tipo}): {e}")
+            metrics.record(f"qr_accion_{tipo}", time.perf_counter() - t0)
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
 import cv2
-import subprocess
-import webbrowser
 import time
 import sys
-from pyzbar.pyzbar import decode
 import mediapipe as mp
 
+import camera_hub
+import display
+import focus_tracker
+import gesture_filter
+import gesture_history
+import gestures
+import hand_engine
+import metrics
+import preprocess
+import qr_actions
+import qr_scanner
+
 # ---- Config ventana ----
 WINDOW_QR = "Modo QR"
 FULLSCREEN = False  # Desactivado para usar tamaño fijo
@@ -15,119 +24,142 @@ WIN_W, WIN_H = 1200, 960  # Tamaño fijo ventana y captura
 
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
-hands_detector = mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.7)
-
-def ventana_tiene_focus(expected_name: str) -> bool:
-    """Devuelve True si la ventana activa contiene expected_name (requiere xdotool en Linux/X11)."""
-    try:
-        name = subprocess.check_output(
-            ["xdotool", "getactivewindow", "getwindowname"],
-            stderr=subprocess.DEVNULL,
-        ).decode().strip()
-        return expected_name in name
-    except Exception:
-        # En Windows o si no hay xdotool, asumimos que sí tiene foco
-        return True
-
-def detectar_gesto_ok(lm) -> bool:
-    # lm es un objeto Landmarks de MediaPipe
-    thumb_tip = lm.landmark[4]
-    index_tip = lm.landmark[8]
-    dist = ((thumb_tip.x - index_tip.x) ** 2 + (thumb_tip.y - index_tip.y) ** 2) ** 0.5
-    return dist < 0.05
-
-def run(arduino: object | None = None, camera_index: int = 0) -> None:
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
+HANDS_CONFIG = hand_engine.HandConfig(max_num_hands=1, min_detection_confidence=0.7)
+
+# Gestos dinámicos que salen del modo al instante (sin esperar DELAY_OK).
+# Pasar un celular o una entrada frente a la cámara también es un barrido:
+# sólo cuenta con la palma abierta y si no se leyó ningún QR hace poco.
+GESTOS_SALIR = ("swipe_izquierda", "swipe_derecha")
+PALMA_MIN_DEDOS = 4      # dedos extendidos para considerar la palma abierta
+QR_RECIENTE_SEG = 2.0    # tras leer un QR, un barrido no sale del modo
+
+
+def _palma_abierta(arr) -> bool:
+    if len(arr) == 0:
+        return False
+    return int(gestures.evaluar(arr[:1], ("dedos",))["dedos"][0].sum()) >= PALMA_MIN_DEDOS
+
+
+def run(arduino: object | None = None, camera_index: int = 0,
+        hub: camera_hub.CameraHub | None = None) -> None:
+    cap = camera_hub.open_capture(hub, camera_index, WIN_W, WIN_H)
+    if cap is None:
         print("❌ No se pudo abrir la cámara para el modo QR")
         return
 
-    # Fijar resolución de captura
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIN_W)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, WIN_H)
+    hands_detector = hand_engine.get(HANDS_CONFIG)
 
     # Crear ventana tamaño fijo
-    cv2.namedWindow(WINDOW_QR, cv2.WINDOW_NORMAL)
-    cv2.resizeWindow(WINDOW_QR, WIN_W, WIN_H)
+    display.namedWindow(WINDOW_QR, cv2.WINDOW_NORMAL)
+    display.resizeWindow(WINDOW_QR, WIN_W, WIN_H)
 
-    print("[ MODO QR ] Mostrar QR. Haz gesto OK para cambiar modo (espera 3s) | 'q' o ESC para salir")
+    print("[ MODO QR ] Mostrar QR. Desliza la mano abierta o haz gesto OK (espera 3s) para cambiar modo "
+          "| 'q' o ESC para salir")
 
     bloqueado = False
-    ultimo_url: str | None = None
-    ultimo_open = 0.0
 
-    ok_gesture_start: float | None = None
     DELAY_OK = 3.0  # segundos de delay antes de cambio
+    dinamicos = gesture_history.DynamicGestureDetector()
+    suavizado = gesture_filter.OneEuroFilter()
+    ok_hold = gesture_filter.OkHold(DELAY_OK)
+    scanner = qr_scanner.QrScanner()
+    acciones = qr_actions.QrDispatcher()
+    focus = focus_tracker.FocusTracker(WINDOW_QR).start()
+    prep = preprocess.Preprocessor(WIN_W, WIN_H)
+    ultimo_qr = float("-inf")   # monotonic del último QR leído
 
     while True:
+        metrics.begin_frame()
         ok, frame = cap.read()
         if not ok:
             break
+        metrics.lap("captura")
 
-        frame = cv2.resize(frame, (WIN_W, WIN_H))
+        frame = prep(frame)
+        vistas = prep.views(frame)  # gris (QR) y proxy RGB (manos) una vez por frame
+        if not bloqueado:
+            scanner.submit(vistas)  # decodifica en su hilo; el resultado llega por poll()
+        metrics.lap("preproceso")
 
         # Detectar manos y gesto OK
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        resultados = hands_detector.process(rgb)
-
-        gesto_ok_detectado = False
-        if resultados.multi_hand_landmarks:
-            for lm in resultados.multi_hand_landmarks:
-                mp_drawing.draw_landmarks(frame, lm, mp_hands.HAND_CONNECTIONS)
-                if detectar_gesto_ok(lm):
-                    gesto_ok_detectado = True
-                    break
-
-        # Si gesto OK detectado, iniciar/revisar temporizador
-        now = time.time()
-        if gesto_ok_detectado:
-            if ok_gesture_start is None:
-                ok_gesture_start = now
-            elif now - ok_gesture_start >= DELAY_OK:
-                print("✅ Gesto OK mantenido 3s, cambiando modo...")
-                break  # salir del modo QR para cambiar
+        manos = hands_detector.process(vistas)
+        metrics.lap("manos")
+
+        t_mono = time.monotonic()
+        arr = gestures.to_array(manos)
+        for lm in manos:
+            mp_drawing.draw_landmarks(frame, lm, mp_hands.HAND_CONNECTIONS)
+
+        # Swipe con la palma abierta y sin QR a la vista: cambio de modo inmediato
+        if (dinamicos.update(arr, t_mono) in GESTOS_SALIR and _palma_abierta(arr)
+                and t_mono - ultimo_qr > QR_RECIENTE_SEG):
+            print(f"✅ {dinamicos.last_gesture}, cambiando modo...")
+            break
+
+        # Gesto OK mantenido (suavizado + histéresis + debounce)
+        if len(arr):
+            arr_suave = suavizado(arr, t_mono)
+        else:
+            suavizado.reset()  # la próxima mano no se suaviza contra esta pose vieja
+            arr_suave = arr
+        if ok_hold.update(arr_suave, t_mono, hands_detector.confidence):
+            print("✅ Gesto OK mantenido 3s, cambiando modo...")
+            break  # salir del modo QR para cambiar
+        if ok_hold.active:
             # Mostrar texto de cuenta regresiva para feedback
-            tiempo_restante = int(DELAY_OK - (now - ok_gesture_start) + 1)
+            tiempo_restante = int(ok_hold.remaining + 1)
             cv2.putText(frame, f"Cambiando modo en: {tiempo_restante}s",
                         (20, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
-        else:
-            ok_gesture_start = None
 
-        cv2.imshow(WINDOW_QR, frame)
+        metrics.lap("gestos")
+        metrics.draw_hud(frame)
+        display.imshow(WINDOW_QR, frame)
+        metrics.lap("mostrar")
 
         # Si la ventana fue cerrada
-        if cv2.getWindowProperty(WINDOW_QR, cv2.WND_PROP_VISIBLE) < 1:
+        if display.getWindowProperty(WINDOW_QR, cv2.WND_PROP_VISIBLE) < 1:
             break
 
-        # Pausa si la ventana pierde foco (solo aplica donde xdotool funcione)
-        if not ventana_tiene_focus(WINDOW_QR):
+        # Pausa si la ventana pierde foco (X11; el tracker consulta en segundo plano)
+        if not focus.focused:
             if not bloqueado:
                 print("🔒 Ventana sin focus — escaneo pausado")
                 bloqueado = True
-            key = cv2.waitKey(100) & 0xFF
+            key = display.waitKey(100) & 0xFF
+            metrics.lap("display")
+            metrics.end_frame()
             if key in (27, ord("q")):
+                scanner.close()
+                acciones.close()
+                focus.stop()
                 sys.exit(0)
             continue
         else:
             if bloqueado:
                 print("✅ Ventana con focus — escaneo reanudado")
                 bloqueado = False
+                scanner.reset()
 
-        # Escaneo QR solo si no bloqueado
+        # Resultados del escáner (solo si no bloqueado)
+        resultados = scanner.poll()
+        if resultados:
+            ultimo_qr = time.monotonic()
         if not bloqueado:
-            for qr in decode(frame):
-                url = qr.data.decode()
-                if url == ultimo_url and (now - ultimo_open) < 3:
-                    continue
-                print("QR:", url)
-                ultimo_url, ultimo_open = url, now
-                webbrowser.open(url)
-                bloqueado = True
-                break
+            for qr in resultados:
+                acciones.dispatch(qr.data)   # dedup + handler por tipo, fuera de este hilo
+        metrics.lap("qr")
 
-        key = cv2.waitKey(1) & 0xFF
+        key = display.waitKey(1) & 0xFF
+        metrics.lap("display")
+        metrics.end_frame()
         if key in (27, ord("q")):
+            scanner.close()
+            acciones.close()
+            focus.stop()
             sys.exit(0)
 
+    scanner.close()
+    acciones.close()
+    focus.stop()
     cap.release()
-    cv2.destroyWindow(WINDOW_QR)
+    display.destroyWindow(WINDOW_QR)
@@ -1,29 +1,15 @@
 from __future__ import annotations
 
 import cv2
-import subprocess
-import webbrowser
-import time
 import sys
-from pyzbar.pyzbar import decode
+
+import focus_tracker
+import qr_actions
+import qr_scanner
 
 WINDOW_QR = "Modo QR"
 FULLSCREEN = True  # ← pantalla completa ON/OFF
 
-def ventana_tiene_focus(expected_name: str) -> bool:
-    """
-    Devuelve True si la ventana activa contiene expected_name.
-    Requiere xdotool (NO compatible con Wayland). En Wayland devolvemos True.
-    """
-    try:
-        name = subprocess.check_output(
-            ["xdotool", "getactivewindow", "getwindowname"],
-            stderr=subprocess.DEVNULL,
-        ).decode().strip()
-        return expected_name in name
-    except Exception:
-        return True
-
 
 def run(camera_index: int = 0) -> None:
     cap = cv2.VideoCapture(camera_index)
@@ -41,13 +27,16 @@ def run(camera_index: int = 0) -> None:
     print("[ MODO QR ] Presiona 'k' para cambiar de modo | 'q' o ESC para salir")
 
     bloqueado = False
-    ultimo_url: str | None = None
-    ultimo_open = 0.0
+    scanner = qr_scanner.QrScanner()
+    acciones = qr_actions.QrDispatcher()
+    focus = focus_tracker.FocusTracker(WINDOW_QR).start()
 
     while True:
         ok, frame = cap.read()
         if not ok:
             break
+        if not bloqueado:
+            scanner.submit(frame)
 
         cv2.imshow(WINDOW_QR, frame)
 
@@ -56,7 +45,7 @@ def run(camera_index: int = 0) -> None:
             break
 
         # Pausar si no hay foco (solo X11 con xdotool)
-        if not ventana_tiene_focus(WINDOW_QR):
+        if not focus.focused:
             if not bloqueado:
                 print("🔒 Ventana sin focus — escaneo pausado")
                 bloqueado = True
@@ -64,6 +53,9 @@ def run(camera_index: int = 0) -> None:
             if key == ord("k"):
                 break
             if key in (27, ord("q")):
+                scanner.close()
+                acciones.close()
+                focus.stop()
                 cap.release()
                 cv2.destroyWindow(WINDOW_QR)
                 sys.exit(0)
@@ -72,34 +64,28 @@ def run(camera_index: int = 0) -> None:
             if bloqueado:
                 print("✅ Ventana con focus — escaneo reanudado")
                 bloqueado = False
+                scanner.reset()
 
+        resultados = scanner.poll()
         if not bloqueado:
-            # Decodifica en BGR (podrías acelerar pasando a escala de grises)
-            for qr in decode(frame):
-                url = qr.data.decode().strip()
-                ahora = time.time()
-                # Evita reabrir el mismo URL en < 3s
-                if url == ultimo_url and ahora - ultimo_open < 3:
-                    continue
-                print("QR:", url)
-                ultimo_url, ultimo_open = url, ahora
-
-                # Validación simple de URL (opcional)
-                if url.startswith(("http://", "https://")):
-                    webbrowser.open(url)
-                else:
-                    print("⚠️ Contenido QR no es URL http/https; no se abre automáticamente.")
-
-                bloqueado = True  # Evita escanear repetidamente hasta cambiar foco
-                break
+            # Escala de grises, recortes y multi-escala en el hilo de qr_scanner
+            # Sólo http/https abre el navegador; el resto se informa (ver qr_actions)
+            for qr in resultados:
+                acciones.dispatch(qr.data)
 
         key = cv2.waitKey(1) & 0xFF
         if key == ord("k"):
             break
         if key in (27, ord("q")):
+            scanner.close()
+            acciones.close()
+            focus.stop()
             cap.release()
             cv2.destroyWindow(WINDOW_QR)
             sys.exit(0)
 
+    scanner.close()
+    acciones.close()
+    focus.stop()
     cap.release()
     cv2.destroyWindow(WINDOW_QR)
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+from pyzbar.pyzbar import ZBarSymbol, decode
+
+import metrics
+import preprocess
+
+# Escaneo QR rápido para los modos QR:
+#   1. escala de grises (una sola conversión, que además desacopla el frame del
+#      que dibuja el modo),
+#   2. localización de candidatos en una versión chica (bordes en x e y +
+#      cierre morfológico) para que zbar decodifique sólo recortes,
+#   3. decodificación multi-escala de cada recorte (primero la escala chica),
+#   4. salto adaptativo de frames mientras no aparece nada,
+#   5. todo en un hilo: submit() nunca bloquea al loop de manos/dibujo.
+
+LOCATE_WIDTH = 320          # ancho de la imagen donde se buscan candidatos
+MIN_AREA_FRAC = 0.004       # área mínima del candidato respecto de la imagen chica
+MAX_ASPECT = 2.5            # un QR (aun inclinado) no es mucho más ancho que alto
+MAX_CANDIDATES = 3
+CROP_PAD = 0.25             # margen alrededor del candidato (zbar necesita zona quieta)
+DECODE_SCALES = (0.5, 1.0)  # primero la escala chica: suele alcanzar y es 4x más barata
+MIN_DECODE_PX = 120         # no bajar un recorte por debajo de este lado
+FULL_FRAME_SCALE = 0.5      # respaldo: frame entero reducido
+FULL_FRAME_EVERY = 4        # cada cuántos escaneos sin candidatos se prueba el respaldo
+MAX_SKIP = 3                # frames máximos salteados entre escaneos vacíos
+STOP_TIMEOUT = 1.0
+
+_CLOSE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9))
+
+Rect = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class QrResult:
+    data: str
+    rect: Rect              # (x, y, w, h) en coordenadas del frame completo
+
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def candidates(gray: np.ndarray) -> List[Rect]:
+    """Regiones (x, y, w, h) del frame completo que parecen un QR, la más grande primero."""
+    h, w = gray.shape
+    scale = LOCATE_WIDTH / w
+    small = cv2.resize(gray, (LOCATE_WIDTH, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    # Un QR tiene bordes fuertes en x *y* en y, densos en un área compacta
+    gx = cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 1, 0, ksize=3))
+    gy = cv2.convertScaleAbs(cv2.Sobel(small, cv2.CV_16S, 0, 1, ksize=3))
+    mag = cv2.blur(cv2.min(gx, gy), (5, 5))
+    _, mask = cv2.threshold(mag, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, _CLOSE_KERNEL)
+    mask = cv2.erode(mask, None, iterations=2)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = MIN_AREA_FRAC * small.size
+    boxes = []
+    for c in contours:
+        x, y, bw, bh = cv2.boundingRect(c)
+        if bw * bh < min_area or not 1 / MAX_ASPECT <= bw / bh <= MAX_ASPECT:
+            continue
+        boxes.append((bw * bh, x, y, bw, bh))
+    boxes.sort(reverse=True)
+
+    out: List[Rect] = []
+    for _, x, y, bw, bh in boxes[:MAX_CANDIDATES]:
+        pad_x, pad_y = bw * CROP_PAD, bh * CROP_PAD
+        x0 = max(0, int((x - pad_x) / scale))
+        y0 = max(0, int((y - pad_y) / scale))
+        x1 = min(w, int((x + bw + pad_x) / scale))
+        y1 = min(h, int((y + bh + pad_y) / scale))
+        out.append((x0, y0, x1 - x0, y1 - y0))
+    return out
+
+
+def _decode_region(gray: np.ndarray, rect: Rect) -> List[QrResult]:
+    """Decodifica el recorte *rect* probando DECODE_SCALES de menor a mayor."""
+    x0, y0, w, h = rect
+    crop = gray[y0:y0 + h, x0:x0 + w]
+    for s in DECODE_SCALES:
+        if s < 1.0:
+            if min(w, h) * s < MIN_DECODE_PX:
+                continue
+            img = cv2.resize(crop, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+        else:
+            img = np.ascontiguousarray(crop)
+        found = decode(img, symbols=[ZBarSymbol.QRCODE])
+        if found:
+            return [QrResult(f.data.decode("utf-8", errors="replace").strip(),
+                             (x0 + int(f.rect.left / s), y0 + int(f.rect.top / s),
+                              int(f.rect.width / s), int(f.rect.height / s)))
+                    for f in found]
+    return []
+
+
+def scan(frame: np.ndarray, full_frame: bool = False) -> Tuple[List[QrResult], int]:
+    """
+    Escaneo sincrónico de un frame BGR o gris. Devuelve (resultados, candidatos).
+    Sin candidatos y con *full_frame*, prueba el frame entero reducido.
+    """
+    gray = to_gray(frame)
+    rects = candidates(gray)
+    for rect in rects:
+        results = _decode_region(gray, rect)
+        if results:
+            return results, len(rects)
+    if not rects and full_frame:
+        small = cv2.resize(gray, None, fx=FULL_FRAME_SCALE, fy=FULL_FRAME_SCALE,
+                           interpolation=cv2.INTER_AREA)
+        found = decode(small, symbols=[ZBarSymbol.QRCODE])
+        return [QrResult(f.data.decode("utf-8", errors="replace").strip(),
+                         tuple(int(v / FULL_FRAME_SCALE) for v in f.rect))
+                for f in found], 0
+    return [], len(rects)
+
+
+class AdaptiveSkip:
+    """
+    Tras cada escaneo vacío espera un frame más (hasta *max_skip*). Con un QR
+    decodificado o candidatos a la vista vuelve a escanear todos los frames.
+    """
+
+    def __init__(self, max_skip: int = MAX_SKIP):
+        self.max_skip = max_skip
+        self.skip = 0
+        self._wait = 0
+
+    def should_scan(self) -> bool:
+        if self._wait > 0:
+            self._wait -= 1
+            return False
+        return True
+
+    def done(self, promising: bool) -> None:
+        self.skip = 0 if promising else min(self.skip + 1, self.max_skip)
+        self._wait = self.skip
+
+    def reset(self) -> None:
+        self.skip = self._wait = 0
+
+
+class QrScanner:
+    """
+    Escáner en un hilo propio. submit(frame) no bloquea: si el hilo está ocupado
+    o toca saltear el frame, lo descarta. poll() devuelve los QR nuevos.
+    """
+
+    def __init__(self, max_skip: int = MAX_SKIP):
+        self._skip = AdaptiveSkip(max_skip)
+        self._cond = threading.Condition()
+        self._pending: Optional[np.ndarray] = None
+        self._busy = False
+        self._results: List[QrResult] = []
+        self._empty_scans = 0
+        self._running = True
+        self.scans = 0
+        self._thread = threading.Thread(target=self._loop, name="qr-scanner", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame: np.ndarray | preprocess.FrameViews) -> bool:
+        """Encola *frame* (BGR o sus vistas) para escanear. True si se aceptó."""
+        with self._cond:
+            if self._busy or self._pending is not None or not self._skip.should_scan():
+                return False
+        # Copia propia en gris: el modo puede seguir dibujando sobre su frame
+        gray = frame.gray if isinstance(frame, preprocess.FrameViews) else to_gray(frame)
+        with self._cond:
+            self._pending = gray
+            self._cond.notify()
+        return True
+
+    def poll(self) -> List[QrResult]:
+        with self._cond:
+            out, self._results = self._results, []
+        return out
+
+    def reset(self) -> None:
+        """Olvida lo pendiente (p. ej. al reanudar el escaneo tras una pausa)."""
+        with self._cond:
+            self._pending = None
+            self._results = []
+            self._skip.reset()
+
+    def close(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=STOP_TIMEOUT)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                gray, self._pending = self._pending, None
+                self._busy = True
+                full_frame = self._empty_scans >= FULL_FRAME_EVERY
+
+            t0 = time.perf_counter()
+            try:
+                results, n_candidates = scan(gray, full_frame=full_frame)
+            except Exception as e:
+                print(f"⚠ Error escaneando QR: {e}")
+                results, n_candidates = [], 0
+            metrics.record("qr_decode", time.perf_counter() - t0)
+
+            with self._cond:
+                self.scans += 1
+                self._busy = False
+                self._results.extend(results)
+                promising = bool(results) or n_candidates > 0
+                self._empty_scans = 0 if promising or full_frame else self._empty_scans + 1
+                self._skip.done(promising)
@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import metrics
+
+# Salida serie al Arduino sin bloquear el loop de gestos: los modos dicen qué
+# LEDs quieren encendidos (set_leds) o encolan un comando suelto (send) y un
+# hilo escribe. Del estado de LEDs sólo importa el último pedido: si llegan
+# varios antes de que el hilo escriba, se aplica directamente el último.
+#
+# Con port_factory el mismo hilo abre el puerto (la app no espera), lo vigila
+# y lo vuelve a abrir si se desenchufa; al reconectar reenvía el estado completo.
+#
+# Protocolos:
+#   "legacy"  el del firmware actual: un byte por pin para encender
+#             ("8", "3", "4") y "0" para apagar todos. Sin respuesta.
+#   "framed"  tramas con secuencia y confirmación (necesita el firmware nuevo):
+#               0x02 | seq | len | payload | suma  (suma = (seq+len+payload) % 256)
+#             el Arduino responde 0x06 seq (ACK) o 0x15 seq (NAK). Payloads:
+#               b"L" + máscara   estado absoluto de LEDs (bit i = PINS[i])
+#               b"P"             ping de salud
+#               otro             comando suelto de send()
+#             Hasta WINDOW tramas en vuelo; sin ACK en ACK_TIMEOUT se reenvían
+#             (RETRIES veces) y MAX_LOST pérdidas seguidas cuentan como desconexión.
+
+RATE_HZ = 20.0          # escrituras por segundo como máximo
+QUEUE_SIZE = 16         # comandos sueltos pendientes
+STOP_TIMEOUT = 1.0
+ALL_OFF = b"0"
+PINS = ("8", "3", "4")
+
+BAUD = 9600
+WRITE_TIMEOUT = 0.5
+BOOT_DELAY = 2.0        # el Arduino se reinicia al abrir el puerto
+RECONNECT_INTERVAL = 2.0
+HEALTH_INTERVAL = 1.0   # cada cuánto se verifica el puerto sin tráfico
+
+STX, ACK, NAK = 0x02, 0x06, 0x15
+WINDOW = 4
+ACK_TIMEOUT = 0.25
+RETRIES = 2
+MAX_LOST = 3
+
+Leds = FrozenSet[str]
+_UNKNOWN: Leds = frozenset({"?"})   # estado tras reconectar: fuerza un "0" + pines
+
+
+def led_commands(current: Leds, desired: Leds) -> bytes:
+    """Bytes que llevan los LEDs de *current* a *desired* con el protocolo legacy."""
+    if current - desired:
+        # No hay comando para apagar un solo pin: apagar todo y re-encender
+        return ALL_OFF + "".join(sorted(desired)).encode()
+    return "".join(sorted(desired - current)).encode()
+
+
+def led_mask(leds: Leds) -> int:
+    return sum(1 << i for i, pin in enumerate(PINS) if pin in leds)
+
+
+def encode_frame(seq: int, payload: bytes) -> bytes:
+    body = bytes([seq & 0xFF, len(payload)]) + payload
+    return bytes([STX]) + body + bytes([sum(body) & 0xFF])
+
+
+class AckParser:
+    """Extrae (ACK|NAK, seq) de los bytes que manda el Arduino; ignora el resto."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int]]:
+        self._buf.extend(data)
+        out = []
+        i = 0
+        while i < len(self._buf):
+            if self._buf[i] in (ACK, NAK):
+                if i + 1 >= len(self._buf):
+                    break
+                out.append((self._buf[i], self._buf[i + 1]))
+                i += 2
+            else:
+                i += 1
+        del self._buf[:i]
+        return out
+
+
+def serial_port(path: str, baud: int = BAUD) -> Callable[[], Any]:
+    """Factory para SerialLink(port_factory=...) sobre un dispositivo real."""
+    import serial
+
+    return lambda: serial.Serial(path, baud, timeout=0, write_timeout=WRITE_TIMEOUT)
+
+
+class SerialLink:
+    """
+    Escritor asíncrono sobre un puerto con write()/flush() (serial.Serial, un
+    loopback o None para descartar todo). set_leds() y send() nunca bloquean.
+    Con *port_factory* el puerto se abre y reabre en segundo plano.
+    """
+
+    def __init__(self, port=None, rate_hz: float = RATE_HZ, queue_size: int = QUEUE_SIZE,
+                 port_factory: Optional[Callable[[], Any]] = None, protocol: str = "legacy"):
+        if protocol not in ("legacy", "framed"):
+            raise ValueError(f"Protocolo desconocido: {protocol!r}")
+        self.port = port
+        self.port_factory = port_factory
+        self.protocol = protocol
+        self.min_interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+        self.desired: Leds = frozenset()      # lo último que pidió el modo
+        self.applied: Leds = frozenset()      # lo último escrito (legacy) o confirmado (framed)
+        self.requests = 0                     # cambios de estado pedidos
+        self.writes = 0                       # escrituras hechas
+        self.errors = 0
+        self.dropped = 0
+        self.retransmits = 0
+        self.lost = 0                         # tramas sin ACK tras RETRIES reenvíos
+        self.connects = 0
+        self._dirty_since: Optional[float] = None
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=queue_size)
+        self._cond = threading.Condition()
+        self._running = True
+        self._last_write = 0.0
+        self._ready_at = 0.0
+        self._next_connect = 0.0
+        self._next_health = 0.0
+        self._warned = False
+        self._seq = 0
+        self._in_flight: Dict[int, list] = {}   # seq -> [trama, t_pedido, t_envío, intentos, leds]
+        self._lost_streak = 0
+        self._acks = AckParser()
+        self._thread = threading.Thread(target=self._loop, name="serial-link", daemon=True)
+        self._thread.start()
+
+    @property
+    def connected(self) -> bool:
+        return self.port is not None
+
+    def set_leds(self, leds: Iterable[str]) -> None:
+        """Estado deseado de los LEDs (pines encendidos). Reemplaza al pedido anterior."""
+        leds = frozenset(leds)
+        with self._cond:
+            if leds == self.desired:
+                return
+            self.desired = leds
+            self.requests += 1
+            if self._dirty_since is None:
+                self._dirty_since = time.perf_counter()
+            self._cond.notify()
+
+    def send(self, data: bytes) -> bool:
+        """Encola un comando suelto. False si la cola está llena (se descarta)."""
+        try:
+            self._queue.put_nowait((data, time.perf_counter()))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        with self._cond:
+            self._cond.notify()
+        return True
+
+    def close(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=STOP_TIMEOUT)
+        self._disconnect()
+
+    # -- hilo ------------------------------------------------------------------
+
+    def _writable(self, now: float) -> bool:
+        if self.port is None:
+            return self.port_factory is None      # sin factory: se descartan
+        if now < self._ready_at:
+            return False
+        return self.protocol == "legacy" or len(self._in_flight) < WINDOW
+
+    def _has_work(self, now: float) -> bool:
+        return self._writable(now) and (not self._queue.empty() or self._dirty_since is not None)
+
+    def _idle_timeout(self, now: float) -> Optional[float]:
+        """Hasta cuándo puede dormir el hilo sin trabajo (None = hasta un notify)."""
+        if self.port is None:
+            return None if self.port_factory is None else max(0.0, self._next_connect - now)
+        deadlines = [self._ready_at, self._next_health]
+        deadlines += [f[2] + ACK_TIMEOUT for f in self._in_flight.values()]
+        if self.protocol == "framed":
+            deadlines.append(now + ACK_TIMEOUT)   # leer ACKs aunque no haya nada que enviar
+        # Los plazos ya vencidos se atienden en la vuelta actual: esperar 0 giraría en vacío
+        future = [d for d in deadlines if d > now]
+        return min(future) - now if future else None
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                now = time.perf_counter()
+                if self._running and not self._has_work(now):
+                    self._cond.wait(timeout=self._idle_timeout(now))
+                if not self._running:
+                    return
+            now = time.perf_counter()
+
+            if self.port is None and self.port_factory is not None:
+                if now >= self._next_connect:
+                    self._connect(now)
+                continue
+            if self.port is not None:
+                if self.protocol == "framed":
+                    self._service_acks(now)
+                if now >= self._next_health:
+                    self._health_check(now)
+                if self.port is None:
+                    continue
+
+            wait = self._last_write + self.min_interval - time.perf_counter()
+            if wait > 0:
+                # Rate limit: mientras tanto los pedidos de LEDs se siguen fusionando
+                time.sleep(wait)
+            with self._cond:
+                job = self._next_job(time.perf_counter())
+            if job is not None:
+                self._do_job(*job)
+
+    def _next_job(self, now: float) -> Optional[tuple]:
+        """Bajo el lock: (payload, t_pedido, leds) de lo próximo a escribir, o None."""
+        if not self._writable(now):
+            return None
+        if not self._queue.empty():
+            data, t_req = self._queue.get_nowait()
+            return data, t_req, None
+        if self._dirty_since is not None:
+            t_req, self._dirty_since = self._dirty_since, None
+            desired = self.desired
+            if self.protocol == "framed":
+                return b"L" + bytes([led_mask(desired)]), t_req, desired
+            return led_commands(self.applied, desired), t_req, desired
+        return None
+
+    def _do_job(self, payload: bytes, t_req: float, leds: Optional[Leds]) -> None:
+        if self.protocol == "legacy":
+            if self._write(payload, t_req) and leds is not None:
+                self.applied = leds
+            return
+        self._seq = (self._seq + 1) & 0xFF
+        frame = encode_frame(self._seq, payload)
+        if self._write(frame, t_req) and self.port is not None:
+            self._in_flight[self._seq] = [frame, t_req, self._last_write, 0, leds]
+
+    def _write(self, data: bytes, t_req: float) -> bool:
+        """Escribe *data*; False si el puerto falló (queda desconectado)."""
+        self._last_write = t0 = time.perf_counter()
+        metrics.gauge("serial_cola", self._queue.qsize())
+        if not data or self.port is None:
+            return True
+        try:
+            self.port.write(data)
+            self.port.flush()
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠ Error escribiendo al Arduino: {e}")
+            self._disconnect()
+            return False
+        t1 = time.perf_counter()
+        self.writes += 1
+        self._next_health = t1 + HEALTH_INTERVAL
+        metrics.record("serial_write", t1 - t0)
+        if self.protocol == "legacy":
+            metrics.record("serial_latencia", t1 - t_req)
+        return True
+
+    # -- protocolo con ACK ---------------------------------------------------------
+
+    def _service_acks(self, now: float) -> None:
+        try:
+            waiting = self.port.in_waiting
+            data = self.port.read(waiting) if waiting else b""
+        except Exception as e:
+            print(f"⚠ Error leyendo del Arduino: {e}")
+            self._disconnect()
+            return
+        for kind, seq in self._acks.feed(data):
+            entry = self._in_flight.get(seq)
+            if entry is None:
+                continue
+            if kind == ACK:
+                del self._in_flight[seq]
+                self._lost_streak = 0
+                metrics.record("serial_latencia", now - entry[1])
+                if entry[4] is not None:
+                    self.applied = entry[4]
+            else:
+                entry[2] = 0.0          # NAK: reenviar ya
+        for seq, entry in list(self._in_flight.items()):
+            if now - entry[2] < ACK_TIMEOUT:
+                continue
+            if entry[3] < RETRIES:
+                entry[3] += 1
+                self.retransmits += 1
+                if not self._write(entry[0], entry[1]):
+                    return
+                entry[2] = self._last_write
+                continue
+            del self._in_flight[seq]
+            self.lost += 1
+            self._lost_streak += 1
+            if entry[4] is not None and entry[4] == self.desired:
+                self._mark_dirty()      # el estado absoluto se vuelve a mandar
+            if self._lost_streak >= MAX_LOST:
+                print("⚠ El Arduino no confirma los comandos; reconectando...")
+                self._disconnect()
+                return
+
+    # -- conexión ------------------------------------------------------------------
+
+    def _connect(self, now: float) -> None:
+        self._next_connect = now + RECONNECT_INTERVAL
+        try:
+            port = self.port_factory()
+        except Exception as e:
+            if not self._warned:
+                print(f"⚠ No se pudo conectar con Arduino ({e}); reintentando en segundo plano.")
+                self._warned = True
+            return
+        self.port = port
+        self.connects += 1
+        self._warned = False
+        self._ready_at = now + BOOT_DELAY
+        self._next_health = self._ready_at + HEALTH_INTERVAL
+        self._lost_streak = 0
+        self._acks = AckParser()
+        # Tras un reinicio el estado real es desconocido: mandar el completo
+        self.applied = _UNKNOWN
+        self._mark_dirty()
+        print(f"Arduino conectado en {getattr(port, 'port', port)}")
+
+    def _disconnect(self) -> None:
+        port, self.port = self.port, None
+        self._in_flight.clear()
+        if port is None:
+            return
+        if self.port_factory is not None:
+            self._next_connect = time.perf_counter() + RECONNECT_INTERVAL
+        # Un puerto recibido ya abierto tampoco vuelve: cerrarlo igual
+        try:
+            port.close()
+        except Exception:
+            pass
+
+    def _health_check(self, now: float) -> None:
+        self._next_health = now + HEALTH_INTERVAL
+        path = getattr(self.port, "port", None)
+        if isinstance(path, str) and path.startswith("/dev/") and not os.path.exists(path):
+            print("⚠ Arduino desenchufado; esperando que vuelva...")
+            self._disconnect()
+        elif self.protocol == "framed" and not self._in_flight and now >= self._ready_at:
+            self.send(b"P")
+
+    def _mark_dirty(self) -> None:
+        with self._cond:
+            if self._dirty_since is None:
+                self._dirty_since = time.perf_counter()
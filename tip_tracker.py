@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Deque, Optional, Tuple
+
+import numpy as np
+
+# Punta del índice para cortar en el minijuego. Cada muestra llega con la
+# latencia del pipeline (captura + inferencia): cuando la vemos, la mano ya
+# está más adelante. El tracker estima la velocidad con las últimas muestras
+# de la estela del juego, predice dónde está la punta "ahora" y arma el
+# recorrido entre muestras con una spline Catmull-Rom en vez de una recta,
+# para que un barrido rápido y curvo no pase al costado de los cuadros.
+
+VEL_SAMPLES = 4        # muestras para estimar la velocidad (ajuste lineal)
+LEAD_MAX = 0.15        # s: no predecir más adelante que esto
+LATENCY_SMOOTH = 0.2   # peso de cada latencia nueva en el promedio exponencial
+SUBSTEPS = 6           # tramos rectos por spline entre dos muestras
+
+Sample = Tuple[int, int, float]     # (x, y, t) como en Game.trail
+
+
+def catmull_rom(p0, p1, p2, p3, n: int = SUBSTEPS) -> np.ndarray:
+    """(n + 1, 2) puntos de la spline Catmull-Rom uniforme de p1 a p2."""
+    p0, p1, p2, p3 = (np.asarray(p, dtype=np.float64) for p in (p0, p1, p2, p3))
+    t = np.linspace(0.0, 1.0, n + 1)[:, None]
+    return 0.5 * (2.0 * p1 + (p2 - p0) * t
+                  + (2.0 * p0 - 5.0 * p1 + 4.0 * p2 - p3) * t * t
+                  + (3.0 * (p1 - p2) + p3 - p0) * t * t * t)
+
+
+class TipTracker:
+    """
+    Sigue la punta sobre *trail* (el deque (x, y, t) del juego; el tracker no
+    le agrega muestras). *predict* compensa la latencia medida; *spline*
+    curva el tramo entre muestras. Sin ninguno de los dos, path() es la recta
+    entre las dos últimas muestras, como antes.
+    """
+
+    def __init__(self, trail: Deque[Sample], predict: bool = True, spline: bool = True,
+                 lead_max: float = LEAD_MAX):
+        self.trail = trail
+        self.predict_on = predict
+        self.spline = spline
+        self.lead_max = lead_max
+        self.reset()
+
+    def reset(self) -> None:
+        self.latency = 0.0
+        self.predicted: Optional[Tuple[int, int]] = None
+        self._have_latency = False
+
+    def update_latency(self, seconds: float) -> None:
+        """Latencia medida del pipeline para la última muestra (captura -> ahora)."""
+        if not self._have_latency:
+            self.latency = seconds
+            self._have_latency = True
+        else:
+            self.latency += LATENCY_SMOOTH * (seconds - self.latency)
+
+    @property
+    def lead(self) -> float:
+        return min(self.latency, self.lead_max) if self.predict_on else 0.0
+
+    def velocity(self) -> np.ndarray:
+        """(vx, vy) en px/s: pendiente de un ajuste lineal sobre las últimas muestras."""
+        n = min(len(self.trail), VEL_SAMPLES)
+        if n < 2:
+            return np.zeros(2)
+        s = np.asarray([self.trail[i] for i in range(len(self.trail) - n, len(self.trail))],
+                       dtype=np.float64)
+        t = s[:, 2] - s[:, 2].mean()
+        den = float(t @ t)
+        if den <= 0.0:
+            return np.zeros(2)
+        return t @ (s[:, :2] - s[:, :2].mean(axis=0)) / den
+
+    def predict(self) -> np.ndarray:
+        """Dónde está la punta ahora: la última muestra más velocidad * latencia."""
+        last = np.asarray(self.trail[-1][:2], dtype=np.float64)
+        lead = self.lead
+        return last + self.velocity() * lead if lead > 0.0 else last
+
+    def path(self) -> np.ndarray:
+        """
+        (M, 2) recorrido de la punta desde la muestra anterior hasta la
+        posición predicha: spline entre las dos últimas muestras y luego la
+        extrapolación. Con una sola muestra, sólo ese punto.
+        """
+        q = self.predict()
+        self.predicted = (int(round(q[0])), int(round(q[1])))
+        if len(self.trail) < 2:
+            return q[None, :]
+        p1 = np.asarray(self.trail[-2][:2], dtype=np.float64)
+        p2 = np.asarray(self.trail[-1][:2], dtype=np.float64)
+        if self.spline:
+            p0 = np.asarray(self.trail[-3][:2], dtype=np.float64) if len(self.trail) >= 3 else p1
+            # Después de p2 la curva apunta a la predicción (o sigue derecho sin ella)
+            p3 = q if self.lead > 0.0 else 2.0 * p2 - p1
+            curve = catmull_rom(p0, p1, p2, p3)
+        else:
+            curve = np.stack((p1, p2))
+        if self.lead > 0.0:
+            curve = np.vstack((curve, q))
+        return curve
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import struct
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+
+# Grabación compacta de la entrada del minijuego: por frame, el dt de reloj,
+# la latencia medida de la muestra y la punta del índice (o nada). Con la
+# semilla y la dificultad del encabezado alcanza para repetir la partida sin
+# cámara y obtener exactamente el mismo estado (la simulación es de paso fijo
+# y su azar sale de la semilla):
+#
+#     semilla, dificultad, frames = trail_log.read("partida.trail")
+#     game = gesture_mode2.Game(dificultad, seed=semilla)
+#     for f in frames:
+#         if f.reset:
+#             game.reset()
+#         else:
+#             game.advance(f.dt)
+#             game.apply_tip(f.tip, f.latency)
+
+MAGIC = b"KTRL"
+VERSION = 1
+_HEADER = struct.Struct("<4sBI16s")    # magia, versión, semilla, dificultad
+_FRAME = struct.Struct("<ddhhB")       # dt (s), latencia (s), punta x, y, flags (21 bytes)
+
+TIP = 1          # el frame trae punta
+RESET = 2        # la partida se reinició ('r')
+
+_INT16 = (-32768, 32767)
+
+
+class TrailFrame(NamedTuple):
+    dt: float
+    tip: Optional[Tuple[int, int]]
+    reset: bool = False
+    latency: float = 0.0
+
+
+class TrailWriter:
+    """Escribe una partida frame a frame en *path* (buffer del archivo, sin hilos)."""
+
+    def __init__(self, path: str, seed: int, dificultad: str):
+        self.path = path
+        self.frames = 0
+        self._f: BinaryIO = open(path, "wb")
+        self._f.write(_HEADER.pack(MAGIC, VERSION, seed, dificultad.encode("ascii")))
+
+    def frame(self, dt: float, tip: Optional[Tuple[int, int]], latency: float = 0.0) -> None:
+        if tip is None:
+            self._f.write(_FRAME.pack(dt, latency, 0, 0, 0))
+        else:
+            x = min(max(tip[0], _INT16[0]), _INT16[1])
+            y = min(max(tip[1], _INT16[0]), _INT16[1])
+            self._f.write(_FRAME.pack(dt, latency, x, y, TIP))
+        self.frames += 1
+
+    def reset(self) -> None:
+        self._f.write(_FRAME.pack(0.0, 0.0, 0, 0, RESET))
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def read(path: str) -> Tuple[int, str, List[TrailFrame]]:
+    """(semilla, dificultad, frames) de una partida grabada."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, dificultad = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: no es una grabación de partida (v{VERSION})")
+    body = data[_HEADER.size:]
+    body = body[:len(body) - len(body) % _FRAME.size]   # un corte a mitad de frame se ignora
+    frames = [TrailFrame(dt, (x, y) if flags & TIP else None, bool(flags & RESET), latency)
+              for dt, latency, x, y, flags in _FRAME.iter_unpack(body)]
+    return seed, dificultad.rstrip(b"\0").decode("ascii"), frames